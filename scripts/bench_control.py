@@ -0,0 +1,124 @@
+"""
+Micro-benchmark of the control message encoding, messages per second
+
+    python scripts/bench_control.py [-n 200000]
+"""
+import argparse
+import os
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.scrcpy import const, encoder  # noqa: E402
+
+WIDTH, HEIGHT = 1080, 1920
+
+
+# same work as the control methods did before the precompiled encoders
+def legacy_touch(i):
+    x, y = max(i & 1023, 0), max(i & 2047, 0)
+    return struct.pack(">B", const.TYPE_INJECT_TOUCH_EVENT) + struct.pack(
+        ">BqiiHHHi",
+        const.ACTION_MOVE,
+        -1,
+        int(x),
+        int(y),
+        int(WIDTH),
+        int(HEIGHT),
+        0xFFFF,
+        1,
+    )
+
+
+def legacy_keycode(i):
+    return struct.pack(">B", const.TYPE_INJECT_KEYCODE) + struct.pack(
+        ">Biii", const.ACTION_DOWN, const.KEYCODE_A, 0, 0
+    )
+
+
+def legacy_scroll(i):
+    x, y = max(i & 1023, 0), max(i & 2047, 0)
+    return struct.pack(">B", const.TYPE_INJECT_SCROLL_EVENT) + struct.pack(
+        ">iiHHii", int(x), int(y), int(WIDTH), int(HEIGHT), int(0), int(1)
+    )
+
+
+def encoder_touch(i):
+    return encoder.touch(i & 1023, i & 2047, WIDTH, HEIGHT, const.ACTION_MOVE)
+
+
+def encoder_keycode(i):
+    return encoder.keycode(const.KEYCODE_A, const.ACTION_DOWN)
+
+
+def encoder_scroll(i):
+    return encoder.scroll(i & 1023, i & 2047, WIDTH, HEIGHT, 0, 1)
+
+
+def bench(f, n):
+    start = time.perf_counter()
+    for i in range(n):
+        f(i)
+    return n / (time.perf_counter() - start)
+
+
+def bench_joined(n, batch):
+    events = [(j & 1023, j & 2047, const.ACTION_MOVE, -1) for j in range(batch)]
+    start = time.perf_counter()
+    for i in range(0, n, batch):
+        b"".join(
+            [
+                encoder.touch(x, y, WIDTH, HEIGHT, action, touch_id)
+                for x, y, action, touch_id in events
+            ]
+        )
+    return n / (time.perf_counter() - start)
+
+
+def bench_touches(n, batch):
+    buffer = encoder.MessageBuffer()
+    events = [(j & 1023, j & 2047, const.ACTION_MOVE, -1) for j in range(batch)]
+    start = time.perf_counter()
+    for i in range(0, n, batch):
+        buffer.touches(events, WIDTH, HEIGHT)
+        buffer.getvalue()
+        buffer.clear()
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=200_000, help="messages per run")
+    parser.add_argument("--batch", type=int, default=64, help="messages per buffer")
+    args = parser.parse_args()
+
+    # check the encoders produce the same bytes
+    for i in range(64):
+        assert legacy_touch(i) == encoder_touch(i)
+        assert legacy_keycode(i) == encoder_keycode(i)
+        assert legacy_scroll(i) == encoder_scroll(i)
+
+    print(f"{'message':<10}{'legacy':>14}{'encoder':>14}  (msg/s)")
+    for kind, legacy, precompiled in [
+        ("touch", legacy_touch, encoder_touch),
+        ("keycode", legacy_keycode, encoder_keycode),
+        ("scroll", legacy_scroll, encoder_scroll),
+    ]:
+        print(
+            f"{kind:<10}"
+            f"{bench(legacy, args.n):>14,.0f}"
+            f"{bench(precompiled, args.n):>14,.0f}"
+        )
+    # a batch of touches, e.g. the moves of a gesture
+    print(f"\n{'touches':<10}{'joined':>14}{'buffer':>14}  (msg/s)")
+    print(
+        f"{'':<10}"
+        f"{bench_joined(args.n, args.batch):>14,.0f}"
+        f"{bench_touches(args.n, args.batch):>14,.0f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
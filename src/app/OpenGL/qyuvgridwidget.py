@@ -0,0 +1,277 @@
+"""
+
+在同一个OpenGL上下文中按网格渲染多路yuv420p视频帧
+
+"""
+import ctypes
+import math
+from typing import Optional
+
+import av
+from OpenGL.GL import (
+    GL_CLAMP_TO_EDGE,
+    GL_COLOR_BUFFER_BIT,
+    GL_FLOAT,
+    GL_LINEAR,
+    GL_RED,
+    GL_SCISSOR_TEST,
+    GL_TEXTURE0,
+    GL_TEXTURE_2D,
+    GL_TEXTURE_MAG_FILTER,
+    GL_TEXTURE_MIN_FILTER,
+    GL_TEXTURE_WRAP_S,
+    GL_TEXTURE_WRAP_T,
+    GL_TRIANGLE_STRIP,
+    GL_UNPACK_ALIGNMENT,
+    GL_UNPACK_ROW_LENGTH,
+    GL_UNSIGNED_BYTE,
+    glActiveTexture,
+    glBindTexture,
+    glClear,
+    glClearColor,
+    glDeleteTextures,
+    glDisable,
+    glDrawArrays,
+    glEnable,
+    glEnableVertexAttribArray,
+    glGenTextures,
+    glPixelStorei,
+    glScissor,
+    glTexImage2D,
+    glTexParameteri,
+    glTexSubImage2D,
+    glUniform1i,
+    glVertexAttribPointer,
+    glViewport,
+)
+from PySide6.QtCore import QPointF, QRect
+from PySide6.QtOpenGL import QOpenGLShader, QOpenGLShaderProgram
+from PySide6.QtOpenGLWidgets import QOpenGLWidget
+
+from .qyuvopenglwidget import ATTRIB_TEXTURE, ATTRIB_VERTEX, fsh, vsh
+
+
+class StreamTextures:
+    """
+    Y / U / V textures of one stream, reallocated only when the size changes
+    """
+
+    def __init__(self):
+        self.ids = list(glGenTextures(3))
+        self.sizes = [(0, 0)] * 3
+
+    def upload(self, frame: av.VideoFrame) -> None:
+        for i, plane in enumerate(frame.planes[:3]):
+            glActiveTexture(GL_TEXTURE0 + i)
+            glBindTexture(GL_TEXTURE_2D, self.ids[i])
+            glPixelStorei(GL_UNPACK_ROW_LENGTH, plane.line_size)
+            data = ctypes.cast(plane.buffer_ptr, ctypes.c_void_p)
+            size = (plane.width, plane.height)
+            if size != self.sizes[i]:
+                glTexImage2D(
+                    GL_TEXTURE_2D, 0, GL_RED, *size, 0, GL_RED, GL_UNSIGNED_BYTE, data
+                )
+                glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+                glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+                glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+                glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+                self.sizes[i] = size
+            else:
+                glTexSubImage2D(
+                    GL_TEXTURE_2D, 0, 0, 0, *size, GL_RED, GL_UNSIGNED_BYTE, data
+                )
+        glPixelStorei(GL_UNPACK_ROW_LENGTH, 0)
+
+    def bind(self) -> None:
+        for i, texture_id in enumerate(self.ids):
+            glActiveTexture(GL_TEXTURE0 + i)
+            glBindTexture(GL_TEXTURE_2D, texture_id)
+
+    def destroy(self) -> None:
+        glDeleteTextures(self.ids)
+
+
+class QYUVGridWidget(QOpenGLWidget):
+    """
+    Render many streams in one GL context: one shader program, a texture set
+    per stream, one paintGL for all the tiles. setFrame only keeps a reference,
+    the planes of the changed streams are uploaded in the next paint, so a
+    stream updated several times between two paints is uploaded once.
+    """
+
+    border = 3
+
+    def __init__(self, parent=None):
+        QOpenGLWidget.__init__(self, parent)
+        self.keys: list[str] = []
+        self.frames: dict[str, av.VideoFrame] = {}
+        self.dirty: set[str] = set()
+        self.textures: dict[str, StreamTextures] = {}
+        self.highlighted: Optional[str] = None
+        self.m_pShaderProgram = None
+        self.m_pVShader = None
+        self.m_pFShader = None
+        # keep the vertex arrays alive, GL reads them from client memory
+        self.vertices = None
+        self.texture_vertices = None
+
+    def addStream(self, key: str) -> None:
+        if key not in self.keys:
+            self.keys.append(key)
+            self.update()
+
+    def removeStream(self, key: str) -> None:
+        if key not in self.keys:
+            return
+        self.keys.remove(key)
+        self.frames.pop(key, None)
+        self.dirty.discard(key)
+        textures = self.textures.pop(key, None)
+        if textures is not None and self.context() is not None:
+            self.makeCurrent()
+            textures.destroy()
+            self.doneCurrent()
+        self.update()
+
+    def setFrame(self, key: str, frame: Optional[av.VideoFrame]) -> None:
+        if frame is None or key not in self.keys:
+            return
+        self.frames[key] = frame
+        self.dirty.add(key)
+        # several calls before the next vsync result in a single paint
+        self.update()
+
+    def setHighlighted(self, key: Optional[str]) -> None:
+        self.highlighted = key
+        self.update()
+
+    def columns(self) -> int:
+        return max(1, math.ceil(math.sqrt(len(self.keys))))
+
+    def cellRect(self, index: int) -> QRect:
+        """
+        Cell of a stream in widget coordinates
+        """
+        columns = self.columns()
+        rows = max(1, math.ceil(len(self.keys) / columns))
+        width, height = self.width() // columns, self.height() // rows
+        return QRect((index % columns) * width, (index // columns) * height, width, height)
+
+    def tileRect(self, key: str) -> Optional[QRect]:
+        """
+        Area of the picture of a stream in its cell, keeping the aspect ratio
+        """
+        if key not in self.keys:
+            return None
+        cell = self.cellRect(self.keys.index(key)).adjusted(
+            self.border, self.border, -self.border, -self.border
+        )
+        frame = self.frames.get(key)
+        if frame is None or cell.width() <= 0 or cell.height() <= 0:
+            return cell
+        ratio = frame.width / frame.height
+        width = min(cell.width(), round(cell.height() * ratio))
+        height = min(cell.height(), round(width / ratio))
+        return QRect(
+            cell.x() + (cell.width() - width) // 2,
+            cell.y() + (cell.height() - height) // 2,
+            width,
+            height,
+        )
+
+    def streamAt(self, pos: QPointF) -> Optional[tuple[str, float, float]]:
+        """
+        Returns:
+            (key, x, y) with the position normalized to 0 ~ 1 in the picture,
+            None outside of the pictures
+        """
+        for key in self.keys:
+            rect = self.tileRect(key)
+            if rect is not None and rect.contains(pos.toPoint()):
+                return (
+                    key,
+                    (pos.x() - rect.x()) / max(rect.width(), 1),
+                    (pos.y() - rect.y()) / max(rect.height(), 1),
+                )
+        return None
+
+    def initializeGL(self):
+        self.m_pVShader = QOpenGLShader(QOpenGLShader.ShaderTypeBit.Vertex, self)
+        self.m_pVShader.compileSourceCode(vsh)
+        self.m_pFShader = QOpenGLShader(QOpenGLShader.ShaderTypeBit.Fragment, self)
+        self.m_pFShader.compileSourceCode(fsh)
+        self.m_pShaderProgram = QOpenGLShaderProgram(self)
+        self.m_pShaderProgram.addShader(self.m_pVShader)
+        self.m_pShaderProgram.addShader(self.m_pFShader)
+        self.m_pShaderProgram.bindAttributeLocation("vertexIn", ATTRIB_VERTEX)
+        self.m_pShaderProgram.bindAttributeLocation("textureIn", ATTRIB_TEXTURE)
+        self.m_pShaderProgram.link()
+        self.m_pShaderProgram.bind()
+        glUniform1i(self.m_pShaderProgram.uniformLocation("tex_y"), 0)
+        glUniform1i(self.m_pShaderProgram.uniformLocation("tex_u"), 1)
+        glUniform1i(self.m_pShaderProgram.uniformLocation("tex_v"), 2)
+
+        self.vertices = (ctypes.c_float * 8)(-1.0, -1.0, 1.0, -1.0, -1.0, 1.0, 1.0, 1.0)
+        glVertexAttribPointer(
+            ATTRIB_VERTEX, 2, GL_FLOAT, 0, 0, ctypes.cast(self.vertices, ctypes.c_void_p)
+        )
+        glEnableVertexAttribArray(ATTRIB_VERTEX)
+        self.texture_vertices = (ctypes.c_float * 8)(
+            0.0, 1.0, 1.0, 1.0, 0.0, 0.0, 1.0, 0.0
+        )
+        glVertexAttribPointer(
+            ATTRIB_TEXTURE,
+            2,
+            GL_FLOAT,
+            0,
+            0,
+            ctypes.cast(self.texture_vertices, ctypes.c_void_p),
+        )
+        glEnableVertexAttribArray(ATTRIB_TEXTURE)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+
+        # textures of the previous context are gone, upload every frame again
+        self.textures.clear()
+        self.dirty = set(self.frames)
+
+    def paintGL(self):
+        ratio = self.devicePixelRatioF()
+        full_height = round(self.height() * ratio)
+        glViewport(0, 0, round(self.width() * ratio), full_height)
+        glClearColor(0.0, 0.0, 0.0, 1.0)
+        glClear(GL_COLOR_BUFFER_BIT)
+        self.m_pShaderProgram.bind()
+
+        for key in self.keys:
+            frame = self.frames.get(key)
+            rect = self.tileRect(key)
+            if rect is None:
+                continue
+            # gl origin is the bottom left corner
+            x = round(rect.x() * ratio)
+            y = full_height - round((rect.y() + rect.height()) * ratio)
+            width, height = round(rect.width() * ratio), round(rect.height() * ratio)
+
+            if key == self.highlighted:
+                border = round(self.border * ratio)
+                glEnable(GL_SCISSOR_TEST)
+                glScissor(x - border, y - border, width + 2 * border, height + 2 * border)
+                glClearColor(0.18, 0.5, 0.93, 1.0)
+                glClear(GL_COLOR_BUFFER_BIT)
+                glDisable(GL_SCISSOR_TEST)
+            if frame is None:
+                continue
+
+            textures = self.textures.get(key)
+            if textures is None:
+                textures = self.textures[key] = StreamTextures()
+            if key in self.dirty:
+                textures.upload(frame)
+                self.dirty.discard(key)
+            else:
+                textures.bind()
+            glViewport(x, y, width, height)
+            glDrawArrays(GL_TRIANGLE_STRIP, 0, 4)
+
+    def resizeGL(self, w, h):
+        self.update()
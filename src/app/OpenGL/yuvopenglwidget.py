@@ -1,4 +1,6 @@
+import logging
 import time
+from typing import Optional
 
 import PIL.Image
 import av
@@ -7,6 +9,8 @@ from PySide6.QtGui import Qt
 
 from .qyuvopenglwidget import QYUVOpenGLWidget
 
+log = logging.getLogger(__name__)
+
 
 class YUVOpenGLWidget(QYUVOpenGLWidget):
     def __init__(self, parent):
@@ -29,13 +33,28 @@ class YUVOpenGLWidget(QYUVOpenGLWidget):
         self.m_screenShot.unlock()
         self.update()
 
-    def screenShot(self):
-        b = time.time()
+    def currentFrame(self) -> Optional[av.VideoFrame]:
+        """
+        Reference of the current decoded frame, nothing is converted
+        """
+        self.m_screenShot.lock()
+        frame = self.m_pBufYuv420p
+        self.m_screenShot.unlock()
+        return frame
+
+    def screenShotImage(self) -> PIL.Image.Image:
+        """
+        Current frame as PIL image, can be used outside of the GUI thread unlike QPixmap
+        """
         self.m_screenShot.lock()
         frame: PIL.Image.Image = self.m_pBufYuv420p.to_image()
         self.m_screenShot.unlock()
-        pix = frame.toqpixmap()
-        print(f"screenShot cost: {time.time() - b}")
+        return frame
+
+    def screenShot(self):
+        b = time.time()
+        pix = self.screenShotImage().toqpixmap()
+        log.debug("screenShot cost: %.4f s", time.time() - b)
         return pix
 
 
@@ -55,7 +74,7 @@ class DecodeWorker(QThread):
         for frame in container.decode(video=0):
             if frame.format.name != "yuv420p":
                 frame = frame.reformat(format="yuv420p")
-                print("reformatted")
+                log.debug("reformatted")
             count += 1
 
             if count > self.frameCountWnd:  # update fps
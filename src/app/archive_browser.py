@@ -0,0 +1,292 @@
+import json
+import os
+import threading
+import zipfile
+from typing import Optional
+
+import PySide6
+from PySide6.QtCore import (
+    QAbstractListModel,
+    QBuffer,
+    QByteArray,
+    QModelIndex,
+    QSize,
+    Qt,
+    Signal,
+)
+from PySide6.QtGui import QImage, QImageReader, QPixmap
+from PySide6.QtWidgets import QListView, QWidget
+
+from .frame_viewer import FrameViewer
+from .logger import Logger
+from .ui import Ui_ArchiveBrowser
+from .utils.image_cache import ImageCache
+from .utils.session_container import SessionContainer
+from .utils.stream_recorder import extract_frame, index_keyframes
+from .utils.zip_member import open_member
+
+ARCHIVE_DIRS = {
+    "mouse_records": "mouse_records.txt",
+    "regions": "regions.txt",
+}
+
+
+class ArchiveIndex:
+    """
+    In-memory index of an archived session, built from the zip central directory
+    and the embedded records file, images are only read when requested
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.zip_file = zipfile.ZipFile(path, "r")
+        self.container: Optional[SessionContainer] = None
+        self.container_file = None
+        self.records: list[dict] = []
+        # stream name -> index_keyframes, built on the first frame extracted
+        self.keyframes: dict[str, list] = {}
+        self.build()
+
+    def build(self) -> None:
+        names = set(self.zip_file.namelist())
+        containers = [_ for _ in names if _.endswith(".bas")]
+        if containers:
+            # records are read by seeking in the container, which a member
+            # opened by ZipFile re-reads from its start on every backward seek
+            self.container_file = open_member(self.zip_file, containers[0])
+            self.container = SessionContainer(self.container_file)
+            for i in range(len(self.container)):
+                record = self.container.read_meta(i)
+                record["container_index"] = i
+                self.records.append(record)
+            return
+
+        for records_file in ARCHIVE_DIRS.values():
+            if records_file not in names:
+                continue
+            with self.zip_file.open(records_file) as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    # regions.txt does not store the file name of the picture
+                    record.setdefault("frame", f"{record.get('name')}.png")
+                    if record["frame"] in names:
+                        self.records.append(record)
+
+        # archives without a records file, list the pictures only
+        if not self.records:
+            self.records = [
+                {"name": os.path.splitext(name)[0], "frame": name}
+                for name in sorted(names)
+                if name.endswith((".png", ".webp"))
+            ]
+
+    def __len__(self):
+        return len(self.records)
+
+    def read_image(self, row: int, size: Optional[QSize] = None) -> QPixmap:
+        """
+        Decode the picture of a record
+
+        Args:
+            row: record index
+            size: scale the picture while decoding, None for full resolution
+        """
+        data = QByteArray(self.read_frame_data(row))
+        buffer = QBuffer(data)
+        buffer.open(QBuffer.OpenModeFlag.ReadOnly)
+        reader = QImageReader(buffer)
+        if size is not None:
+            origin = reader.size()
+            if origin.isValid():
+                reader.setScaledSize(
+                    origin.scaled(size, Qt.AspectRatioMode.KeepAspectRatio)
+                )
+        return QPixmap.fromImage(reader.read())
+
+    def read_frame_data(self, row: int) -> bytes:
+        record = self.records[row]
+        if self.container is not None:
+            offset, length = record["blobs"][record["frame"]]
+            return self.container.read_blob(record["container_index"], offset, length)
+        return self.zip_file.read(record["frame"])
+
+    def read_full_frame(self, row: int) -> Optional[QImage]:
+        """
+        Decode the full resolution frame of a crop-only record from the stream
+        recording, from its closest keyframe. Slow, call it off the GUI thread.
+        """
+        record = self.records[row]
+        stream, stream_frame = record.get("stream"), record.get("stream_frame")
+        if stream is None or stream_frame is None:
+            return None
+        if stream not in self.zip_file.namelist():
+            return None
+        with open_member(self.zip_file, stream) as f:
+            keyframes = self.keyframes.get(stream)
+            if keyframes is None:
+                keyframes = self.keyframes[stream] = index_keyframes(f)
+            img = extract_frame(f, stream_frame, keyframes)
+        return img.toqimage() if img is not None else None
+
+    def close(self):
+        if self.container is not None:
+            self.container.close()
+            self.container_file.close()
+        self.zip_file.close()
+
+
+class ArchiveRecordModel(QAbstractListModel):
+    """
+    Views only ask for the decoration of visible rows, so thumbnails are decoded lazily
+    """
+
+    def __init__(self, thumbnail_size: QSize, cache_size: int = 128):
+        super().__init__()
+        self.archive: Optional[ArchiveIndex] = None
+        self.thumbnail_size = thumbnail_size
+        self.cache = ImageCache(cache_size)
+
+    def set_archive(self, archive: Optional[ArchiveIndex]):
+        self.beginResetModel()
+        if self.archive is not None:
+            self.archive.close()
+        self.archive = archive
+        self.cache.clear()
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.archive is None:
+            return 0
+        return len(self.archive)
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or self.archive is None:
+            return None
+        record = self.archive.records[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return record.get("name")
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return json.dumps(record, ensure_ascii=False)
+        if role == Qt.ItemDataRole.DecorationRole:
+            pix = self.cache.get(index.row())
+            if pix is None:
+                pix = self.archive.read_image(index.row(), self.thumbnail_size)
+                self.cache.put(index.row(), pix)
+            return pix
+        return None
+
+
+class ArchiveBrowser(QWidget):
+    onFullFrame = Signal(object, QImage)  # FrameViewer, decoded frame
+    thumbnail_size = QSize(160, 90)
+
+    def __init__(self, root: str = "."):
+        super().__init__()
+        self.root = root
+        self.ui = Ui_ArchiveBrowser()
+        self.ui.setupUi(self)
+        self.frame_viewers = []
+
+        self.model = ArchiveRecordModel(self.thumbnail_size)
+        view: QListView = self.ui.list_records
+        view.setViewMode(QListView.ViewMode.IconMode)
+        view.setResizeMode(QListView.ResizeMode.Adjust)
+        view.setIconSize(self.thumbnail_size)
+        # all items share the same size, the view won't query every row for it
+        view.setUniformItemSizes(True)
+        view.setModel(self.model)
+
+        view.doubleClicked.connect(self.on_record_double_clicked)
+        view.selectionModel().currentChanged.connect(self.on_record_selected)
+        self.ui.combo_archive.currentTextChanged.connect(self.on_archive_changed)
+        self.ui.button_refresh.clicked.connect(self.list_archives)
+        self.onFullFrame.connect(self.on_full_frame)
+
+        self.ui.label_detail.setText("")
+        self.setWindowTitle("ArchiveBrowser")
+        self.list_archives()
+
+    def closeEvent(self, event: PySide6.QtGui.QCloseEvent) -> None:
+        self.model.set_archive(None)
+        self.deleteLater()
+        super().closeEvent(event)
+
+    def list_archives(self):
+        archives = []
+        for directory in ARCHIVE_DIRS:
+            path = os.path.join(self.root, directory)
+            if not os.path.isdir(path):
+                continue
+            archives.extend(
+                os.path.join(directory, _)
+                for _ in os.listdir(path)
+                if _.endswith(".zip") and os.path.isfile(os.path.join(path, _))
+            )
+        # newest first, archive names end with the time indicator "%Y-%m-%d_%H-%M-%S.%f"
+        archives.sort(
+            key=lambda _: "_".join(os.path.basename(_).rsplit("_", 2)[-2:]),
+            reverse=True,
+        )
+        self.ui.combo_archive.clear()
+        self.ui.combo_archive.addItems(archives)
+
+    def on_archive_changed(self, archive: str):
+        if not archive:
+            self.model.set_archive(None)
+            return
+        try:
+            index = ArchiveIndex(os.path.join(self.root, archive))
+        except (OSError, zipfile.BadZipFile) as e:
+            Logger.error(f"无法打开存档 {archive}: {e}", self)
+            self.model.set_archive(None)
+            return
+        self.model.set_archive(index)
+        self.ui.label_detail.setText(f"{archive}: {len(index)} records")
+        Logger.info(f"打开存档 {archive}, 共{len(index)}条记录", self)
+
+    def on_record_selected(self, current: QModelIndex, _):
+        if current.isValid():
+            self.ui.label_detail.setText(
+                self.model.data(current, Qt.ItemDataRole.ToolTipRole)
+            )
+
+    def on_record_double_clicked(self, index: QModelIndex):
+        archive = self.model.archive
+        if archive is None or not index.isValid():
+            return
+        viewer = FrameViewer()
+        viewer.setWindowTitle(
+            f"FrameViewer - {os.path.basename(archive.path)}/{archive.records[index.row()]['frame']}"
+        )
+        viewer.show()
+        # the saved picture at once, the full frame replaces it once decoded
+        viewer.set_pixmap(archive.read_image(index.row()))
+        self.frame_viewers.append(viewer)
+        viewer.destroyed.connect(lambda *_, v=viewer: self.frame_viewers.remove(v))
+        if archive.records[index.row()].get("stream") is not None:
+            threading.Thread(
+                target=self.decode_full_frame,
+                args=(archive, index.row(), viewer),
+                name="FullFrameDecoder",
+                daemon=True,
+            ).start()
+
+    def decode_full_frame(self, archive: ArchiveIndex, row: int, viewer: FrameViewer):
+        try:
+            image = archive.read_full_frame(row)
+        except Exception as e:
+            # the archive may have been closed meanwhile
+            Logger.warn(f"无法解码完整帧 {archive.records[row].get('name')}: {e}", self)
+            return
+        if image is not None:
+            self.onFullFrame.emit(viewer, image)
+
+    def on_full_frame(self, viewer: FrameViewer, image: QImage):
+        if viewer in self.frame_viewers:
+            viewer.set_pixmap(QPixmap.fromImage(image))
@@ -1,10 +1,76 @@
 import re
+import threading
+from typing import Any, Callable, Optional
 
-import adbutils
+from PySide6 import QtCore
+from PySide6.QtCore import QEventLoop, QObject, QTimer
 from PySide6.QtGui import QIntValidator
 from PySide6.QtWidgets import QDialog, QDialogButtonBox, QMessageBox, QApplication
 
+from .logger import Logger
 from .ui import Ui_Connector
+from .utils.adb_service import AdbService
+from .utils.device_watcher import DeviceWatcher
+from .utils.port_scanner import PortScanner, emulator_candidates
+
+
+class BackgroundTask(QObject):
+    """
+    Run a blocking call (adb connects, port scans) on a worker thread, the
+    result is emitted to the GUI thread which keeps processing its events
+    """
+
+    onFinished = QtCore.Signal(object, object)  # result, exception or None
+
+    def __init__(self, fn: Callable[..., Any], *args):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.result = None
+        self.error: Optional[Exception] = None
+        self.thread: Optional[threading.Thread] = None
+        self.done = threading.Event()
+
+    def start(self) -> None:
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="ConnectorTask", daemon=True)
+            self.thread.start()
+
+    def run(self) -> None:
+        try:
+            self.result = self.fn(*self.args)
+        except Exception as e:
+            self.error = e
+        self.done.set()
+        self.onFinished.emit(self.result, self.error)
+
+    def wait(self) -> Any:
+        """
+        Start if not started yet and run a local event loop until finished
+
+        Returns:
+            the result of the call, its exception is raised
+        """
+        loop = QEventLoop()
+        self.onFinished.connect(loop.quit)
+        self.start()
+        if not self.done.is_set():
+            loop.exec()
+        self.onFinished.disconnect(loop.quit)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def wait_or(self, default: Any = None) -> Any:
+        """
+        Like wait, the exception of the call is logged and ``default`` returned instead
+        """
+        try:
+            return self.wait()
+        except Exception as e:
+            name = getattr(self.fn, "__qualname__", repr(self.fn))
+            Logger.error(f"{name} failed: {e!r}", self)
+            return default
 
 
 class Connector:
@@ -22,16 +88,65 @@ class Connector:
         return startup_window
 
     @staticmethod
-    def show_dialog() -> tuple[int, str, str]:
+    def show_dialog(
+        scanner: PortScanner, ports: Optional[list[int]] = None
+    ) -> tuple[int, str, str, list[str]]:
+        """
+        The dialog closes itself when a device shows up meanwhile, e.g. once a
+        slow adb server has started
+
+        Returns:
+            (button, ip, port, addresses connected by a scan)
+        """
         dialog = QDialog()
         ui = Ui_Connector()
         ui.setupUi(dialog)
+        watcher = DeviceWatcher.get_watcher()
 
         port_validator = QIntValidator(1, 65535)
 
         ui.port_editor.setValidator(port_validator)
 
-        return dialog.exec_(), ui.ip_selector.currentText(), ui.port_editor.text()
+        scanned = []
+        tasks = []
+
+        def on_scan_finished(connected: Optional[list[str]], error: Optional[Exception]):
+            tasks.clear()
+            ui.button_scan.setEnabled(True)
+            if connected:
+                scanned.extend(connected)
+                dialog.accept()
+            else:
+                ui.label_scan.setText(f"Scan failed: {error}" if error else "No emulator found")
+
+        def on_click_scan():
+            ip = ui.ip_selector.currentText().strip()
+            if not Connector.check_ipv4(ip):
+                ui.label_scan.setText("Invalid IP")
+                return
+            ui.button_scan.setEnabled(False)
+            ui.label_scan.setText("Scanning...")
+            scanner.candidates = emulator_candidates(ip, ports)
+            # the adb connects may take seconds, the dialog stays responsive
+            task = BackgroundTask(scanner.run, watcher.devices(None))
+            task.onFinished.connect(on_scan_finished)
+            tasks.append(task)
+            task.start()
+
+        def on_devices_changed(_):
+            if watcher.devices():
+                dialog.accept()
+
+        ui.button_scan.clicked.connect(on_click_scan)
+        watcher.onDevicesChanged.connect(on_devices_changed)
+
+        button = dialog.exec_()
+        watcher.onDevicesChanged.disconnect(on_devices_changed)
+        if tasks:
+            # closed while scanning, keep what the scan connects
+            connected = tasks[0].wait_or([]) or []
+            scanned[:] = list(dict.fromkeys(scanned + connected))
+        return button, ui.ip_selector.currentText(), ui.port_editor.text(), scanned
 
     @staticmethod
     def check_ipv4(ipv4: str):
@@ -41,27 +156,90 @@ class Connector:
         )
 
     @staticmethod
-    def try_connect() -> bool:
-        startup_window = Connector.show_startup_dialog()
-
-        devices = adbutils.adb.device_list()
-
-        startup_window.close()
-        startup_window.deleteLater()
+    def wait_for(watcher: DeviceWatcher, addresses: list[str], timeout: float = 2) -> None:
+        """
+        Wait until the device list shows the connected addresses
+        """
+        Connector.wait_until(
+            watcher, lambda: set(addresses) <= set(watcher.devices()), timeout
+        )
 
-        if devices:
+    @staticmethod
+    def wait_until(watcher: DeviceWatcher, predicate: Callable[[], bool], timeout: float) -> bool:
+        """
+        Wait until the predicate holds, the Qt events are processed meanwhile
+        and the predicate is checked on every change of the device list
+
+        Returns:
+            the last result of the predicate
+        """
+        if predicate():
             return True
+        loop = QEventLoop()
+        timer = QTimer()
+        timer.setSingleShot(True)
+        timer.timeout.connect(loop.quit)
+        watcher.onDevicesChanged.connect(loop.quit)
+        timer.start(round(timeout * 1000))
+        try:
+            while timer.isActive() and not predicate():
+                loop.exec()
+        finally:
+            watcher.onDevicesChanged.disconnect(loop.quit)
+            timer.stop()
+        return predicate()
 
-        button, ip, port = Connector.show_dialog()
+    @staticmethod
+    def try_connect(
+        timeout: float = 10, scan: bool = False, ports: Optional[list[int]] = None
+    ) -> bool:
+        """
+        Args:
+            timeout: seconds to wait for the adb server, the connect dialog is
+                shown after it, and closes itself if the server comes up later
+            scan: probe the emulator ports before asking for an address
+            ports: ports probed by a scan, all the known emulator ports by default
+        """
+        watcher = DeviceWatcher.get_watcher()
+        # the adb server answers at once when it runs, show the dialog only if it has to be started
+        ready = watcher.wait_ready(0.3)
+        cold_start = not ready
+        if cold_start:
+            startup_window = Connector.show_startup_dialog()
+            try:
+                ready = BackgroundTask(watcher.wait_ready, timeout).wait_or(False)
+            finally:
+                startup_window.close()
+                startup_window.deleteLater()
+
+        scanner = PortScanner(emulator_candidates(ports=ports))
+        if ready:
+            # emulators found by the last scan are connected again without scanning
+            connected = BackgroundTask(
+                scanner.connect_cached, watcher.devices(None)
+            ).wait_or([])
+            if scan:
+                connected += BackgroundTask(scanner.run, watcher.devices(None)).wait_or([])
+            Connector.wait_for(watcher, connected)
+            # a server just started may list the usb devices a moment after its first answer
+            if Connector.wait_until(
+                watcher, lambda: bool(watcher.devices()), 1 if cold_start else 0
+            ):
+                return True
+
+        button, ip, port, scanned = Connector.show_dialog(scanner, ports)
+        if scanned:
+            Connector.wait_for(watcher, scanned)
+            return True
+        if watcher.devices():
+            return True
         if button == QDialogButtonBox.StandardButton.Cancel:
             return False
         elif not Connector.check_ipv4(ip):
             return False
 
-        try:
-            msg = adbutils.adb.connect(f"{ip.strip()}:{port.strip()}")
-            if "unable" in msg or "failed" in msg:
-                return False
-            return True
-        except adbutils.AdbTimeout:
+        address = f"{ip.strip()}:{port.strip()}"
+        if not BackgroundTask(AdbService.get_service().connect, address).wait_or(False):
             return False
+        Connector.wait_for(watcher, [address])
+        return True
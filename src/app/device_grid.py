@@ -0,0 +1,95 @@
+from typing import Optional
+
+import av
+from PySide6.QtGui import QMouseEvent
+from PySide6.QtWidgets import QWidget
+
+import src.scrcpy as scrcpy
+from .OpenGL.qyuvgridwidget import QYUVGridWidget
+from .session_manager import DeviceSession, SessionManager
+from .ui import Ui_DeviceGrid
+
+
+class DeviceGrid(QWidget):
+    """
+    All the sessions in a grid rendered in a single GL context, clicking a
+    device focuses it, the input goes to the focused device only.
+    """
+
+    def __init__(self, manager: SessionManager):
+        super().__init__()
+        self.ui = Ui_DeviceGrid()
+        self.ui.setupUi(self)
+        self.manager = manager
+        self.view = QYUVGridWidget(self.ui.widget_grid)
+        self.ui.grid_devices.addWidget(self.view, 0, 0)
+        self.view.mousePressEvent = self.on_mouse_event(scrcpy.ACTION_DOWN)
+        self.view.mouseMoveEvent = self.on_mouse_event(scrcpy.ACTION_MOVE)
+        self.view.mouseReleaseEvent = self.on_mouse_event(scrcpy.ACTION_UP)
+        # device receiving the current drag
+        self.pressed: Optional[str] = None
+
+        self.ui.combo_background.setCurrentText(manager.scheduler.background_mode)
+        self.ui.combo_background.currentTextChanged.connect(
+            manager.set_background_mode
+        )
+        manager.onSessionAdded.connect(self.on_session_added)
+        manager.onSessionRemoved.connect(self.on_session_removed)
+        manager.onFocusChanged.connect(self.on_focus_changed)
+        for session in manager.sessions.values():
+            self.on_session_added(session)
+        self.on_focus_changed(manager.focused or "")
+
+    def on_session_added(self, session: DeviceSession):
+        session.view = self.view
+        self.view.addStream(session.serial)
+        session.client.add_listener(
+            scrcpy.EVENT_FRAME, self.on_frame(session.serial)
+        )
+
+    def on_session_removed(self, serial: str):
+        self.view.removeStream(serial)
+        if self.pressed == serial:
+            self.pressed = None
+
+    def on_focus_changed(self, serial: str):
+        self.ui.label_focused.setText(serial or "-")
+        self.view.setHighlighted(serial or None)
+
+    def on_frame(self, serial: str):
+        def handler(frame: Optional[av.VideoFrame]):
+            self.view.setFrame(serial, frame)
+
+        return handler
+
+    def on_mouse_event(self, action: int):
+        def handler(evt: QMouseEvent):
+            if action == scrcpy.ACTION_DOWN:
+                hit = self.view.streamAt(evt.position())
+                if hit is None:
+                    return
+                if hit[0] != self.manager.focused:
+                    self.manager.focus(hit[0])
+                    return
+                self.pressed = hit[0]
+            if self.pressed is None:
+                return
+            session = self.manager.sessions.get(self.pressed)
+            rect = self.view.tileRect(self.pressed)
+            if action == scrcpy.ACTION_UP:
+                self.pressed = None
+            if session is None or rect is None or session.client.resolution is None:
+                return
+            # keep dragging on the pressed device even outside of its tile
+            x = min(max((evt.position().x() - rect.x()) / max(rect.width(), 1), 0), 1)
+            y = min(max((evt.position().y() - rect.y()) / max(rect.height(), 1), 0), 1)
+            session.client.control.touch(
+                round(x * session.client.resolution[0]),
+                round(y * session.client.resolution[1]),
+                action,
+            )
+
+        return handler
+
+    def closeEvent(self, _):
+        self.manager.close()
@@ -0,0 +1,293 @@
+import dataclasses
+import statistics
+from typing import Optional
+
+from adbutils import AdbError, adb
+from PySide6 import QtCore
+from PySide6.QtCore import QObject
+
+import src.scrcpy as scrcpy
+from .logger import Logger
+from .qt_scrcpy import QScrcpyClient
+from .utils.device_profile import ProfileStore
+from .utils.latency_probe import LatencyProbe, LatencyStats
+
+
+@dataclasses.dataclass
+class EncoderResult:
+    encoder_name: Optional[str]  # None is the device default
+    frames: int = 0
+    fps: float = 0.0
+    bytes_per_frame: float = 0.0
+    decode_ms: float = 0.0
+    latency_ms: Optional[float] = None
+    failed: bool = False
+
+    def summary(self) -> str:
+        name = self.encoder_name or "Auto"
+        if self.failed:
+            return f"{name}: failed"
+        return (
+            f"{name}: {self.fps:.1f} fps, {self.bytes_per_frame / 1024:.1f} KiB/frame, "
+            f"decode {self.decode_ms:.2f} ms"
+            + (f", latency p50 {self.latency_ms:.1f} ms" if self.latency_ms is not None else "")
+        )
+
+
+def pick_winner(results: list[EncoderResult], fps_tolerance: float = 0.9) -> Optional[EncoderResult]:
+    """
+    The encoders delivering nearly the best frame rate compete on the time a
+    frame costs: input latency when measured plus client decode time, the
+    smaller bitstream breaks a tie. When latencies were measured, an encoder
+    without one (every tap timed out) ranks after the measured ones.
+
+    Args:
+        results: results of a tuning run
+        fps_tolerance: fraction of the best fps an encoder must reach
+    """
+    streamed = [_ for _ in results if not _.failed and _.frames]
+    if not streamed:
+        return None
+    best_fps = max(_.fps for _ in streamed)
+    return min(
+        (_ for _ in streamed if _.fps >= best_fps * fps_tolerance),
+        key=lambda _: (
+            _.latency_ms is None,
+            (_.latency_ms or 0.0) + _.decode_ms,
+            _.bytes_per_frame,
+        ),
+    )
+
+
+class ByteCounter:
+    """
+    Stream recorder sink counting the bitstream size
+    """
+
+    def __init__(self):
+        self.bytes = 0
+        self.packets = 0
+
+    def write_packet(self, data: bytes, frame_index: int) -> None:
+        self.bytes += len(data)
+        self.packets += 1
+
+
+class EncoderTuner(QObject):
+    """
+    Stream a while with each encoder of the device, one after another, and
+    keep the best one in the device profile, later sessions use it by default.
+
+    Frames only come when the screen changes: run it on an animated screen,
+    or with latency trials, the taps produce frames too.
+    """
+
+    onResult = QtCore.Signal(object)  # EncoderResult
+    onFinished = QtCore.Signal(object)  # winner EncoderResult or None
+
+    WARMUP, MEASURE, LATENCY = range(3)
+
+    def __init__(
+        self,
+        serial: str,
+        duration: float = 3.0,
+        warmup: float = 1.0,
+        latency_trials: int = 0,
+        point: Optional[tuple[int, int]] = None,
+        max_width: int = 0,
+        bitrate: int = 8_000_000,
+        max_fps: int = 60,
+    ):
+        """
+        Args:
+            serial: device serial
+            duration: seconds measured per encoder
+            warmup: seconds skipped after connecting, the first frames are slow
+            latency_trials: taps of the latency probe per encoder, 0 to skip it
+            point: tap position in device coordinates, screen center by default
+            max_width: max_width of the tuning sessions
+            bitrate: bitrate of the tuning sessions
+            max_fps: max fps of the tuning sessions
+        """
+        super().__init__()
+        self.serial = serial
+        self.duration = duration
+        self.warmup = warmup
+        self.latency_trials = latency_trials
+        self.point = point
+        self.max_width = max_width
+        self.bitrate = bitrate
+        self.max_fps = max_fps
+        self.logger = Logger.get_logger()
+
+        self.queue: list[Optional[str]] = []
+        self.results: list[EncoderResult] = []
+        self.result: Optional[EncoderResult] = None
+        self.client: Optional[QScrcpyClient] = None
+        self.counter: Optional[ByteCounter] = None
+        self.probe: Optional[LatencyProbe] = None
+        self.last_frame = None
+        self.phase = self.WARMUP
+        self.start_stats = (0, 0, 0.0)
+        self.running = False
+
+        self.timer = QtCore.QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.on_timer)
+
+    def start(self) -> None:
+        profile = ProfileStore.get_store().get(self.serial)
+        if profile.encoders is None:
+            # starts the server once to list the encoders
+            QScrcpyClient(device=adb.device(serial=self.serial)).query_profile()
+        self.queue = profile.usable_encoders() or [None]
+        self.results = []
+        self.running = True
+        self.logger.info(
+            f"Auto-tune {self.serial}: {', '.join(_ or 'Auto' for _ in self.queue)}", self
+        )
+        self.next_encoder()
+
+    def next_encoder(self) -> None:
+        if not self.running:
+            return
+        if not self.queue:
+            self.finish()
+            return
+        self.result = EncoderResult(self.queue.pop(0))
+        client = QScrcpyClient(
+            device=adb.device(serial=self.serial),
+            max_width=self.max_width,
+            bitrate=self.bitrate,
+            max_fps=self.max_fps,
+            use_profile=False,
+        )
+        # listed by the device itself, not checked against the known names
+        client.encoder_name = self.result.encoder_name
+        self.counter = ByteCounter()
+        client.set_stream_recorder(self.counter)
+        client.add_listener(scrcpy.EVENT_FRAME, self.on_frame)
+        client.add_listener(scrcpy.EVENT_DISCONNECT, self.on_disconnected)
+        self.last_frame = None
+        self.client = client
+        try:
+            client.async_start()
+        except (ConnectionError, AdbError) as e:
+            self.logger.warn(f"{self.result.encoder_name}: {e}", self)
+            self.end_run(failed=True)
+            return
+        self.phase = self.WARMUP
+        self.timer.start(round(self.warmup * 1000))
+
+    def snapshot(self) -> tuple[int, int, float]:
+        decoder = self.client.video_decoder
+        return decoder.decoded_frames, self.counter.bytes, decoder.decode_seconds
+
+    def on_timer(self) -> None:
+        if self.client is None:
+            return
+        if self.phase == self.WARMUP:
+            self.start_stats = self.snapshot()
+            self.phase = self.MEASURE
+            self.timer.start(round(self.duration * 1000))
+        elif self.phase == self.MEASURE:
+            frames, size, seconds = (
+                end - start for end, start in zip(self.snapshot(), self.start_stats)
+            )
+            self.result.frames = frames
+            self.result.fps = frames / self.duration
+            if frames:
+                self.result.bytes_per_frame = size / frames
+                self.result.decode_ms = seconds * 1000 / frames
+            if self.latency_trials <= 0:
+                self.end_run(failed=False)
+                return
+            self.phase = self.LATENCY
+            resolution = self.client.resolution or (2, 2)
+            self.probe = LatencyProbe(
+                self.client,
+                self.point or (resolution[0] // 2, resolution[1] // 2),
+                self.latency_trials,
+            )
+            self.probe.onFinished.connect(self.on_latency_finished)
+            self.probe.start(self.last_frame)
+
+    def on_frame(self, frame) -> None:
+        if frame is not None:
+            self.last_frame = frame
+
+    def on_latency_finished(self, stats: LatencyStats) -> None:
+        self.probe = None
+        if stats.latencies_ms:
+            self.result.latency_ms = statistics.median(stats.latencies_ms)
+        else:
+            self.logger.warn(
+                f"{self.result.encoder_name or 'Auto'}: no latency measured, "
+                f"{stats.timeouts} taps timed out",
+                self,
+            )
+        self.end_run(failed=False)
+
+    def on_disconnected(self) -> None:
+        if self.client is None:
+            return
+        # closed by the server, an encoder that cannot be configured ends
+        # here, the server always sends a first frame otherwise
+        self.end_run(failed=self.last_frame is None)
+
+    def teardown(self) -> None:
+        self.timer.stop()
+        client, self.client = self.client, None
+        if self.probe is not None:
+            probe, self.probe = self.probe, None
+            probe.onFinished.disconnect(self.on_latency_finished)
+            probe.stop()
+        if client is not None:
+            client.remove_listener(scrcpy.EVENT_FRAME, self.on_frame)
+            client.remove_listener(scrcpy.EVENT_DISCONNECT, self.on_disconnected)
+            if client.alive:
+                client.stop()
+        self.last_frame = None
+
+    def end_run(self, failed: bool) -> None:
+        self.teardown()
+        self.result.failed = failed
+        self.results.append(self.result)
+        self.logger.info(self.result.summary(), self)
+        self.onResult.emit(self.result)
+        # let the server of this run exit before starting the next one
+        QtCore.QTimer.singleShot(500, self.next_encoder)
+
+    def finish(self) -> None:
+        self.running = False
+        winner = pick_winner(self.results)
+        store = ProfileStore.get_store()
+        profile = store.get(self.serial)
+        for result in self.results:
+            if (
+                result.failed
+                and result.encoder_name
+                and result.encoder_name not in profile.failed_encoders
+            ):
+                profile.failed_encoders.append(result.encoder_name)
+        if winner is not None:
+            profile.encoder_name = winner.encoder_name
+            profile.bitrate = self.bitrate
+            profile.max_fps = self.max_fps
+            profile.decode_ms = round(winner.decode_ms, 3)
+            self.logger.success(f"Auto-tune winner: {winner.encoder_name or 'Auto'}", self)
+        else:
+            self.logger.warn("Auto-tune: no encoder streamed any frame", self)
+        store.save(profile)
+        self.onFinished.emit(winner)
+
+    def stop(self) -> None:
+        """
+        Abort, the profile is left unchanged
+        """
+        if not self.running:
+            return
+        self.running = False
+        self.queue.clear()
+        self.teardown()
+        self.onFinished.emit(None)
@@ -1,21 +1,24 @@
 import datetime
 import json
+import math
 import os
 
 import PySide6
-from PySide6.QtCore import Signal, Qt, QRectF, QObject, QTimer
-from PySide6.QtGui import QPixmap, QPen, QColor
+from PySide6.QtCore import Signal, Qt, QRectF, QPointF
+from PySide6.QtGui import QPixmap, QPen, QColor, QPainter
 from PySide6.QtWidgets import (
     QGraphicsView,
     QGraphicsScene,
     QGraphicsItem,
-    QGraphicsPixmapItem,
+    QGraphicsObject,
     QWidget,
     QMessageBox,
 )
 
 from src.app.logger import Logger
 from src.app.region_save_dialog import RegionSaveDialog
+from src.app.utils.archiver import Archiver
+from src.app.utils.image_cache import ImageCache
 from .ui import Ui_FrameViewer
 
 
@@ -66,6 +69,7 @@ class GraphicsView(QGraphicsView):
 
     def mouseReleaseEvent(self, event):
         """鼠标释放事件"""
+        super(GraphicsView, self).mouseReleaseEvent(event)
         # print(self.image_item.is_finish_cut, self.image_item.is_start_cut)
         if self.image_item.is_finish_cut:
             self.save_signal.emit(True)
@@ -73,8 +77,19 @@ class GraphicsView(QGraphicsView):
             self.save_signal.emit(False)
 
 
-class GraphicsPixmapItem(QGraphicsPixmapItem, QObject):
+class GraphicsPixmapItem(QGraphicsObject):
+    """
+    Pixmap item that only paints the exposed part of the image, zoomed out
+    levels are served from cached down-scaled tiles, and a pixel grid is drawn
+    when zoomed in far enough for pixel-exact selection
+    """
+
     save_signal = Signal(bool)
+    onSelectionChanged = Signal()
+
+    tile_size = 256
+    max_level = 5  # 1/32
+    pixel_grid_zoom = 8.0
 
     def __init__(self, picture, parent=None):
         super(GraphicsPixmapItem, self).__init__(parent)
@@ -82,52 +97,160 @@ class GraphicsPixmapItem(QGraphicsPixmapItem, QObject):
         self.end_point = None
         self.is_midbutton = None
         self.start_point = None
+        self._pixmap = QPixmap()
         self.setPixmap(picture)
         self.is_start_cut = False
         self.current_point = None
         self.is_finish_cut = False
+        # selection changes are reported once per paint at most
+        self.selection_dirty = False
+        self.zoom = 1.0
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+
+    def pixmap(self) -> QPixmap:
+        return self._pixmap
+
+    def setPixmap(self, pixmap: QPixmap):
+        self.prepareGeometryChange()
+        self._pixmap = pixmap
+        self.tiles = ImageCache(capacity=512)
+        self.update()
+
+    @property
+    def is_pixel_grid_visible(self) -> bool:
+        return self.zoom >= self.pixel_grid_zoom
+
+    def snap(self, point: QPointF) -> QPointF:
+        """
+        Snap a point to the pixel boundary when the pixel grid is visible
+        """
+        if not self.is_pixel_grid_visible:
+            return point
+        return QPointF(round(point.x()), round(point.y()))
+
+    def tile_rect(self, level: int, col: int, row: int) -> QRectF:
+        """
+        Area of the image covered by tile (col, row) of level
+        """
+        span = self.tile_size << level
+        return QRectF(col * span, row * span, span, span).intersected(
+            self.boundingRect()
+        )
+
+    def tile(self, level: int, col: int, row: int) -> QPixmap:
+        """
+        Tile (col, row) of the image down-scaled by 2 ** level
+        """
+        key = (level, col, row)
+        pix = self.tiles.get(key)
+        if pix is None:
+            rect = self.tile_rect(level, col, row).toAlignedRect()
+            pix = self._pixmap.copy(rect).scaled(
+                max(1, math.ceil(rect.width() / (1 << level))),
+                max(1, math.ceil(rect.height() / (1 << level))),
+                Qt.AspectRatioMode.IgnoreAspectRatio,
+                Qt.TransformationMode.SmoothTransformation,
+            )
+            self.tiles.put(key, pix)
+        return pix
+
+    def paint_tiles(self, painter, exposed: QRectF, level: int):
+        span = self.tile_size << level
+        left, top = int(exposed.left()) // span, int(exposed.top()) // span
+        right = min(int(exposed.right()), self._pixmap.width() - 1) // span
+        bottom = min(int(exposed.bottom()), self._pixmap.height() - 1) // span
+        for row in range(top, bottom + 1):
+            for col in range(left, right + 1):
+                tile = self.tile(level, col, row)
+                painter.drawPixmap(
+                    self.tile_rect(level, col, row), tile, QRectF(tile.rect())
+                )
+
+    def paint_pixel_grid(self, painter, exposed: QRectF):
+        pen = QPen(QColor(128, 128, 128, 120))
+        pen.setCosmetic(True)
+        pen.setWidth(0)
+        painter.setPen(pen)
+        left, top = math.floor(exposed.left()), math.floor(exposed.top())
+        right, bottom = math.ceil(exposed.right()), math.ceil(exposed.bottom())
+        for x in range(left, right + 1):
+            painter.drawLine(QPointF(x, top), QPointF(x, bottom))
+        for y in range(top, bottom + 1):
+            painter.drawLine(QPointF(left, y), QPointF(right, y))
+
+    def boundingRect(self) -> QRectF:
+        return QRectF(self._pixmap.rect())
+
+    def mark_selection_changed(self):
+        self.selection_dirty = True
+        self.update()
 
     def mouseMoveEvent(self, event):
         """鼠标移动事件"""
-        self.current_point = event.pos()
+        self.current_point = self.snap(event.pos())
         if not self.is_start_cut or self.is_midbutton:
             self.moveBy(
                 self.current_point.x() - self.start_point.x(),
                 self.current_point.y() - self.start_point.y(),
             )
             self.is_finish_cut = False
-        self.update()
+        self.mark_selection_changed()
 
     def mousePressEvent(self, event):
         """鼠标按压事件"""
         super(GraphicsPixmapItem, self).mousePressEvent(event)
-        self.start_point = event.pos()
+        self.start_point = self.snap(event.pos())
         self.current_point = None
         self.is_finish_cut = False
         if event.button() == Qt.MouseButton.MiddleButton:
             self.is_midbutton = True
-            self.update()
         else:
             self.is_midbutton = False
-            self.update()
+        self.mark_selection_changed()
+
+    def mouseReleaseEvent(self, event):
+        """鼠标释放事件"""
+        super(GraphicsPixmapItem, self).mouseReleaseEvent(event)
+        self.mark_selection_changed()
 
     def paint(self, painter, QStyleOptionGraphicsItem, QWidget):
-        super(GraphicsPixmapItem, self).paint(
-            painter, QStyleOptionGraphicsItem, QWidget
+        self.zoom = QStyleOptionGraphicsItem.levelOfDetailFromTransform(
+            painter.worldTransform()
         )
-        if self.is_start_cut and not self.is_midbutton:
+        exposed = QStyleOptionGraphicsItem.exposedRect.intersected(self.boundingRect())
+        if not exposed.isEmpty():
+            if self.zoom < 1:
+                level = min(int(math.log2(1 / self.zoom)), self.max_level)
+            else:
+                level = 0
+            if level > 0:
+                painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+                self.paint_tiles(painter, exposed, level)
+            else:
+                # zoomed in, only the visible source pixels are scaled
+                painter.setRenderHint(
+                    QPainter.RenderHint.SmoothPixmapTransform, self.zoom < 2
+                )
+                source = exposed.toAlignedRect()
+                painter.drawPixmap(QRectF(source), self._pixmap, QRectF(source))
+            if self.is_pixel_grid_visible:
+                self.paint_pixel_grid(painter, exposed)
+
+        if self.is_start_cut and not self.is_midbutton and self.current_point:
             # print(self.start_point, self.current_point)
             pen = QPen(Qt.DashLine)
             pen.setColor(QColor(0, 150, 0, 70))
             pen.setWidth(3)
             painter.setPen(pen)
             painter.setBrush(QColor(0, 0, 255, 70))
-            if not self.current_point:
-                return
             painter.drawRect(QRectF(self.start_point, self.current_point))
             self.end_point = self.current_point
             self.is_finish_cut = True
 
+        if self.selection_dirty:
+            self.selection_dirty = False
+            self.onSelectionChanged.emit()
+
 
 class FrameViewer(QWidget):
     counter = 0
@@ -141,12 +264,12 @@ class FrameViewer(QWidget):
         view: GraphicsView = self.ui.graphicsView
         view.onImageSet.connect(self.on_image_set)
         view.onZoom.connect(self.on_zoom)
+        view.image_item.onSelectionChanged.connect(self.on_selection_changed)
 
         self.ui.button_take_region.clicked.connect(self.on_click_take_region)
         self.ui.button_cancel_region.clicked.connect(self.on_click_cancel_region)
         self.ui.button_save_region.clicked.connect(self.on_click_save_region)
 
-        self.check_point_timer = None
         self.clean_point_labels_text()
 
         self.setWindowTitle("FrameViewer")
@@ -161,17 +284,7 @@ class FrameViewer(QWidget):
     def on_image_set(self, image: QPixmap):
         self.ui.label_picture_resolution.setText(f"{image.width()}x{image.height()}")
         self.ui.label_picture_zoom.setText(f"{1.0:.2f}")
-
-        if self.check_point_timer is not None:
-            self.check_point_timer.stop()
-            self.check_point_timer.timeout.disconnect(self.on_timeout)
-            self.check_point_timer.deleteLater()
-
-        self.check_point_timer = QTimer()
-        self.check_point_timer.setInterval(50)
-        self.check_point_timer.setSingleShot(False)
-        self.check_point_timer.timeout.connect(self.on_timeout)
-        self.check_point_timer.start()
+        self.on_selection_changed()
         Logger.success("图片加载成功", self)
 
     def on_zoom(self, zoom: float):
@@ -182,13 +295,13 @@ class FrameViewer(QWidget):
     def on_click_take_region(self):
         self.ui.graphicsView.image_item.is_start_cut = True
         self.ui.graphicsView.image_item.is_finish_cut = False
-        self.ui.graphicsView.image_item.update()
+        self.ui.graphicsView.image_item.mark_selection_changed()
         Logger.info("开始选区", self)
 
     def on_click_cancel_region(self):
         self.ui.graphicsView.image_item.is_start_cut = False
         self.ui.graphicsView.image_item.is_finish_cut = False
-        self.ui.graphicsView.image_item.update()
+        self.ui.graphicsView.image_item.mark_selection_changed()
         Logger.info("取消选区", self)
 
     def clean_point_labels_text(self):
@@ -211,7 +324,7 @@ class FrameViewer(QWidget):
         self.save_region(x1, y1, x2, y2)
         self.ui.graphicsView.image_item.is_start_cut = False
         self.ui.graphicsView.image_item.is_finish_cut = True
-        self.ui.graphicsView.image_item.update()
+        self.ui.graphicsView.image_item.mark_selection_changed()
 
     def save_region(self, x1: int, y1: int, x2: int, y2: int):
         resolution = self.ui.label_picture_resolution.text()
@@ -256,7 +369,7 @@ class FrameViewer(QWidget):
         QMessageBox.information(self, "保存成功", f"保存成功, 保存为regions/{region_name}.png")
         Logger.success(f"保存成功, 保存为regions/{region_name}.png", self)
 
-    def on_timeout(self):
+    def on_selection_changed(self):
         self.on_start_point_changed()
         self.on_end_point_changed()
 
@@ -288,47 +401,7 @@ class FrameViewer(QWidget):
 
     @classmethod
     def make_archive(cls):
-        # make archive
-        logger = Logger.get_logger()
-        if os.path.exists("regions"):
-            time_indicator = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S.%f")[
-                :-3
-            ]  # default time indicator
-            time_indicator_file = None
-            file_to_zip = []
-            for _ in os.listdir("regions"):
-                if _.startswith("TIME_INDICATOR~"):
-                    time_indicator = _.split("~")[-1]  # get the latest time indicator
-                    time_indicator_file = _
-                elif not _.endswith(".zip"):
-                    file_to_zip.append(_)
-
-            if time_indicator_file is not None:
-                os.remove(os.path.join("regions", time_indicator_file))
-
-            if len(file_to_zip) == 0:
-                return
-
-            archive_name = f"regions_{time_indicator}.zip"
-            logger.info(msg=f"Making archive: {archive_name=}", sender=cls)
-            import zipfile
-
-            with zipfile.ZipFile(
-                os.path.join("regions", archive_name), "w"
-            ) as zip_file:
-                for _ in file_to_zip:
-                    zip_file.write(os.path.join("regions", _), _)
-            # clean all files
-            for _ in file_to_zip:
-                os.remove(os.path.join("regions", _))
-        else:
-            logger.info(msg="Creating regions directory", sender=cls)
-            os.makedirs("regions", exist_ok=True)
-
-        os.makedirs("regions", exist_ok=True)
-        indicator = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S.%f")[:-3]
-        with open(f"regions/TIME_INDICATOR~{indicator}", "w", encoding="utf-8") as f:
-            f.write(f"TIME_INDICATOR~{indicator}\n")
+        Archiver.get_archiver().make_archive("regions", "regions")
 
     def __new__(cls, *args, **kwargs):
         if cls.first_start:
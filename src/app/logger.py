@@ -1,12 +1,19 @@
 import dataclasses
+import logging
+import threading
 import time
 from typing import Optional
 
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt, QTimer
+from PySide6.QtGui import QColor, QFont
 from PySide6.QtWidgets import QWidget
 
 from .ui import Ui_Logger
-from .utils.color_console import ColorConsole
+from .utils.log_backend import LEVELS
+from .utils.ring_buffer import RingBuffer
+
+
+log = logging.getLogger(__name__)
 
 
 @dataclasses.dataclass
@@ -22,15 +29,99 @@ class ColorOption:
         return getattr(self, level)
 
 
+@dataclasses.dataclass
+class LogRecord:
+    created: float  # unix time
+    level: str
+    sender: str
+    msg: str
+
+
+class LogModel(QAbstractListModel):
+    """
+    The last `capacity` records in a ring buffer. Records can be appended from
+    any thread, they are inserted into the model in batches by flush on the
+    GUI thread. Views only ask for the visible rows, a record is formatted
+    when it is shown, not when it is logged.
+    """
+
+    def __init__(self, color_option: ColorOption, capacity: int = 10000):
+        super().__init__()
+        self.color_option = color_option
+        self.records = RingBuffer(capacity)
+        self.pending: list[LogRecord] = []
+        self.lock = threading.Lock()
+        self.colors: dict[str, QColor] = {}
+        self.bold = QFont()
+        self.bold.setBold(True)
+
+    def append(self, record: LogRecord) -> None:
+        with self.lock:
+            self.pending.append(record)
+            if len(self.pending) > 2 * self.records.capacity:
+                # nobody flushes (window hidden), only the last ones can be shown
+                del self.pending[: -self.records.capacity]
+
+    def flush(self) -> int:
+        """
+        Returns:
+            number of records inserted
+        """
+        with self.lock:
+            pending, self.pending = self.pending, []
+        if not pending:
+            return 0
+        pending = pending[-self.records.capacity :]
+        overflow = self.records.overflow(len(pending))
+        if overflow:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            self.records.drop(overflow)
+            self.endRemoveRows()
+        first = len(self.records)
+        self.beginInsertRows(QModelIndex(), first, first + len(pending) - 1)
+        self.records.extend(pending)
+        self.endInsertRows()
+        return len(pending)
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        with self.lock:
+            self.pending.clear()
+        self.records.clear()
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.records)
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.records):
+            return None
+        record: LogRecord = self.records[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            log_time = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.created))
+            return f"{log_time} [{record.level.upper()}] {record.sender}::{record.msg}"
+        if role == Qt.ItemDataRole.ForegroundRole:
+            color = self.colors.get(record.level)
+            if color is None:
+                color = self.colors[record.level] = QColor(
+                    self.color_option.get_color(record.level)
+                )
+            return color
+        if role == Qt.ItemDataRole.FontRole and record.level == "critical":
+            return self.bold
+        return None
+
+
 class Logger(QWidget):
     instance = None
-    onLog = Signal(str)
+    flush_interval = 100  # ms
 
-    def __init__(self, color_option: ColorOption):
+    def __init__(self, color_option: ColorOption, capacity: int = 10000):
         super().__init__()
         self.ui = Ui_Logger()
         self.ui.setupUi(self)
-        self.ui.textBrowser.setReadOnly(True)
         self.color_option = color_option or ColorOption(
             info="black",
             warn="orange",
@@ -43,7 +134,30 @@ class Logger(QWidget):
         self.setWindowTitle("Logger")
 
         self.setMinimumSize(500, 600)
-        self.onLog.connect(self.ui.textBrowser.append)
+
+        self.model = LogModel(self.color_option, capacity)
+        self.ui.list_logs.setModel(self.model)
+        # the records are inserted in batches and only while the window is shown
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setInterval(self.flush_interval)
+        self.flush_timer.timeout.connect(self.flush)
+
+    def flush(self):
+        view = self.ui.list_logs
+        bar = view.verticalScrollBar()
+        follow = bar.value() >= bar.maximum()
+        if self.model.flush() and follow:
+            view.scrollToBottom()
+
+    def showEvent(self, event):
+        self.flush()
+        self.ui.list_logs.scrollToBottom()
+        self.flush_timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.flush_timer.stop()
+        super().hideEvent(event)
 
     @classmethod
     def get_logger(cls, color_option: Optional[ColorOption] = None):
@@ -82,18 +196,19 @@ class Logger(QWidget):
 
     def __log(self, msg, level, sender):
         instance = self
-        sender = (sender or instance).__class__.__name__
         if not instance:
             raise RuntimeError(
                 "Logger instance is not initialized. use Logger.get_instance() instead."
             )
-        # time + Level + msg
-        log_time = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(time.time()))
-        color = instance.color_option.get_color(level)
-        if level != "critical":
-            html_msg = f'<font color="{color}">{log_time} [{level.upper()}] {sender}::{msg}</font>'
-        else:
-            # bold
-            html_msg = f'<font color="{color}"><b>{log_time} [{level.upper()}] {sender}::{msg}</b></font>'
-        ColorConsole.color_print(msg=msg, level=level, sender=sender, log_time=log_time)
-        self.onLog.emit(html_msg)
+        logger = log
+        if not isinstance(sender, str):
+            sender_class = type(instance if sender is None else sender)
+            # the logger of the sender's module, so the levels set per module apply
+            logger = logging.getLogger(sender_class.__module__)
+            sender = sender_class.__name__
+        created = time.time()
+        levelno = LEVELS[level]
+        # console and file, nothing is formatted below the threshold
+        if logger.isEnabledFor(levelno):
+            logger.log(levelno, msg, extra={"sender": sender})
+        self.model.append(LogRecord(created, level, sender, str(msg)))
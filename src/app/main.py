@@ -1,3 +1,7 @@
+import datetime
+import functools
+import logging
+import os
 import sys
 from argparse import ArgumentParser
 from typing import Optional
@@ -7,19 +11,39 @@ from PySide6 import QtCore
 from PySide6.QtCore import QPoint
 from PySide6.QtGui import QKeyEvent, QMouseEvent, QWheelEvent, QCursor
 from PySide6.QtNetwork import QTcpSocket
-from PySide6.QtWidgets import QApplication, QMainWindow, QMessageBox
-from adbutils import adb
+from PySide6.QtWidgets import QApplication, QFileDialog, QMainWindow, QMessageBox
+from adbutils import AdbError, adb
 
 import src.scrcpy as scrcpy
-from .connector import Connector
+from src.scrcpy.macro import MacroRecorder, MacroReplayer, load_macro
+from .archive_browser import ArchiveBrowser
+from .connector import BackgroundTask, Connector
+from .device_grid import DeviceGrid
+from .encoder_tuner import EncoderTuner
 from .frame_viewer import FrameViewer
 from .logger import Logger
-from .qt_scrcpy import QScrcpyClient
+from .qt_scrcpy import QScrcpyClient, QScrcpyControlClient
+from .session_manager import DecodeScheduler, SessionManager
 from .ui import Ui_MainWindow
+from .utils.adb_service import AdbService
+from .utils.archiver import Archiver, ArchiveOptions
+from .utils.device_watcher import DeviceWatcher
 from .utils.fps_counter import FPSCounter
-from .utils.mouse_recorder import MouseRecorder
+from .utils.input_broadcaster import InputBroadcaster
+from .utils.input_coalescer import TouchCoalescer
+from .utils.latency_probe import LatencyProbe, LatencyStats
+from .utils.log_backend import LOG_FILE, LogBackend, install_print_hook, parse_levels
+from .utils.mouse_recorder import (
+    CropOptions,
+    MouseRecorder,
+    MouseRecordProcessor,
+    RecordEncoding,
+)
+from .utils.port_scanner import parse_ports
+from .utils.stream_recorder import StreamRecorder
 
 serial = "NULL"
+log = logging.getLogger(__name__)
 
 
 def get_formatted_bitrate(bitrate):
@@ -35,6 +59,7 @@ def get_formatted_bitrate(bitrate):
 
 class MainWindow(QMainWindow):
     onMouseReleased = QtCore.Signal(QPoint)
+    onMacroReplayFinished = QtCore.Signal(object)
 
     def __init__(
         self,
@@ -43,6 +68,12 @@ class MainWindow(QMainWindow):
         encoder_name: Optional[str] = None,
         max_fps: Optional[int] = None,
         bitrate: Optional[int] = None,
+        record_encoding: Optional[RecordEncoding] = None,
+        record_crop: Optional[CropOptions] = None,
+        record_storage: str = MouseRecordProcessor.STORAGE_FILES,
+        move_window: Optional[int] = None,
+        probe_trials: int = 20,
+        broadcast: Optional[list[str]] = None,
     ):
         super(MainWindow, self).__init__()
         self.serial = serial
@@ -70,8 +101,34 @@ class MainWindow(QMainWindow):
         self.client.add_listener(scrcpy.EVENT_FRAME, self.on_frame)
         self.client.add_listener(scrcpy.EVENT_DISCONNECT, self.on_disconnected)
 
+        # Merge mouse moves, the device samples input once per frame at most
+        self.touch_coalescer = TouchCoalescer(
+            self.client.control,
+            (1000 // (self.client.max_fps or 60)) if move_window is None else move_window,
+        )
+        self.touch_coalescer.onDragStats.connect(self.on_drag_stats)
+
+        # Mirror the input to other devices, only their control channel is opened
+        self.broadcaster = InputBroadcaster(self.client.control)
+        self.broadcaster.onSkewReport.connect(self.on_broadcast_skew)
+        self.broadcast_clients: list[QScrcpyControlClient] = []
+        self.broadcast_tasks: list[BackgroundTask] = []
+        for broadcast_serial in broadcast or []:
+            broadcast_client = QScrcpyControlClient(
+                device=adb.device(serial=broadcast_serial)
+            )
+            self.broadcast_clients.append(broadcast_client)
+            self.broadcaster.add_target(broadcast_serial, broadcast_client)
+
         # Setup developer tools
-        self.mouse_recorder = MouseRecorder()
+        self.stream_recorder = StreamRecorder() if record_crop else None
+        self.client.set_stream_recorder(self.stream_recorder)
+        self.mouse_recorder = MouseRecorder(
+            encoding=record_encoding,
+            crop=record_crop,
+            stream_recorder=self.stream_recorder,
+            storage=record_storage,
+        )
         self.onMouseReleased.connect(self.mouse_recorder_handler)
 
         # Bind controllers
@@ -82,11 +139,19 @@ class MainWindow(QMainWindow):
         self.ui.button_record_click.clicked.connect(self.on_click_record_click)
         self.ui.button_take_region.clicked.connect(self.on_click_take_region_screenshot)
         self.ui.button_show_log.clicked.connect(self.logger.show)
+        self.ui.button_browse_archive.clicked.connect(self.on_click_browse_archive)
+        self.ui.button_record_script.clicked.connect(self.on_click_record_script)
+        self.ui.button_replay_script.clicked.connect(self.on_click_replay_script)
+        self.ui.button_latency_probe.clicked.connect(self.on_click_latency_probe)
 
         self.ui.button_screen_on.clicked.connect(self.on_click_screen_on)
         self.ui.button_screen_off.clicked.connect(self.on_click_screen_off)
 
         # Bind config
+        device_watcher = DeviceWatcher.get_watcher()
+        device_watcher.onDevicesChanged.connect(self.on_devices_changed)
+        device_watcher.onDeviceAdded.connect(self.on_device_added)
+        device_watcher.onDeviceRemoved.connect(self.on_device_removed)
         self.ui.combo_device.currentTextChanged.connect(self.choose_device)
         self.ui.flip.stateChanged.connect(self.on_flip)
 
@@ -112,6 +177,18 @@ class MainWindow(QMainWindow):
 
         # region selector
         self.region_selector = None
+        self.archive_browser = None
+
+        # macro
+        self.macro_recorder = MacroRecorder()
+        self.client.control.add_listener(self.macro_recorder.on_package)
+        self.macro_replayer: Optional[MacroReplayer] = None
+        self.onMacroReplayFinished.connect(self.on_macro_replay_finished)
+
+        # latency probe, taps the last clicked position
+        self.probe_trials = probe_trials
+        self.latency_probe: Optional[LatencyProbe] = None
+        self.last_click: Optional[QPoint] = None
 
         # screen
         screen = QApplication.primaryScreen().geometry()
@@ -119,6 +196,9 @@ class MainWindow(QMainWindow):
         self.screen_height = screen.height()
         self.last_ratio = 1
         self.delta_size = None
+        if self.client.resolution:
+            # size from the device profile, no resize at the first frame
+            self.fit_window(self.client.resolution[0] / self.client.resolution[1])
 
         # mouse tracer
         self.mouse_trace_timer = QtCore.QTimer()
@@ -143,13 +223,31 @@ class MainWindow(QMainWindow):
         # Restart service
         if getattr(self, "client", None):
             self.client.change_device(device)
+            self.ui.label_encoder.setText(self.client.encoder_name or "Auto")
 
     def list_devices(self):
         self.ui.combo_device.clear()
-        items = [i.serial for i in adb.device_list()]
+        items = DeviceWatcher.get_watcher().devices()
         self.ui.combo_device.addItems(items)
         return items
 
+    def on_devices_changed(self, _):
+        current = self.ui.combo_device.currentText()
+        # refresh the list without switching the connected device
+        self.ui.combo_device.blockSignals(True)
+        self.devices = self.list_devices()
+        if current and current not in self.devices:
+            self.ui.combo_device.addItem(current)
+        self.ui.combo_device.setCurrentText(current)
+        self.ui.combo_device.blockSignals(False)
+
+    def on_device_added(self, serial: str, state: str):
+        self.logger.info(f"Device {serial} attached ({state})", DeviceWatcher.get_watcher())
+
+    def on_device_removed(self, serial: str):
+        self.logger.warn(f"Device {serial} detached", DeviceWatcher.get_watcher())
+        AdbService.get_service().close(serial)
+
     def on_flip(self, _):
         self.client.flip = self.ui.flip.isChecked()
 
@@ -191,9 +289,88 @@ class MainWindow(QMainWindow):
             QMessageBox.information(
                 self,
                 "鼠标记录",
-                f"鼠标记录已经保存在{self.mouse_recorder.save_dir}目录下的mouse_records.txt中",
+                f"鼠标记录已经保存在{self.mouse_recorder.save_dir}目录下的{self.mouse_recorder.processor.records_file}中",
             )
 
+    def on_click_record_script(self):
+        if not self.macro_recorder.is_recording:
+            self.macro_recorder.start()
+            self.ui.button_record_script.setText("Stop Recording Script")
+            self.ui.button_record_script.setStyleSheet("background-color: red")
+            self.logger.info("Start record script", self.macro_recorder)
+            return
+
+        self.macro_recorder.stop()
+        self.ui.button_record_script.setText("Record Script")
+        self.ui.button_record_script.setStyleSheet("")
+        os.makedirs("macros", exist_ok=True)
+        path = f"macros/macro_{datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.bsm"
+        self.macro_recorder.save(path)
+        self.logger.info(
+            f"Stop record script, {len(self.macro_recorder.events)} events", self
+        )
+        QMessageBox.information(self, "脚本记录", f"脚本已经保存在{path}")
+
+    def on_click_replay_script(self):
+        if self.macro_replayer is not None:
+            self.macro_replayer.stop()
+            return
+        path, _ = QFileDialog.getOpenFileName(
+            self, "回放脚本", "macros", "Macro (*.bsm)"
+        )
+        if not path:
+            return
+        try:
+            events = load_macro(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "回放脚本", f"无法读取脚本: {e}")
+            return
+        self.macro_replayer = MacroReplayer(
+            events, self.client.control.send, self.onMacroReplayFinished.emit
+        )
+        self.ui.button_replay_script.setText("Stop Replay")
+        self.logger.info(f"Replay script {path}, {len(events)} events", self)
+        self.macro_replayer.start()
+
+    def on_macro_replay_finished(self, replayer: MacroReplayer):
+        self.macro_replayer = None
+        self.ui.button_replay_script.setText("Replay Script")
+        self.logger.info(
+            f"Replay finished: {replayer.sent}/{len(replayer.events)} events, "
+            f"lateness mean={replayer.mean_lateness_us:.0f}us max={replayer.max_lateness_us}us",
+            self,
+        )
+
+    def on_click_latency_probe(self):
+        if self.latency_probe is not None:
+            self.latency_probe.stop()
+            return
+        if self.client.resolution is None:
+            return
+        if self.last_click is not None:
+            point = (self.last_click.x(), self.last_click.y())
+        else:
+            point = (self.client.resolution[0] // 2, self.client.resolution[1] // 2)
+        self.latency_probe = LatencyProbe(self.client, point, self.probe_trials)
+        self.latency_probe.onTrial.connect(self.on_latency_trial)
+        self.latency_probe.onFinished.connect(self.on_latency_probe_finished)
+        self.ui.button_latency_probe.setText("Stop Probe")
+        self.logger.info(
+            f"Latency probe at {point}, {self.probe_trials} trials", self.latency_probe
+        )
+        self.latency_probe.start(self.ui.opengl_widget.currentFrame())
+
+    def on_latency_trial(self, trial: int, latency_ms: float):
+        if latency_ms < 0:
+            self.logger.warn(f"Trial {trial}: no change detected", self.latency_probe)
+        else:
+            self.logger.info(f"Trial {trial}: {latency_ms:.1f} ms", self.latency_probe)
+
+    def on_latency_probe_finished(self, stats: LatencyStats):
+        probe, self.latency_probe = self.latency_probe, None
+        self.ui.button_latency_probe.setText("Latency Probe")
+        self.logger.success(f"Latency: {stats.summary()}", probe)
+
     def on_click_take_region_screenshot(self):
         self.region_selector = FrameViewer()
         self.region_selector.show()
@@ -201,6 +378,10 @@ class MainWindow(QMainWindow):
         self.region_selector.set_pixmap(pix)
         del pix
 
+    def on_click_browse_archive(self):
+        self.archive_browser = ArchiveBrowser()
+        self.archive_browser.show()
+
     def on_mouse_event(self, action=scrcpy.ACTION_DOWN):
         def handler(evt: QMouseEvent):
             focused_widget = QApplication.focusWidget()
@@ -210,15 +391,63 @@ class MainWindow(QMainWindow):
             y_ratio = self.client.resolution[1] / self.ui.opengl_widget.height()
             mouse_x = round(evt.position().x() * x_ratio)
             mouse_y = round(evt.position().y() * y_ratio)
-            self.client.control.touch(mouse_x, mouse_y, action)
+            self.touch_coalescer.touch(mouse_x, mouse_y, action)
             pos = QPoint(mouse_x, mouse_y)
 
             # if is release, call on_mouse_released
             if action == scrcpy.ACTION_UP:
+                self.last_click = pos
                 self.onMouseReleased.emit(pos)
 
         return handler
 
+    def on_drag_stats(self, received: float, sent: float):
+        self.logger.info(
+            f"Touch move: {received:.0f} -> {sent:.0f} packets/s", self.touch_coalescer
+        )
+
+    def start_broadcast(self):
+        """
+        Connect the broadcast targets on worker threads, each handshake blocks
+        until its server is up
+        """
+        for broadcast_client in self.broadcast_clients:
+            task = BackgroundTask(broadcast_client.async_start)
+            task.onFinished.connect(
+                functools.partial(self.on_broadcast_started, broadcast_client)
+            )
+            self.broadcast_tasks.append(task)
+            task.start()
+
+    def on_broadcast_started(
+        self,
+        broadcast_client: QScrcpyControlClient,
+        _,
+        error: Optional[Exception],
+    ):
+        if error is None:
+            return
+        if isinstance(error, (ConnectionError, AdbError)):
+            self.logger.warn(
+                f"Broadcast to {broadcast_client.device.serial} failed: {error}",
+                self.broadcaster,
+            )
+        else:
+            self.logger.error(
+                f"Broadcast to {broadcast_client.device.serial} failed: {error!r}",
+                self.broadcaster,
+            )
+
+    def on_broadcast_skew(self, stats: dict):
+        lag = ", ".join(
+            f"{name}={value / 1000:.2f}ms" for name, value in stats["mean_lag_us"].items()
+        )
+        self.logger.info(
+            f"Broadcast {stats['events']} events, skew mean={stats['mean_skew_us'] / 1000:.2f}ms "
+            f"max={stats['max_skew_us'] / 1000:.2f}ms, lag {lag}",
+            self.broadcaster,
+        )
+
     def update_mouse_trace(self):
         # if mouse in self.ui.opengl_widget
         if self.ui.opengl_widget.underMouse():
@@ -256,9 +485,12 @@ class MainWindow(QMainWindow):
 
     def mouse_recorder_handler(self, pos: QPoint):
         if self.mouse_recorder.is_recording:
-            self.mouse_recorder.on_mouse_released(
-                pos, self.ui.opengl_widget.screenShot()
-            )
+            if self.mouse_recorder.is_crop_mode:
+                # hand the decoded frame over, the worker converts what it needs
+                frame = self.ui.opengl_widget.currentFrame()
+            else:
+                frame = self.ui.opengl_widget.screenShotImage()
+            self.mouse_recorder.on_mouse_released(pos, frame)
 
     def map_code(self, code):
         """
@@ -289,7 +521,7 @@ class MainWindow(QMainWindow):
         if code in hard_code:
             return hard_code[code]
 
-        print(f"Unknown keycode: {code}")
+        log.debug("Unknown keycode: %d", code)
         return -1
 
     def on_init(self):
@@ -316,23 +548,25 @@ class MainWindow(QMainWindow):
         if frame is not None:
             self.fps_counter.hint()
             self.ui.opengl_widget.setFrame(frame)
-            ratio = frame.width / frame.height
-            if abs(self.last_ratio - ratio) > 0.01:
-                self.last_ratio = ratio
-                self.delta_size = self.size() - self.ui.opengl_widget.size()
-                gl_width = self.max_width
-                gl_height = round(gl_width / ratio)
-                if gl_height > self.screen_height:
-                    gl_height = self.screen_height
-                    gl_width = round(gl_height * ratio)
-
-                self.ui.opengl_widget.resize(gl_width, gl_height)
-                self.resize(
-                    gl_width + self.delta_size.width(),
-                    gl_height + self.delta_size.height(),
-                )
-                print(f"Resize to {gl_width} * {gl_height}")
-                QApplication.processEvents()
+            self.fit_window(frame.width / frame.height)
+
+    def fit_window(self, ratio: float):
+        if abs(self.last_ratio - ratio) > 0.01:
+            self.last_ratio = ratio
+            self.delta_size = self.size() - self.ui.opengl_widget.size()
+            gl_width = self.max_width
+            gl_height = round(gl_width / ratio)
+            if gl_height > self.screen_height:
+                gl_height = self.screen_height
+                gl_width = round(gl_height * ratio)
+
+            self.ui.opengl_widget.resize(gl_width, gl_height)
+            self.resize(
+                gl_width + self.delta_size.width(),
+                gl_height + self.delta_size.height(),
+            )
+            log.debug("Resize to %d * %d", gl_width, gl_height)
+            QApplication.processEvents()
 
     def on_socket_error(self, socketError: QTcpSocket.SocketError):
         self.logger.error(f"Socket error: {socketError}")
@@ -358,12 +592,24 @@ class MainWindow(QMainWindow):
         QApplication.instance().exit(0)
 
     def close_window(self):
+        self.touch_coalescer.flush()
+        if self.latency_probe is not None:
+            self.latency_probe.stop()
+        if self.macro_replayer is not None:
+            self.macro_replayer.stop()
         self.mouse_recorder.stop_record()
         if self.client.alive:
             self.client.stop()
+        self.broadcaster.close()
+        for broadcast_client in self.broadcast_clients:
+            if broadcast_client.alive:
+                broadcast_client.stop()
         self.mouse_trace_timer.stop()
         self.alive = False
         self.mouse_recorder.stop_processor()
+        Archiver.get_archiver().stop()
+        DeviceWatcher.get_watcher().stop()
+        AdbService.get_service().close()
 
 
 def main():
@@ -399,20 +645,204 @@ def main():
         help="Set bitrate of the video, default 8Mbps",
     )
     parser.add_argument("--encoder_name", type=str, help="Encoder name to use")
+    parser.add_argument(
+        "--archive_level",
+        type=int,
+        default=-1,
+        choices=range(-1, 10),
+        help="Deflate level (0 ~ 9) of the session archives, default -1 (store only)",
+    )
+    parser.add_argument(
+        "--record_format",
+        type=str,
+        default="png",
+        choices=["png", "webp"],
+        help="Picture format of the mouse records, default png (webp is lossless)",
+    )
+    parser.add_argument(
+        "--record_level",
+        type=int,
+        default=6,
+        choices=range(0, 10),
+        help="Compress level of the mouse records, png 0 ~ 9, webp 0 ~ 6, default 6",
+    )
+    parser.add_argument(
+        "--record_crop",
+        type=int,
+        default=0,
+        help="Save only the neighbourhood of this radius around each click and a thumbnail, "
+        "full frames are kept in a raw stream recording, default 0 (full frames)",
+    )
+    parser.add_argument(
+        "--record_thumbnail_width",
+        type=int,
+        default=320,
+        help="Thumbnail width of the cropped mouse records, default 320",
+    )
+    parser.add_argument(
+        "--record_storage",
+        type=str,
+        default=MouseRecordProcessor.STORAGE_FILES,
+        choices=[MouseRecordProcessor.STORAGE_FILES, MouseRecordProcessor.STORAGE_CONTAINER],
+        help="Save every mouse record as separate files, or append them to a single "
+        "session container (mouse_records.bas), default files",
+    )
+    parser.add_argument(
+        "--move_window",
+        type=int,
+        default=-1,
+        help="Merge the touch moves within this window (ms), 0 sends every move, "
+        "default -1 (one frame interval of max fps)",
+    )
+    parser.add_argument(
+        "--probe_trials",
+        type=int,
+        default=20,
+        help="Taps per latency probe run, default 20",
+    )
+    parser.add_argument(
+        "--broadcast",
+        type=str,
+        default="",
+        help="Comma separated serials of the devices receiving the same input",
+    )
+    parser.add_argument(
+        "--grid",
+        type=str,
+        help="Show several devices in a grid instead of the main window, "
+        "comma separated serials or 'all'",
+    )
+    parser.add_argument(
+        "--grid_background",
+        type=str,
+        default="reduced",
+        choices=["reduced", "keyframes", "full"],
+        help="Decoding of the unfocused devices in the grid, default reduced",
+    )
+    parser.add_argument(
+        "--scan",
+        action="store_true",
+        help="Probe the emulator ports on 127.0.0.1 at startup and connect every responsive one",
+    )
+    parser.add_argument(
+        "--scan_ports",
+        type=str,
+        default="",
+        help="Ports probed by a scan, comma separated ports or ranges with a step, "
+        "e.g. 7555,5555-5585/2, default all the known emulator ports",
+    )
+    parser.add_argument(
+        "--auto_tune",
+        action="store_true",
+        help="Stream a few seconds with each encoder of the device before opening the window, "
+        "the best one is kept in the device profile and used from then on",
+    )
+    parser.add_argument(
+        "--tune_latency_trials",
+        type=int,
+        default=0,
+        help="Taps at the screen center measuring the latency of each encoder during "
+        "auto tune, default 0 (not measured)",
+    )
+    parser.add_argument(
+        "--log_level",
+        type=str,
+        default="INFO",
+        choices=["DEBUG", "INFO", "SUCCESS", "WARNING", "ERROR", "CRITICAL"],
+        help="Threshold of the console and file log, DEBUG shows the stray prints too, default INFO",
+    )
+    parser.add_argument(
+        "--log_levels",
+        type=str,
+        default="",
+        help="Thresholds per module, comma separated name=LEVEL, "
+        "e.g. src.app.qt_scrcpy=DEBUG,PIL=WARNING",
+    )
+    parser.add_argument(
+        "--log_file",
+        type=str,
+        default=LOG_FILE,
+        help=f"Rotating log file (json lines), empty to disable, default {LOG_FILE}",
+    )
     args = parser.parse_args()
     serial = args.device
 
+    LogBackend.setup(
+        logging.getLevelName(args.log_level),
+        parse_levels(args.log_levels),
+        args.log_file or None,
+    )
+    # stray prints are debug records of their module, dropped unless enabled
+    install_print_hook()
+
     if QApplication.instance():
         app = QApplication.instance()
     else:
         app = QApplication([])
     app.setApplicationName("PyScrcpyClient")
 
-    Connector.try_connect()
+    Archiver.get_archiver(
+        ArchiveOptions.store()
+        if args.archive_level < 0
+        else ArchiveOptions.deflate(args.archive_level)
+    )
+
+    Connector.try_connect(
+        scan=args.scan,
+        ports=parse_ports(args.scan_ports) if args.scan_ports else None,
+    )
+
+    if args.auto_tune:
+        devices = DeviceWatcher.get_watcher().devices()
+        tune_serial = serial or (devices[0] if devices else None)
+        if tune_serial:
+            tuner = EncoderTuner(
+                tune_serial,
+                latency_trials=args.tune_latency_trials,
+                max_width=args.max_width,
+                bitrate=args.bitrate,
+                max_fps=args.max_fps,
+            )
+            loop = QtCore.QEventLoop()
+            tuner.onFinished.connect(loop.quit)
+            QtCore.QTimer.singleShot(0, tuner.start)
+            loop.exec()
+
+    if args.grid:
+        serials = (
+            DeviceWatcher.get_watcher().devices()
+            if args.grid == "all"
+            else [_ for _ in args.grid.split(",") if _]
+        )
+        manager = SessionManager(
+            DecodeScheduler(args.grid_background),
+            args.max_width,
+            args.bitrate,
+            args.max_fps,
+        )
+        grid = DeviceGrid(manager)
+        grid.show()
+        for device_serial in serials:
+            manager.add(device_serial)
+        code = app.exec()
+        Archiver.get_archiver().stop()
+        sys.exit(code)
 
     try:
         m = MainWindow(
-            args.max_width, serial, args.encoder_name, args.max_fps, args.bitrate
+            args.max_width,
+            serial,
+            args.encoder_name,
+            args.max_fps,
+            args.bitrate,
+            RecordEncoding(args.record_format, args.record_level),
+            CropOptions(args.record_crop, args.record_thumbnail_width)
+            if args.record_crop > 0
+            else None,
+            args.record_storage,
+            args.move_window if args.move_window >= 0 else None,
+            args.probe_trials,
+            [_ for _ in args.broadcast.split(",") if _],
         )
     except RuntimeError as e:
         QMessageBox.critical(
@@ -424,4 +854,5 @@ def main():
         return
     m.show()
     m.client.async_start()
+    m.start_broadcast()
     sys.exit(app.exec())
@@ -1 +1 @@
-from .qcore import QScrcpyClient
\ No newline at end of file
+from .qcore import QScrcpyClient, QScrcpyControlClient
\ No newline at end of file
@@ -1,7 +1,9 @@
+import logging
 import os
 import socket
 import struct
 import threading
+import time
 from time import sleep
 from typing import Any, Callable, Optional, Tuple, Union
 
@@ -14,6 +16,22 @@ from src.scrcpy.const import (
     LOCK_SCREEN_ORIENTATION_UNLOCKED,
 )
 from src.scrcpy.control import ControlSender
+from src.scrcpy.reader import DeviceMessageReader
+from src.scrcpy.writer import ControlWriter
+from ..utils.adb_service import AdbService
+from ..utils.device_profile import (
+    DeviceProfile,
+    ProfileStore,
+    parse_encoders,
+    parse_wm_size,
+)
+from ..utils.stream_recorder import (
+    NAL_IDR,
+    NAL_PPS,
+    NAL_SPS,
+    h264_disposable,
+    h264_nal_units,
+)
 
 try:
     from PySide6.QtNetwork import QTcpSocket
@@ -21,30 +39,152 @@ try:
 except ImportError:
     raise ImportError("PySide6 is required to use QScrcpyClient")
 
+log = logging.getLogger(__name__)
+
+
+# Decode modes, see VideoDecoder.set_decode_mode
+DECODE_FULL = "full"
+DECODE_REDUCED = "reduced"
+DECODE_KEYFRAMES = "keyframes"
+
+KNOWN_ENCODERS = [
+    "OMX.google.h264.encoder",
+    "OMX.qcom.video.encoder.avc",
+    "c2.qti.avc.encoder",
+    "c2.android.avc.encoder",
+]
+
 
 class VideoDecoder(QObject):
     onDataReceived = Signal(QByteArray)
     onFrameReady = Signal(object)
     onResolutionChanged = Signal(int, int)
     resolution = (-1, -1)
+    # packets kept to resume full decoding after keyframes-only, ~10s at 60 fps
+    max_gop_packets = 600
 
-    def __init__(self):
+    def __init__(self, stream_recorder=None):
         super().__init__()
         self.codec = av.CodecContext.create("h264", "r")
         self.onDataReceived.connect(self.parse_data)
+        # index of the next decoded frame, stored in the pts of the frames
+        self.frame_index = 0
+        # optional raw stream sink, with write_packet(data, frame_index, units)
+        self.stream_recorder = stream_recorder
+
+        self.decode_mode = DECODE_FULL
+        self.reduced_interval = 0.2
+        self.last_emitted_at = 0.0
+        self.parameter_sets = b""
+        self.gop: list[bytes] = []  # packets since the last keyframe
+        self.catch_up = False
+
+        # decode cost, read by the client for the device profile
+        self.decoded_frames = 0
+        self.decode_seconds = 0.0
+
+    def set_decode_mode(self, mode: str, interval: float = 0.2) -> None:
+        """
+        Can be called from any thread, applied from the next packet
+
+        Args:
+            mode: DECODE_FULL every frame, DECODE_REDUCED skip the frames no
+                other frame refers to and emit one per interval,
+                DECODE_KEYFRAMES decode only the keyframes, the frames since
+                the last keyframe are decoded again when switching back so the
+                picture is right at once. Most Android encoders mark every
+                frame as a reference, then DECODE_REDUCED only saves the work
+                on the emitted frames, not the decoding
+            interval: seconds between two emitted frames in DECODE_REDUCED
+        """
+        self.reduced_interval = interval
+        if self.decode_mode == DECODE_KEYFRAMES and mode != DECODE_KEYFRAMES:
+            self.catch_up = True
+        self.decode_mode = mode
 
     def parse_data(self, data: QByteArray):
         packets = self.codec.parse(data.data())
         if not packets:
             return
         for packet in packets:
-            frames = self.codec.decode(packet)
-            for raw_frame in frames:
-                self.onFrameReady.emit(raw_frame)
-                width, height = raw_frame.width, raw_frame.height
-                if width != self.resolution[0] or height != self.resolution[1]:
-                    self.resolution = (width, height)
-                    self.onResolutionChanged.emit(width, height)
+            raw = bytes(packet)
+            # parsed once, shared by the recorder, the gop tracking and the skip
+            units = h264_nal_units(raw)
+            types = {nal_type for nal_type, _ in units}
+            if self.stream_recorder is not None:
+                self.stream_recorder.write_packet(raw, self.frame_index, units)
+            if self.catch_up and self.decode_mode != DECODE_KEYFRAMES:
+                self.catch_up = False
+                self.resume(NAL_IDR in types)
+            self.track_gop(raw, units, types)
+
+            if self.decode_mode == DECODE_KEYFRAMES:
+                skip = NAL_IDR not in types
+            else:
+                skip = self.decode_mode == DECODE_REDUCED and h264_disposable(units)
+            if skip:
+                if types - {NAL_SPS, NAL_PPS}:
+                    # skipped frame, keep the indexes aligned with the stream
+                    self.frame_index += 1
+                continue
+            started_at = time.perf_counter()
+            raw_frames = self.codec.decode(packet)
+            self.decode_seconds += time.perf_counter() - started_at
+            self.decoded_frames += len(raw_frames)
+            for raw_frame in raw_frames:
+                raw_frame.pts = self.frame_index
+                self.frame_index += 1
+                self.emit_frame(raw_frame)
+
+    def track_gop(self, raw: bytes, units: list[tuple[int, bytes]], types: set) -> None:
+        if NAL_SPS in types or NAL_PPS in types:
+            # kept apart, later keyframes are sent without them
+            self.parameter_sets = b"".join(
+                unit for nal_type, unit in units if nal_type in (NAL_SPS, NAL_PPS)
+            )
+            if NAL_IDR not in types:
+                return
+        if NAL_IDR in types:
+            self.gop.clear()
+        if NAL_IDR in types or self.gop:
+            self.gop.append(raw)
+        if len(self.gop) > self.max_gop_packets:
+            # too long to decode again, wait for the next keyframe instead
+            self.gop.clear()
+
+    def resume(self, at_keyframe: bool) -> None:
+        """
+        Decode the frames skipped since the last keyframe with a new decoder,
+        only the last one is emitted. The new decoder always gets the SPS / PPS
+        first, the next keyframes do not carry them.
+        """
+        self.codec = av.CodecContext.create("h264", "r")
+        if self.parameter_sets:
+            # an empty packet would flush the decoder
+            self.codec.decode(av.Packet(self.parameter_sets))
+        if at_keyframe or not self.gop:
+            return
+        last_frame = None
+        for raw in self.gop:
+            for raw_frame in self.codec.decode(av.Packet(raw)):
+                last_frame = raw_frame
+        if last_frame is not None:
+            last_frame.pts = self.frame_index - 1
+            self.last_emitted_at = 0.0
+            self.emit_frame(last_frame)
+
+    def emit_frame(self, raw_frame: av.VideoFrame) -> None:
+        width, height = raw_frame.width, raw_frame.height
+        resized = width != self.resolution[0] or height != self.resolution[1]
+        if self.decode_mode == DECODE_REDUCED and not resized:
+            now = time.monotonic()
+            if now - self.last_emitted_at < self.reduced_interval:
+                return
+            self.last_emitted_at = now
+        self.onFrameReady.emit(raw_frame)
+        if resized:
+            self.resolution = (width, height)
+            self.onResolutionChanged.emit(width, height)
 
 
 class QScrcpyClient(QObject):
@@ -52,6 +192,7 @@ class QScrcpyClient(QObject):
     onFrameReady = Signal(av.VideoFrame)
     onInit = Signal()
     onDisconnect = Signal()
+    onDeviceMessage = Signal(object)
 
     def __init__(
         self,
@@ -66,6 +207,8 @@ class QScrcpyClient(QObject):
         connection_timeout: int = 3000,
         encoder_name: Optional[str] = None,
         receive_buffer_size: int = 0x10000,
+        async_control: bool = True,
+        use_profile: bool = True,
     ):
         """
         Create a scrcpy client, this client won't be started until you call the start function
@@ -80,8 +223,11 @@ class QScrcpyClient(QObject):
             stay_awake: keep Android device awake
             lock_screen_orientation: lock screen orientation, LOCK_SCREEN_ORIENTATION_*
             connection_timeout: timeout for connection, unit is ms
-            encoder_name: encoder name, enum: [OMX.google.h264.encoder, OMX.qcom.video.encoder.avc, c2.qti.avc.encoder, c2.android.avc.encoder], default is None (Auto)
+            encoder_name: encoder name, enum: [OMX.google.h264.encoder, OMX.qcom.video.encoder.avc, c2.qti.avc.encoder, c2.android.avc.encoder]
+                or one listed in the device profile, default is None (the encoder of the profile or Auto)
             receive_buffer_size: receive buffer size, default is 0x10000
+            async_control: send control packages on a writer thread instead of the caller's thread
+            use_profile: read and update the cached profile of the device
         """
         super().__init__()
         # Check Params
@@ -94,13 +240,6 @@ class QScrcpyClient(QObject):
         assert (
             connection_timeout >= 0
         ), "connection_timeout must be greater than or equal to 0"
-        assert encoder_name in [
-            None,
-            "OMX.google.h264.encoder",
-            "OMX.qcom.video.encoder.avc",
-            "c2.qti.avc.encoder",
-            "c2.android.avc.encoder",
-        ]
 
         # Params
         self.flip = flip
@@ -111,8 +250,8 @@ class QScrcpyClient(QObject):
         self.stay_awake = stay_awake
         self.lock_screen_orientation = lock_screen_orientation
         self.connection_timeout = connection_timeout
-        self.encoder_name = encoder_name
         self.receive_buffer_size = receive_buffer_size
+        self.async_control = async_control
 
         # Connect to device
         if device is None:
@@ -121,17 +260,31 @@ class QScrcpyClient(QObject):
             device = adb.buffer(serial=device)
 
         self.device = device
-        self.listeners = dict(frame=[], init=[], disconnect=[])
+        self.profile: Optional[DeviceProfile] = None
+        self.use_profile = use_profile
+        self.load_profile()
+        assert encoder_name in [None] + KNOWN_ENCODERS or (
+            self.profile is not None and encoder_name in (self.profile.encoders or [])
+        ), "encoder_name must be a known encoder or one listed in the device profile"
+        # asked by the caller, chosen again against the profile of each device
+        self.requested_encoder = encoder_name
+        self.encoder_name = self.choose_encoder(encoder_name)
+
+        self.listeners = dict(frame=[], init=[], disconnect=[], device_message=[])
         self.listener_signal = {
             "frame": self.onFrameReady,
             "init": self.onInit,
             "disconnect": self.onDisconnect,
+            "device_message": self.onDeviceMessage,
         }
 
         # User accessible
         self.last_frame: Optional[av.VideoFrame] = None
-        self.resolution: Optional[Tuple[int, int]] = None
-        self.device_name: Optional[str] = None
+        # known before connecting when the device has a profile
+        self.resolution: Optional[Tuple[int, int]] = (
+            self.profile.stream_size(max_width) if self.profile else None
+        )
+        self.device_name: Optional[str] = self.profile.device_name if self.profile else None
         self.control = ControlSender(self)
 
         # Need to destroy
@@ -140,10 +293,15 @@ class QScrcpyClient(QObject):
         self.__video_socket: Optional[socket.socket] = None
         self.control_socket: Optional[socket.socket] = None
         self.control_socket_lock = threading.Lock()
+        self.control_writer: Optional[ControlWriter] = None
+        self.device_reader: Optional[DeviceMessageReader] = None
 
         # Qt stuff
         self.q_socket: Optional[QTcpSocket] = None
+        self.stream_recorder = None
         self.video_decoder = VideoDecoder()
+        # frame listeners connected to the frames of the current decoder
+        self.decoder_listeners: list[Callable[..., Any]] = []
         self.video_decoder_thread = QThread()
         self.last_socket_error = None
 
@@ -152,17 +310,7 @@ class QScrcpyClient(QObject):
         Connect to android server, there will be two sockets, video and control socket.
         This method will set: video_socket, control_socket, resolution variables
         """
-        for _ in range(self.connection_timeout // 100):
-            try:
-                self.__video_socket = self.device.create_connection(
-                    Network.LOCAL_ABSTRACT, "scrcpy"
-                )
-                break
-            except AdbError:
-                sleep(0.1)
-                pass
-        else:
-            raise ConnectionError("Failed to connect scrcpy-server after 3 seconds")
+        self.__video_socket = self.__connect_server()
 
         dummy_byte = self.__video_socket.recv(1)
         if not len(dummy_byte) or dummy_byte != b"\x00":
@@ -177,19 +325,42 @@ class QScrcpyClient(QObject):
 
         res = self.__video_socket.recv(4)
         self.resolution = struct.unpack(">HH", res)
+        self.remember_frame_size()
+
+        # started once the handshake succeeded, nothing is left running if it fails
+        if self.async_control:
+            self.control_writer = ControlWriter(
+                self.control_socket, self.control_socket_lock
+            )
+            self.control_writer.start()
+            self.control.writer = self.control_writer
+        self.device_reader = DeviceMessageReader(self.control_socket)
+        self.device_reader.add_listener(self.onDeviceMessage.emit)
+        self.device_reader.start()
+        self.control.reader = self.device_reader
         self.onFrameResized.emit(self.resolution[0], self.resolution[1])
         self.__video_socket.setblocking(False)
 
-    def __deploy_server(self) -> None:
-        """
-        Deploy server to android device
-        """
-        jar_name = "scrcpy-server.jar"
+    def __connect_server(self) -> socket.socket:
+        for _ in range(self.connection_timeout // 100):
+            try:
+                return self.device.create_connection(Network.LOCAL_ABSTRACT, "scrcpy")
+            except AdbError:
+                sleep(0.1)
+        raise ConnectionError("Failed to connect scrcpy-server after 3 seconds")
+
+    def __push_server(self) -> None:
         server_file_path = os.path.join(
-            os.path.abspath(os.path.dirname(__file__)), jar_name
+            os.path.abspath(os.path.dirname(__file__)), "scrcpy-server.jar"
+        )
+        # skipped when the device has the same jar from a previous session
+        AdbService.get_service().push(
+            self.device.serial, server_file_path, "/data/local/tmp/scrcpy-server.jar"
         )
-        self.device.sync.push(server_file_path, f"/data/local/tmp/{jar_name}")
-        commands = [
+
+    def server_command(self, encoder_name: Optional[str]) -> list[str]:
+        jar_name = "scrcpy-server.jar"
+        return [
             f"CLASSPATH=/data/local/tmp/{jar_name}",
             "app_process",
             "/",
@@ -208,18 +379,120 @@ class QScrcpyClient(QObject):
             "false",  # Show touches
             "true" if self.stay_awake else "false",  # Stay awake
             "-",  # Codec (video encoding) options
-            self.encoder_name or "-",  # Encoder name
+            encoder_name or "-",  # Encoder name
             "false",  # Power off screen after server closed
         ]
 
+    def __deploy_server(self) -> None:
+        """
+        Deploy server to android device
+        """
+        if self.profile is not None and (
+            self.profile.encoders is None or self.profile.resolution is None
+        ):
+            self.query_profile()
+        else:
+            self.__push_server()
+
         self.__server_stream: AdbConnection = self.device.shell(
-            commands,
+            self.server_command(self.encoder_name),
             stream=True,
         )
 
         # Wait for server to start
         self.__server_stream.read(10)
 
+    def query_profile(self) -> None:
+        """
+        Fill the device profile once: the native size from wm size, the
+        encoders from a server started with an encoder that does not exist,
+        it prints the available ones before exiting
+        """
+        try:
+            self.__push_server()
+            self.profile.resolution = parse_wm_size(
+                AdbService.get_service().shell(self.device.serial, "wm size")
+            )
+            stream = self.device.shell(self.server_command("_"), stream=True)
+            sockets = []
+            try:
+                # the server waits for the client before creating the encoder
+                sockets.append(self.__connect_server())
+                sockets[0].recv(1)
+                sockets.append(self.__connect_server())
+                stream.conn.settimeout(5)
+                self.profile.encoders = parse_encoders(stream.read_until_close())
+            finally:
+                for s in sockets:
+                    s.close()
+                stream.close()
+        except Exception as e:
+            log.warning("Failed to query the encoders: %s", e)
+            return
+        ProfileStore.get_store().save(self.profile)
+
+    def load_profile(self) -> None:
+        if self.use_profile and getattr(self.device, "serial", None):
+            self.profile = ProfileStore.get_store().get(self.device.serial)
+        else:
+            self.profile = None
+
+    def choose_encoder(self, encoder_name: Optional[str]) -> Optional[str]:
+        """
+        Returns:
+            the requested encoder, or the one of the profile when not given,
+            None (device default) instead of an encoder known to fail
+        """
+        if self.profile is None:
+            return encoder_name
+        if encoder_name is None:
+            encoder_name = self.profile.encoder_name
+        if not self.profile.accepts_encoder(encoder_name):
+            log.warning("Skip encoder %s, it failed on %s", encoder_name, self.profile.serial)
+            return None
+        return encoder_name
+
+    def remember_frame_size(self) -> None:
+        """
+        Keep the frame size in the profile, it predicts the orientation of the
+        next session, saved with the profile when the session stops
+        """
+        if self.profile is not None and self.resolution is not None:
+            self.profile.frame_size = tuple(self.resolution)
+            self.profile.frame_max_width = self.max_width
+
+    def save_profile(self, closed_by_device: bool) -> None:
+        """
+        Keep what this session learnt about the device
+
+        Args:
+            closed_by_device: the device ended the session, without a frame
+                the encoder is recorded as failed
+        """
+        profile = self.profile
+        if profile is None:
+            return
+        decoder = self.video_decoder
+        if decoder.decoded_frames:
+            profile.device_name = self.device_name or profile.device_name
+            profile.encoder_name = self.encoder_name
+            profile.bitrate = self.bitrate
+            profile.max_fps = self.max_fps
+            profile.decode_ms = round(
+                decoder.decode_seconds * 1000 / decoder.decoded_frames, 3
+            )
+        elif closed_by_device and self.encoder_name:
+            if self.encoder_name not in profile.failed_encoders:
+                profile.failed_encoders.append(self.encoder_name)
+            if profile.encoder_name == self.encoder_name:
+                profile.encoder_name = None
+        else:
+            return
+        try:
+            ProfileStore.get_store().save(profile)
+        except OSError as e:
+            log.warning("Failed to save the device profile: %s", e)
+
     def make_video_socket(self):
 
         self.__deploy_server()
@@ -231,12 +504,16 @@ class QScrcpyClient(QObject):
         self.last_socket_error = None
         self.alive = True
         self.video_decoder.moveToThread(self.video_decoder_thread)
-        for cls in self.listeners["frame"]:
-            self.video_decoder.onFrameReady.connect(cls)
+        for listener in self.listeners["frame"]:
+            self.connect_frame_listener(listener)
         self.video_decoder.onResolutionChanged.connect(self.on_resolution)
 
         self.video_decoder_thread.start()
 
+        if self.resolution is not None:
+            # size from the profile, the window is laid out before the first frame
+            self.onFrameResized.emit(*self.resolution)
+
         self.q_socket = QTcpSocket()
         self.q_socket.setReadBufferSize(self.receive_buffer_size)
 
@@ -246,28 +523,44 @@ class QScrcpyClient(QObject):
 
         self.q_socket.setSocketDescriptor(self.make_video_socket().fileno())
 
+    def set_stream_recorder(self, recorder) -> None:
+        """
+        Tee the raw video packets to a recorder, None to detach
+
+        Args:
+            recorder: object with write_packet(data: bytes, frame_index: int)
+        """
+        self.stream_recorder = recorder
+        self.video_decoder.stream_recorder = recorder
+
     def on_resolution(self, width: int, height: int):
         res = (width, height)
         if res != self.resolution:
             self.resolution = res
+            self.remember_frame_size()
             self.onFrameResized.emit(width, height)
-            print(f"emit:{width},{height}")
+            log.debug("Frame resized to %d * %d", width, height)
 
     def on_q_socket_ready_read(self):
         data = self.q_socket.readAll()
         self.video_decoder.onDataReceived.emit(data)
 
     def on_q_socket_disconnected(self):
-        self.stop()
+        self.stop(closed_by_device=True)
 
     def on_q_socket_error(self, error: QTcpSocket.SocketError):
         self.last_socket_error = error
-        self.stop()
+        self.stop(closed_by_device=True)
 
-    def stop(self) -> None:
+    def stop(self, closed_by_device: bool = False) -> None:
         """
         Stop listening (both threaded and blocked)
+
+        Args:
+            closed_by_device: the video stream was closed by the device
         """
+        if self.alive:
+            self.save_profile(closed_by_device)
         self.alive = False
         if self.__server_stream is not None:
             try:
@@ -275,12 +568,32 @@ class QScrcpyClient(QObject):
             except Exception:
                 pass
 
+        self.control.stop_gestures()
+        control_writer = self.control_writer
+        if control_writer is not None:
+            self.control.writer = None
+            self.control_writer = None
+            control_writer.stop(wait=False)
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("Control writer stats: %s", control_writer.stats())
+
         if self.control_socket is not None:
             try:
                 self.control_socket.close()
             except Exception:
                 pass
 
+        device_reader = self.device_reader
+        if device_reader is not None:
+            self.control.reader = None
+            self.device_reader = None
+            # the blocked recv returns once the socket is closed
+            device_reader.stop()
+
+        if control_writer is not None:
+            # a pending send has failed with the socket closed
+            control_writer.join(timeout=1)
+
         if self.__video_socket is not None:
             try:
                 self.__video_socket.close()
@@ -308,22 +621,33 @@ class QScrcpyClient(QObject):
         Add a video listener
 
         Args:
-            cls: Listener category, support: init, frame
+            cls: Listener category, support: init, frame, disconnect, device_message
             listener: A function to receive frame np.ndarray
         """
         self.listeners[cls].append(listener)
         self.listener_signal[cls].connect(listener)
+        if cls == "frame" and self.alive:
+            # the frames come from the decoder, started already
+            self.connect_frame_listener(listener)
 
     def remove_listener(self, cls: str, listener: Callable[..., Any]) -> None:
         """
         Remove a video listener
 
         Args:
-            cls: Listener category, support: init, frame
+            cls: Listener category, support: init, frame, disconnect, device_message
             listener: A function to receive frame np.ndarray
         """
         self.listeners[cls].remove(listener)
         self.listener_signal[cls].disconnect(listener)
+        if cls == "frame" and listener in self.decoder_listeners:
+            self.decoder_listeners.remove(listener)
+            self.video_decoder.onFrameReady.disconnect(listener)
+
+    def connect_frame_listener(self, listener: Callable[..., Any]) -> None:
+        if listener not in self.decoder_listeners:
+            self.decoder_listeners.append(listener)
+            self.video_decoder.onFrameReady.connect(listener)
 
     def __send_to_listeners(self, cls: str, *args, **kwargs) -> None:
         """
@@ -335,7 +659,7 @@ class QScrcpyClient(QObject):
             *kwargs: Other arguments
         """
         self.listener_signal[cls].emit(*args, **kwargs)
-        print(f"send to listeners: {cls=}, {args=}, {kwargs=}")
+        log.debug("Send to listeners: cls=%s, args=%r, kwargs=%r", cls, args, kwargs)
 
     def change_device(self, device: str) -> bool:
         alive = self.alive
@@ -344,11 +668,59 @@ class QScrcpyClient(QObject):
         if new_device is None:
             return False
         self.device = new_device
+        self.load_profile()
+        self.encoder_name = self.choose_encoder(self.requested_encoder)
+        self.resolution = self.profile.stream_size(self.max_width) if self.profile else None
+        self.device_name = self.profile.device_name if self.profile else None
         if not alive:
             return True
 
         self.q_socket = None
-        self.video_decoder = VideoDecoder()
+        self.video_decoder = VideoDecoder(self.stream_recorder)
+        self.decoder_listeners = []
         self.video_decoder_thread = QThread()
         self.async_start()
         return True
+
+
+class QScrcpyControlClient(QScrcpyClient):
+    """
+    Control channel of a device whose screen is not shown, e.g. a target of
+    InputBroadcaster. scrcpy-server 1.20 accepts the video connection first and
+    only injects touches carrying its video size, so the video socket is
+    connected for the handshake, which gives that size, and never read: no Qt
+    socket, no decoder thread, the server encoder blocks once the socket buffer
+    is full. A rotation of the device is not seen, the touches are ignored
+    by the server until the client is restarted.
+    """
+
+    def __init__(
+        self,
+        device: Optional[Union[AdbDevice, str, any]] = None,
+        connection_timeout: int = 3000,
+        stay_awake: bool = False,
+    ):
+        """
+        Args:
+            device: Android device, select first one if none, from serial if str
+            connection_timeout: timeout for connection, unit is ms
+            stay_awake: keep Android device awake
+        """
+        super().__init__(
+            device=device,
+            bitrate=100_000,
+            max_fps=1,
+            stay_awake=stay_awake,
+            connection_timeout=connection_timeout,
+        )
+
+    def async_start(self) -> None:
+        """
+        Start the server and connect, returns once the control channel is ready
+        """
+        self.alive = True
+        try:
+            self.make_video_socket()
+        except Exception:
+            self.stop()
+            raise
@@ -0,0 +1,137 @@
+from typing import Optional
+
+from adbutils import adb
+from PySide6 import QtCore
+from PySide6.QtCore import QObject
+
+import src.scrcpy as scrcpy
+from .logger import Logger
+from .qt_scrcpy import QScrcpyClient
+from .qt_scrcpy.qcore import DECODE_FULL, DECODE_KEYFRAMES, DECODE_REDUCED
+
+
+class DeviceSession:
+    def __init__(self, serial: str, client: QScrcpyClient):
+        self.serial = serial
+        self.client = client
+        self.view = None  # widget rendering the device, set by the grid
+
+
+class DecodeScheduler:
+    """
+    Decide how much of each stream is decoded: the focused device at full
+    frame rate, the background devices at a reduced rate or keyframes only.
+
+    DECODE_REDUCED still decodes every frame that later frames refer to, which
+    is every frame for most Android encoders: it saves the conversion and the
+    rendering of the background devices, DECODE_KEYFRAMES also saves decoding.
+    """
+
+    def __init__(self, background_mode: str = DECODE_REDUCED, interval: float = 0.5):
+        """
+        Args:
+            background_mode: DECODE_REDUCED | DECODE_KEYFRAMES | DECODE_FULL
+            interval: seconds between two frames shown in DECODE_REDUCED
+        """
+        assert background_mode in (DECODE_FULL, DECODE_REDUCED, DECODE_KEYFRAMES)
+        self.background_mode = background_mode
+        self.interval = interval
+
+    def apply(self, sessions: list[DeviceSession], focused: Optional[str]) -> None:
+        for session in sessions:
+            if session.serial == focused:
+                session.client.video_decoder.set_decode_mode(DECODE_FULL)
+            else:
+                session.client.video_decoder.set_decode_mode(
+                    self.background_mode, self.interval
+                )
+
+
+class SessionManager(QObject):
+    """
+    Keep several devices connected at once, switching the focus only changes
+    how their streams are decoded, nothing is reconnected.
+    """
+
+    onSessionAdded = QtCore.Signal(object)  # DeviceSession
+    onSessionRemoved = QtCore.Signal(str)
+    onFocusChanged = QtCore.Signal(str)
+
+    def __init__(
+        self,
+        scheduler: Optional[DecodeScheduler] = None,
+        max_width: int = 0,
+        bitrate: int = 8_000_000,
+        max_fps: int = 60,
+    ):
+        super().__init__()
+        self.scheduler = scheduler or DecodeScheduler()
+        self.max_width = max_width
+        self.bitrate = bitrate
+        self.max_fps = max_fps
+        self.sessions: dict[str, DeviceSession] = {}
+        self.focused: Optional[str] = None
+        self.logger = Logger.get_logger()
+
+    def add(self, serial: str) -> DeviceSession:
+        """
+        Connect a device, the first one gets the focus
+
+        Args:
+            serial: device serial
+        """
+        if serial in self.sessions:
+            return self.sessions[serial]
+        client = QScrcpyClient(
+            device=adb.device(serial=serial),
+            max_width=self.max_width,
+            bitrate=self.bitrate,
+            max_fps=self.max_fps,
+        )
+        session = DeviceSession(serial, client)
+        client.add_listener(
+            scrcpy.EVENT_DISCONNECT, lambda: self.on_disconnected(serial)
+        )
+        self.sessions[serial] = session
+        self.onSessionAdded.emit(session)
+        if self.focused is None:
+            self.focus(serial)
+        else:
+            self.scheduler.apply([session], self.focused)
+        client.async_start()
+        self.logger.info(f"Connected to {serial}", self)
+        return session
+
+    def remove(self, serial: str) -> None:
+        session = self.sessions.pop(serial, None)
+        if session is None:
+            return
+        if session.client.alive:
+            session.client.stop()
+        self.onSessionRemoved.emit(serial)
+        if self.focused == serial:
+            self.focus(next(iter(self.sessions), None))
+
+    def focus(self, serial: Optional[str]) -> None:
+        if serial == self.focused or (serial is not None and serial not in self.sessions):
+            return
+        self.focused = serial
+        self.scheduler.apply(list(self.sessions.values()), serial)
+        self.onFocusChanged.emit(serial or "")
+
+    def set_background_mode(self, mode: str) -> None:
+        self.scheduler.background_mode = mode
+        self.scheduler.apply(list(self.sessions.values()), self.focused)
+
+    @property
+    def focused_session(self) -> Optional[DeviceSession]:
+        return self.sessions.get(self.focused) if self.focused else None
+
+    def on_disconnected(self, serial: str) -> None:
+        if serial in self.sessions:
+            self.logger.warn(f"Disconnected from {serial}", self)
+            self.remove(serial)
+
+    def close(self) -> None:
+        for serial in list(self.sessions):
+            self.remove(serial)
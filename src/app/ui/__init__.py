@@ -1,3 +1,5 @@
+from .ui_archive_browser import Ui_ArchiveBrowser
+from .ui_device_grid import Ui_DeviceGrid
 from .ui_frame_viewer import Ui_FrameViewer
 from .ui_logger import Ui_Logger
 from .ui_main import Ui_MainWindow
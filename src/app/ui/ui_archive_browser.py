@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+################################################################################
+## Form generated from reading UI file 'archive_browser.ui'
+##
+## Created by: Qt User Interface Compiler version 6.5.3
+##
+## WARNING! All changes made in this file will be lost when recompiling UI file!
+################################################################################
+
+from PySide6.QtCore import QCoreApplication, QMetaObject
+from PySide6.QtWidgets import (
+    QComboBox,
+    QGroupBox,
+    QHBoxLayout,
+    QLabel,
+    QListView,
+    QPushButton,
+    QSizePolicy,
+    QVBoxLayout,
+)
+
+
+class Ui_ArchiveBrowser(object):
+    def setupUi(self, Form):
+        if not Form.objectName():
+            Form.setObjectName("Form")
+        Form.resize(866, 575)
+        self.verticalLayout = QVBoxLayout(Form)
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.horizontalLayout = QHBoxLayout()
+        self.horizontalLayout.setObjectName("horizontalLayout")
+        self.label = QLabel(Form)
+        self.label.setObjectName("label")
+
+        self.horizontalLayout.addWidget(self.label)
+
+        self.combo_archive = QComboBox(Form)
+        self.combo_archive.setObjectName("combo_archive")
+        sizePolicy = QSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(
+            self.combo_archive.sizePolicy().hasHeightForWidth()
+        )
+        self.combo_archive.setSizePolicy(sizePolicy)
+
+        self.horizontalLayout.addWidget(self.combo_archive)
+
+        self.button_refresh = QPushButton(Form)
+        self.button_refresh.setObjectName("button_refresh")
+
+        self.horizontalLayout.addWidget(self.button_refresh)
+
+        self.verticalLayout.addLayout(self.horizontalLayout)
+
+        self.groupBox = QGroupBox(Form)
+        self.groupBox.setObjectName("groupBox")
+        self.horizontalLayout_2 = QHBoxLayout(self.groupBox)
+        self.horizontalLayout_2.setObjectName("horizontalLayout_2")
+        self.list_records = QListView(self.groupBox)
+        self.list_records.setObjectName("list_records")
+
+        self.horizontalLayout_2.addWidget(self.list_records)
+
+        self.verticalLayout.addWidget(self.groupBox)
+
+        self.label_detail = QLabel(Form)
+        self.label_detail.setObjectName("label_detail")
+        self.label_detail.setWordWrap(True)
+
+        self.verticalLayout.addWidget(self.label_detail)
+
+        self.retranslateUi(Form)
+
+        QMetaObject.connectSlotsByName(Form)
+
+    # setupUi
+
+    def retranslateUi(self, Form):
+        Form.setWindowTitle(QCoreApplication.translate("Form", "Form", None))
+        self.label.setText(QCoreApplication.translate("Form", "存档", None))
+        self.button_refresh.setText(
+            QCoreApplication.translate("Form", "刷新", None)
+        )
+        self.groupBox.setTitle(QCoreApplication.translate("Form", "Records", None))
+        self.label_detail.setText(QCoreApplication.translate("Form", "TextLabel", None))
+
+    # retranslateUi
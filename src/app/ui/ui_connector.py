@@ -1,6 +1,6 @@
 from PySide6.QtCore import (QCoreApplication, QMetaObject, QSize, Qt)
 from PySide6.QtWidgets import (QComboBox, QDialogButtonBox, QGridLayout, QHBoxLayout, QLabel,
-                               QLineEdit, QSizePolicy, QSpacerItem)
+                               QLineEdit, QPushButton, QSizePolicy, QSpacerItem)
 
 
 class Ui_Connector(object):
@@ -63,9 +63,24 @@ class Ui_Connector(object):
 
         self.gridLayout.addLayout(self.horizontalLayout, 0, 0, 1, 2)
 
-        self.horizontalSpacer = QSpacerItem(175, 20, QSizePolicy.Expanding, QSizePolicy.Minimum)
+        self.scan = QHBoxLayout()
+        self.scan.setObjectName(u"scan")
+        self.button_scan = QPushButton(Dialog)
+        self.button_scan.setObjectName(u"button_scan")
+        self.button_scan.setAutoDefault(False)
 
-        self.gridLayout.addItem(self.horizontalSpacer, 1, 0, 1, 1)
+        self.scan.addWidget(self.button_scan)
+
+        self.label_scan = QLabel(Dialog)
+        self.label_scan.setObjectName(u"label_scan")
+
+        self.scan.addWidget(self.label_scan)
+
+        self.horizontalSpacer = QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum)
+
+        self.scan.addItem(self.horizontalSpacer)
+
+        self.gridLayout.addLayout(self.scan, 1, 0, 1, 1)
 
         self.buttonBox = QDialogButtonBox(Dialog)
         self.buttonBox.setObjectName(u"buttonBox")
@@ -91,4 +106,6 @@ class Ui_Connector(object):
 
         self.label_2.setText(QCoreApplication.translate("Dialog", u"Port:", None))
         self.port_editor.setText(QCoreApplication.translate("Dialog", u"5555", None))
+        self.button_scan.setText(QCoreApplication.translate("Dialog", u"Scan", None))
+        self.label_scan.setText("")
     # retranslateUi
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+################################################################################
+## Form generated from reading UI file 'device_grid.ui'
+##
+## Created by: Qt User Interface Compiler version 6.5.3
+##
+## WARNING! All changes made in this file will be lost when recompiling UI file!
+################################################################################
+
+from PySide6.QtCore import QCoreApplication, QMetaObject
+from PySide6.QtWidgets import (
+    QComboBox,
+    QGridLayout,
+    QHBoxLayout,
+    QLabel,
+    QSizePolicy,
+    QSpacerItem,
+    QVBoxLayout,
+    QWidget,
+)
+
+
+class Ui_DeviceGrid(object):
+    def setupUi(self, Form):
+        if not Form.objectName():
+            Form.setObjectName("Form")
+        Form.resize(1280, 800)
+        self.verticalLayout = QVBoxLayout(Form)
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.horizontalLayout = QHBoxLayout()
+        self.horizontalLayout.setObjectName("horizontalLayout")
+        self.label = QLabel(Form)
+        self.label.setObjectName("label")
+
+        self.horizontalLayout.addWidget(self.label)
+
+        self.label_focused = QLabel(Form)
+        self.label_focused.setObjectName("label_focused")
+
+        self.horizontalLayout.addWidget(self.label_focused)
+
+        self.horizontalSpacer = QSpacerItem(
+            40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum
+        )
+
+        self.horizontalLayout.addItem(self.horizontalSpacer)
+
+        self.label_2 = QLabel(Form)
+        self.label_2.setObjectName("label_2")
+
+        self.horizontalLayout.addWidget(self.label_2)
+
+        self.combo_background = QComboBox(Form)
+        self.combo_background.addItem("")
+        self.combo_background.addItem("")
+        self.combo_background.addItem("")
+        self.combo_background.setObjectName("combo_background")
+
+        self.horizontalLayout.addWidget(self.combo_background)
+
+        self.verticalLayout.addLayout(self.horizontalLayout)
+
+        self.widget_grid = QWidget(Form)
+        self.widget_grid.setObjectName("widget_grid")
+        sizePolicy = QSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.widget_grid.sizePolicy().hasHeightForWidth())
+        self.widget_grid.setSizePolicy(sizePolicy)
+        self.grid_devices = QGridLayout(self.widget_grid)
+        self.grid_devices.setObjectName("grid_devices")
+
+        self.verticalLayout.addWidget(self.widget_grid)
+
+        self.retranslateUi(Form)
+
+        QMetaObject.connectSlotsByName(Form)
+
+    # setupUi
+
+    def retranslateUi(self, Form):
+        Form.setWindowTitle(QCoreApplication.translate("Form", "Device Grid", None))
+        self.label.setText(QCoreApplication.translate("Form", "当前设备", None))
+        self.label_focused.setText(QCoreApplication.translate("Form", "-", None))
+        self.label_2.setText(QCoreApplication.translate("Form", "后台解码", None))
+        self.combo_background.setItemText(
+            0, QCoreApplication.translate("Form", "reduced", None)
+        )
+        self.combo_background.setItemText(
+            1, QCoreApplication.translate("Form", "keyframes", None)
+        )
+        self.combo_background.setItemText(
+            2, QCoreApplication.translate("Form", "full", None)
+        )
+
+    # retranslateUi
@@ -9,7 +9,7 @@
 ################################################################################
 
 from PySide6.QtCore import QCoreApplication, QMetaObject
-from PySide6.QtWidgets import QGroupBox, QHBoxLayout, QTextBrowser
+from PySide6.QtWidgets import QAbstractItemView, QGroupBox, QHBoxLayout, QListView
 
 
 class Ui_Logger(object):
@@ -23,10 +23,13 @@ class Ui_Logger(object):
         self.groupBox.setObjectName("groupBox")
         self.horizontalLayout = QHBoxLayout(self.groupBox)
         self.horizontalLayout.setObjectName("horizontalLayout")
-        self.textBrowser = QTextBrowser(self.groupBox)
-        self.textBrowser.setObjectName("textBrowser")
+        self.list_logs = QListView(self.groupBox)
+        self.list_logs.setObjectName("list_logs")
+        self.list_logs.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.list_logs.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.list_logs.setUniformItemSizes(True)
 
-        self.horizontalLayout.addWidget(self.textBrowser)
+        self.horizontalLayout.addWidget(self.list_logs)
 
         self.horizontalLayout_2.addWidget(self.groupBox)
 
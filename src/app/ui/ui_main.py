@@ -232,12 +232,30 @@ class Ui_MainWindow(object):
 
         self.verticalLayout_5.addWidget(self.button_show_log)
 
+        self.button_browse_archive = QPushButton(self.groupBox_4)
+        self.button_browse_archive.setObjectName(u"button_browse_archive")
+        self.button_browse_archive.setMinimumSize(QSize(0, 40))
+
+        self.verticalLayout_5.addWidget(self.button_browse_archive)
+
         self.button_record_script = QPushButton(self.groupBox_4)
         self.button_record_script.setObjectName(u"button_record_script")
         self.button_record_script.setMinimumSize(QSize(0, 40))
 
         self.verticalLayout_5.addWidget(self.button_record_script)
 
+        self.button_replay_script = QPushButton(self.groupBox_4)
+        self.button_replay_script.setObjectName(u"button_replay_script")
+        self.button_replay_script.setMinimumSize(QSize(0, 40))
+
+        self.verticalLayout_5.addWidget(self.button_replay_script)
+
+        self.button_latency_probe = QPushButton(self.groupBox_4)
+        self.button_latency_probe.setObjectName(u"button_latency_probe")
+        self.button_latency_probe.setMinimumSize(QSize(0, 40))
+
+        self.verticalLayout_5.addWidget(self.button_latency_probe)
+
         self.verticalSpacer = QSpacerItem(20, 40, QSizePolicy.Minimum, QSizePolicy.Expanding)
 
         self.verticalLayout_5.addItem(self.verticalSpacer)
@@ -278,5 +296,8 @@ class Ui_MainWindow(object):
         self.button_record_click.setText(QCoreApplication.translate("MainWindow", u"Record Mouse Click", None))
         self.button_take_region.setText(QCoreApplication.translate("MainWindow", u"Take Region", None))
         self.button_show_log.setText(QCoreApplication.translate("MainWindow", u"Show Log", None))
+        self.button_browse_archive.setText(QCoreApplication.translate("MainWindow", u"Browse Archive", None))
         self.button_record_script.setText(QCoreApplication.translate("MainWindow", u"Record Script", None))
+        self.button_replay_script.setText(QCoreApplication.translate("MainWindow", u"Replay Script", None))
+        self.button_latency_probe.setText(QCoreApplication.translate("MainWindow", u"Latency Probe", None))
     # retranslateUi
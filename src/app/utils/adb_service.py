@@ -0,0 +1,262 @@
+import contextlib
+import dataclasses
+import hashlib
+import os
+import queue
+import re
+import shlex
+import threading
+import uuid
+from typing import Iterator, Optional
+
+import adbutils
+from adbutils import AdbConnection, AdbDevice, adb
+
+
+@dataclasses.dataclass
+class CommandResult:
+    output: str  # stdout and stderr
+    exit_code: int
+
+    @property
+    def ok(self) -> bool:
+        return self.exit_code == 0
+
+
+class PersistentShell:
+    """
+    One `sh` kept open on the device, commands are written to its stdin and
+    their output is read back up to a marker carrying the exit code, so a
+    query costs one round trip instead of a new adb transport connection.
+    """
+
+    def __init__(self, device: AdbDevice, timeout: float = 10.0):
+        """
+        Args:
+            device: adb device
+            timeout: max seconds waiting for the output of a batch
+        """
+        self.device = device
+        self.timeout = timeout
+        self.stream: Optional[AdbConnection] = None
+        self.buffer = b""
+        self.lock = threading.Lock()
+
+    def open(self) -> None:
+        self.stream = self.device.shell("sh", stream=True)
+        self.stream.conn.settimeout(self.timeout)
+        self.buffer = b""
+
+    def close(self) -> None:
+        stream, self.stream = self.stream, None
+        if stream is not None:
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+    def run(self, command: str) -> CommandResult:
+        return self.run_batch([command])[0]
+
+    def run_batch(self, commands: list[str]) -> list[CommandResult]:
+        """
+        Send all the commands at once and read their results. A shell found
+        broken while sending is reopened and the batch sent once more, after
+        the send the commands may have run and are never sent again.
+
+        Args:
+            commands: shell command lines, run one after another
+
+        Raises:
+            TimeoutError: no result within timeout, the commands may have run
+            ConnectionError, OSError: the shell broke after the send
+        """
+        if not commands:
+            return []
+        token = uuid.uuid4().hex
+        # stdin is the script itself, a command reading it would eat the next ones
+        script = "".join(
+            f"{{ {command}\n}} </dev/null 2>&1; printf '\\n{token} %d\\n' $?\n"
+            for command in commands
+        ).encode("utf-8")
+        with self.lock:
+            for attempt in range(2):
+                if self.stream is None:
+                    self.open()
+                try:
+                    self.stream.conn.sendall(script)
+                    break
+                except OSError:
+                    self.close()
+                    if attempt:
+                        raise
+            try:
+                return self.read_results(token, len(commands))
+            except TimeoutError as e:
+                self.close()
+                raise TimeoutError(
+                    f"No result from {self.device.serial} in {self.timeout}s"
+                ) from e
+            except (OSError, ConnectionError):
+                self.close()
+                raise
+
+    def read_results(self, token: str, count: int) -> list[CommandResult]:
+        marker = re.compile(rb"\n" + token.encode() + rb" (\d+)\n")
+        results = []
+        while len(results) < count:
+            match = marker.search(self.buffer)
+            if match is None:
+                chunk = self.stream.conn.recv(65536)
+                if not chunk:
+                    raise ConnectionError("adb shell closed")
+                self.buffer += chunk
+                continue
+            results.append(
+                CommandResult(
+                    self.buffer[: match.start()].decode("utf-8", "replace"),
+                    int(match.group(1)),
+                )
+            )
+            self.buffer = self.buffer[match.end() :]
+        return results
+
+
+class ShellPool:
+    """
+    At most `size` shells of a device, reused across the callers
+    """
+
+    def __init__(self, device: AdbDevice, size: int = 2, timeout: float = 10.0):
+        self.device = device
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(size)
+        self.idle: queue.LifoQueue = queue.LifoQueue()
+
+    @contextlib.contextmanager
+    def acquire(self, timeout: Optional[float] = None) -> Iterator[PersistentShell]:
+        if not self.slots.acquire(timeout=self.timeout if timeout is None else timeout):
+            raise TimeoutError(f"No free shell on {self.device.serial}")
+        try:
+            try:
+                shell = self.idle.get_nowait()
+            except queue.Empty:
+                shell = PersistentShell(self.device, self.timeout)
+            try:
+                yield shell
+            finally:
+                self.idle.put(shell)
+        finally:
+            self.slots.release()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class AdbService:
+    """
+    Auxiliary adb operations of the app and the scripts: quick queries on
+    pooled persistent shells, pushes skipped when the device has the file
+    already, adb connect with its failures reported as False.
+    """
+
+    instance = None
+
+    def __init__(self, shells_per_device: int = 2, timeout: float = 10.0):
+        """
+        Args:
+            shells_per_device: shells kept open per device at most
+            timeout: seconds to wait for a shell or a command
+        """
+        self.shells_per_device = shells_per_device
+        self.timeout = timeout
+        self.pools: dict[str, ShellPool] = {}
+        self.lock = threading.Lock()
+        # local path -> (mtime, size, md5)
+        self.digests: dict[str, tuple[float, int, str]] = {}
+
+    @classmethod
+    def get_service(cls) -> "AdbService":
+        if not cls.instance:
+            cls.instance = AdbService()
+        return cls.instance
+
+    def pool(self, serial: str) -> ShellPool:
+        with self.lock:
+            pool = self.pools.get(serial)
+            if pool is None:
+                pool = self.pools[serial] = ShellPool(
+                    adb.device(serial=serial), self.shells_per_device, self.timeout
+                )
+            return pool
+
+    def batch(self, serial: str, commands: list[str]) -> list[CommandResult]:
+        """
+        Run several commands in one round trip on a pooled shell
+        """
+        with self.pool(serial).acquire() as shell:
+            return shell.run_batch(commands)
+
+    def shell(self, serial: str, command: str) -> str:
+        return self.batch(serial, [command])[0].output
+
+    def getprop(self, serial: str, *names: str) -> dict[str, str]:
+        """
+        Returns:
+            {name: value} of the given properties, all the properties without names
+        """
+        if names:
+            results = self.batch(serial, [f"getprop {shlex.quote(_)}" for _ in names])
+            return {name: result.output.strip() for name, result in zip(names, results)}
+        return dict(re.findall(r"^\[([^\]]+)\]: \[(.*)\]$", self.shell(serial, "getprop"), re.M))
+
+    def md5(self, path: str) -> str:
+        stat = os.stat(path)
+        cached = self.digests.get(path)
+        if cached is not None and cached[:2] == (stat.st_mtime, stat.st_size):
+            return cached[2]
+        with open(path, "rb") as f:
+            digest = hashlib.md5(f.read()).hexdigest()
+        self.digests[path] = (stat.st_mtime, stat.st_size, digest)
+        return digest
+
+    def push(self, serial: str, local: str, remote: str) -> bool:
+        """
+        Push a file unless the device has the same one already
+
+        Returns:
+            False if the push was skipped
+        """
+        digest = self.md5(local)
+        try:
+            output = self.shell(serial, f"md5sum {shlex.quote(remote)}")
+        except (OSError, ConnectionError, TimeoutError, adbutils.AdbError):
+            output = ""
+        if output.split(" ", 1)[0].strip() == digest:
+            return False
+        adb.device(serial=serial).sync.push(local, remote)
+        return True
+
+    def connect(self, address: str, timeout: float = 3.0) -> bool:
+        try:
+            msg = adb.connect(address, timeout=timeout)
+        except (adbutils.AdbError, adbutils.AdbTimeout, OSError):
+            return False
+        return "unable" not in msg and "failed" not in msg
+
+    def close(self, serial: Optional[str] = None) -> None:
+        """
+        Close the shells of a device, of all the devices without serial
+        """
+        with self.lock:
+            if serial is None:
+                pools, self.pools = list(self.pools.values()), {}
+            else:
+                pool = self.pools.pop(serial, None)
+                pools = [pool] if pool is not None else []
+        for pool in pools:
+            pool.close()
@@ -0,0 +1,257 @@
+import dataclasses
+import datetime
+import os
+import zipfile
+from typing import List, Optional
+
+from PySide6 import QtCore
+from PySide6.QtCore import QObject
+
+from ..logger import Logger
+
+TIME_INDICATOR_PREFIX = "TIME_INDICATOR~"
+PENDING_PREFIX = ".pending~"
+BROKEN_SUFFIX = ".broken~"
+ARCHIVE_BATCH_SIZE = 64  # files written between two closes of the archive
+
+
+@dataclasses.dataclass
+class ArchiveOptions:
+    """
+    Compression used when moving leftover session files into a zip archive
+
+    Args:
+        compression: zipfile.ZIP_STORED | zipfile.ZIP_DEFLATED
+        compress_level: 0 ~ 9, only used by ZIP_DEFLATED, None means zlib default
+    """
+
+    compression: int = zipfile.ZIP_STORED
+    compress_level: Optional[int] = None
+
+    @classmethod
+    def store(cls):
+        return cls(zipfile.ZIP_STORED)
+
+    @classmethod
+    def deflate(cls, level: Optional[int] = 6):
+        return cls(zipfile.ZIP_DEFLATED, level)
+
+
+@dataclasses.dataclass
+class ArchiveTask:
+    pending_dir: str  # files waiting to be archived
+    archive_path: str
+
+
+class ArchiveWorker(QObject):
+    onProgress = QtCore.Signal(str, int, int)  # archive name, done, total
+    onArchived = QtCore.Signal(str, int)  # archive name, file count
+    onTaskAdded = QtCore.Signal(object)
+
+    def __init__(self, options: ArchiveOptions):
+        super().__init__()
+        self.logger = Logger.get_logger()
+        self.options = options
+        self.onTaskAdded.connect(self.process)
+
+    def process(self, task: ArchiveTask) -> None:
+        archive_name = os.path.basename(task.archive_path)
+        files = sorted(os.listdir(task.pending_dir))
+        total = len(files)
+        done = 0
+        while done < total:
+            if self.thread().isInterruptionRequested():
+                # the rest will be resumed on next launch
+                return
+            batch = files[done : done + ARCHIVE_BATCH_SIZE]
+            try:
+                written = self.append(task, batch)
+            except zipfile.BadZipFile:
+                # an archive broken by an interrupted run can not be appended
+                # to, its files already left the pending dir so keep it aside
+                # and write the remaining ones into a new one
+                broken_path = self.move_aside(task.archive_path)
+                self.logger.warn(
+                    msg=f"Broken archive moved to {os.path.basename(broken_path)}, "
+                    f"rebuilding {archive_name}",
+                    sender=self,
+                )
+                continue
+            # the files are only removed once the archive is closed, i.e. its
+            # central directory is written and they can be read back
+            for name in written:
+                os.remove(os.path.join(task.pending_dir, name))
+            done += len(written)
+            self.onProgress.emit(archive_name, done, total)
+        os.rmdir(task.pending_dir)
+        self.onArchived.emit(archive_name, total)
+
+    def append(self, task: ArchiveTask, names: List[str]) -> List[str]:
+        """
+        Add a batch of pending files to the archive
+
+        Args:
+            task: archive task the files belong to
+            names: file names inside ``task.pending_dir``
+
+        Returns:
+            names stored in the archive when it was closed, shorter than
+            ``names`` if interrupted
+        """
+        if os.path.exists(task.archive_path) and not zipfile.is_zipfile(
+            task.archive_path
+        ):
+            # append mode would silently write a new archive after the bytes
+            # left by a crash, hiding what they contain
+            raise zipfile.BadZipFile(f"{task.archive_path} has no central directory")
+        written = []
+        # append mode creates the archive if needed and keeps the files written
+        # by an interrupted run, so only the remaining ones are added
+        with zipfile.ZipFile(
+            task.archive_path,
+            "a",
+            compression=self.options.compression,
+            compresslevel=self.options.compress_level,
+        ) as zip_file:
+            archived = set(zip_file.namelist())
+            for name in names:
+                if written and self.thread().isInterruptionRequested():
+                    break
+                if name not in archived:
+                    zip_file.write(os.path.join(task.pending_dir, name), name)
+                written.append(name)
+        return written
+
+    @staticmethod
+    def move_aside(archive_path: str) -> str:
+        indicator = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        broken_path = f"{archive_path}{BROKEN_SUFFIX}{indicator}"
+        os.replace(archive_path, broken_path)
+        return broken_path
+
+
+class Archiver(QObject):
+    """
+    Move the files left by the last session into ``<prefix>_<time>.zip`` on a worker thread
+    """
+
+    instance = None
+    onProgress = QtCore.Signal(str, int, int)
+    onArchived = QtCore.Signal(str, int)
+
+    def __init__(self, options: Optional[ArchiveOptions] = None):
+        super().__init__()
+        self.logger = Logger.get_logger()
+        self.worker = ArchiveWorker(options or ArchiveOptions())
+        self.work_thread = QtCore.QThread()
+        self.worker.moveToThread(self.work_thread)
+
+        self.worker.onProgress.connect(self.onProgress)
+        self.worker.onArchived.connect(self.onArchived)
+        self.worker.onArchived.connect(self.on_archived)
+        self.work_thread.start()
+
+    @classmethod
+    def get_archiver(cls, options: Optional[ArchiveOptions] = None):
+        if not cls.instance:
+            cls.instance = Archiver(options)
+        return cls.instance
+
+    @property
+    def options(self) -> ArchiveOptions:
+        return self.worker.options
+
+    @options.setter
+    def options(self, options: ArchiveOptions):
+        self.worker.options = options
+
+    def make_archive(self, directory: str, prefix: str) -> Optional[str]:
+        """
+        Collect leftover files of ``directory`` and archive them in background,
+        a new time indicator is written for the current session afterwards
+
+        Args:
+            directory: session directory, e.g. regions, mouse_records
+            prefix: archive name prefix
+
+        Returns:
+            archive name, None if nothing to archive
+        """
+        archive_name = None
+        if os.path.exists(directory):
+            # default time indicator
+            time_indicator = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S.%f")[
+                :-3
+            ]
+            time_indicator_file = None
+            files_to_zip = []
+            for _ in os.listdir(directory):
+                if _.startswith(TIME_INDICATOR_PREFIX):
+                    time_indicator = _.split("~")[-1]  # get the latest time indicator
+                    time_indicator_file = _
+                elif _.startswith(PENDING_PREFIX):
+                    self.resume(directory, _)
+                elif (
+                    not _.endswith(".zip")
+                    and BROKEN_SUFFIX not in _
+                    and os.path.isfile(os.path.join(directory, _))
+                ):
+                    files_to_zip.append(_)
+
+            if time_indicator_file is not None:
+                os.remove(os.path.join(directory, time_indicator_file))
+
+            if files_to_zip:
+                archive_name = f"{prefix}_{time_indicator}.zip"
+                self.logger.info(
+                    msg=f"Making archive in background: {archive_name=} ({len(files_to_zip)} files)",
+                    sender=self,
+                )
+                # move the files out of the way, so the new session can not
+                # write into a file which is being archived
+                pending_dir = os.path.join(directory, PENDING_PREFIX + archive_name)
+                os.makedirs(pending_dir, exist_ok=True)
+                for _ in files_to_zip:
+                    os.replace(os.path.join(directory, _), os.path.join(pending_dir, _))
+                self.worker.onTaskAdded.emit(
+                    ArchiveTask(pending_dir, os.path.join(directory, archive_name))
+                )
+        else:
+            self.logger.info(msg=f"Creating {directory} directory", sender=self)
+
+        self.dump_time_indicator(directory)
+        return archive_name
+
+    def resume(self, directory: str, pending_name: str) -> None:
+        """
+        Continue an archive task which was interrupted by closing the application
+        """
+        archive_name = pending_name[len(PENDING_PREFIX) :]
+        self.logger.info(msg=f"Resuming archive: {archive_name=}", sender=self)
+        self.worker.onTaskAdded.emit(
+            ArchiveTask(
+                os.path.join(directory, pending_name),
+                os.path.join(directory, archive_name),
+            )
+        )
+
+    @staticmethod
+    def dump_time_indicator(directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        indicator = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S.%f")[:-3]
+        with open(
+            os.path.join(directory, f"{TIME_INDICATOR_PREFIX}{indicator}"),
+            "w",
+            encoding="utf-8",
+        ) as f:
+            f.write(f"{TIME_INDICATOR_PREFIX}{indicator}\n")
+
+    def on_archived(self, archive_name: str, count: int):
+        self.logger.success(
+            msg=f"Archive made: {archive_name=} ({count} files)", sender=self
+        )
+
+    def stop(self):
+        self.work_thread.requestInterruption()
+        self.work_thread.quit()
+        self.work_thread.wait()
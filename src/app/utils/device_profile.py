@@ -0,0 +1,171 @@
+import dataclasses
+import json
+import os
+import re
+import threading
+import time
+from typing import Optional
+
+PROFILE_DIR = os.path.join("cache", "profiles")
+
+# printed by scrcpy-server when the requested encoder does not exist
+ENCODER_PATTERN = re.compile(r"--encoder(?:-name)?[ =]'([^']+)'")
+WM_SIZE_PATTERN = re.compile(r"(Physical|Override) size:\s*(\d+)x(\d+)")
+
+
+@dataclasses.dataclass
+class DeviceProfile:
+    """
+    What a previous session learnt about a device
+
+    Args:
+        serial: device serial
+        device_name: name sent by the server in the handshake
+        resolution: native screen size (w, h) reported by wm size, in the
+            natural orientation of the display
+        frame_size: size of the last frames sent by the server, in the
+            orientation the device had then
+        frame_max_width: max_width of the session frame_size comes from
+        encoders: h264 encoders listed by the server, None until queried
+        failed_encoders: encoders the server could not start with
+        encoder_name: encoder of the last session that streamed frames
+        bitrate: bitrate of the last session that streamed frames
+        max_fps: max fps of the last session that streamed frames
+        decode_ms: mean client decode time of a frame (ms)
+        updated_at: unix time of the last update
+    """
+
+    serial: str
+    device_name: Optional[str] = None
+    resolution: Optional[tuple[int, int]] = None
+    frame_size: Optional[tuple[int, int]] = None
+    frame_max_width: int = 0
+    encoders: Optional[list[str]] = None
+    failed_encoders: list[str] = dataclasses.field(default_factory=list)
+    encoder_name: Optional[str] = None
+    bitrate: Optional[int] = None
+    max_fps: Optional[int] = None
+    decode_ms: Optional[float] = None
+    updated_at: float = 0.0
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DeviceProfile":
+        fields = {_.name for _ in dataclasses.fields(cls)}
+        profile = cls(**{k: v for k, v in data.items() if k in fields})
+        if profile.resolution is not None:
+            profile.resolution = tuple(profile.resolution)
+        if profile.frame_size is not None:
+            profile.frame_size = tuple(profile.frame_size)
+        return profile
+
+    def to_dict(self) -> dict:
+        return dataclasses.asdict(self)
+
+    def usable_encoders(self) -> list[str]:
+        return [_ for _ in self.encoders or [] if _ not in self.failed_encoders]
+
+    def accepts_encoder(self, encoder_name: Optional[str]) -> bool:
+        """
+        False if the encoder is known to fail or missing from the queried list
+        """
+        if encoder_name is None:
+            return True
+        if encoder_name in self.failed_encoders:
+            return False
+        # nothing parsed from the server output, the list is unknown
+        return not self.encoders or encoder_name in self.encoders
+
+    def stream_size(self, max_width: int = 0) -> Optional[tuple[int, int]]:
+        """
+        Frame size the server will send: the last one seen with the same
+        max_width, otherwise computed like scrcpy-server does from the native
+        size, both sides rounded down to a multiple of 8, the long side limited
+        to max_width and the short one rounded to the nearest multiple of 8.
+        The orientation is the one of the last frames, wm size only knows the
+        natural one.
+
+        Args:
+            max_width: max_width given to the server, 0 for the native size
+        """
+        if self.frame_size is not None and self.frame_max_width == max_width:
+            return self.frame_size
+        if self.resolution is None:
+            return None
+        width, height = self.resolution[0] & ~7, self.resolution[1] & ~7
+        if self.frame_size is not None:
+            portrait = self.frame_size[1] > self.frame_size[0]
+        else:
+            portrait = height > width
+        major, minor = (height, width) if portrait else (width, height)
+        if 0 < max_width < major:
+            minor = (minor * max_width // major + 4) & ~7
+            major = max_width
+        return (minor, major) if portrait else (major, minor)
+
+
+def parse_encoders(output: str) -> list[str]:
+    return list(dict.fromkeys(ENCODER_PATTERN.findall(output)))
+
+
+def parse_wm_size(output: str) -> Optional[tuple[int, int]]:
+    """
+    Returns:
+        the physical size, the override size is what is displayed but the
+        server captures the physical display
+    """
+    sizes = {kind: (int(w), int(h)) for kind, w, h in WM_SIZE_PATTERN.findall(output)}
+    return sizes.get("Physical") or sizes.get("Override")
+
+
+class ProfileStore:
+    """
+    Device profiles kept as one json file per serial
+    """
+
+    instance = None
+
+    def __init__(self, directory: str = PROFILE_DIR):
+        self.directory = directory
+        self.profiles: dict[str, DeviceProfile] = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def get_store(cls) -> "ProfileStore":
+        if not cls.instance:
+            cls.instance = ProfileStore()
+        return cls.instance
+
+    def path(self, serial: str) -> str:
+        # serials of network devices contain ':'
+        return os.path.join(self.directory, re.sub(r"[^\w.-]", "_", serial) + ".json")
+
+    def get(self, serial: str) -> DeviceProfile:
+        """
+        Returns:
+            the cached profile, an empty one for an unknown device
+        """
+        with self.lock:
+            profile = self.profiles.get(serial)
+            if profile is None:
+                profile = self.profiles[serial] = self.load(serial)
+            return profile
+
+    def load(self, serial: str) -> DeviceProfile:
+        try:
+            with open(self.path(serial), "r", encoding="utf-8") as f:
+                profile = DeviceProfile.from_dict(json.load(f))
+        except (OSError, ValueError, TypeError):
+            return DeviceProfile(serial)
+        profile.serial = serial
+        return profile
+
+    def save(self, profile: DeviceProfile) -> None:
+        profile.updated_at = time.time()
+        with self.lock:
+            self.profiles[profile.serial] = profile
+            os.makedirs(self.directory, exist_ok=True)
+            path = self.path(profile.serial)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(profile.to_dict(), f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, path)
@@ -0,0 +1,165 @@
+import os
+import socket
+import threading
+from typing import Optional
+
+from adbutils import adb
+from PySide6 import QtCore
+from PySide6.QtCore import QObject
+
+STATE_DEVICE = "device"
+
+
+class DeviceWatcher(QObject):
+    """
+    Keep a table of the adb devices up to date from the adb server's
+    host:track-devices stream on a background thread.
+
+    The server sends the whole device list once subscribed and again on every
+    change, the changes are computed against the table and emitted as signals
+    (queued to the GUI thread).
+    """
+
+    instance = None
+
+    onDeviceAdded = QtCore.Signal(str, str)  # serial, state
+    onDeviceRemoved = QtCore.Signal(str)  # serial
+    onDeviceStateChanged = QtCore.Signal(str, str)  # serial, state
+    onDevicesChanged = QtCore.Signal(object)  # {serial: state}
+
+    def __init__(self, host: str = "127.0.0.1", port: Optional[int] = None):
+        """
+        Args:
+            host: adb server host
+            port: adb server port, ANDROID_ADB_SERVER_PORT or 5037 by default
+        """
+        super().__init__()
+        self.host = host
+        self.port = port or int(os.environ.get("ANDROID_ADB_SERVER_PORT", 5037))
+        self.table: dict[str, str] = {}
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.stop_event = threading.Event()
+        self.connection: Optional[socket.socket] = None
+        self.thread: Optional[threading.Thread] = None
+        self.retry_interval = 1.0
+
+    @classmethod
+    def get_watcher(cls) -> "DeviceWatcher":
+        if not cls.instance:
+            cls.instance = DeviceWatcher()
+            cls.instance.start()
+        return cls.instance
+
+    def start(self) -> None:
+        if self.thread is not None:
+            return
+        self.thread = threading.Thread(
+            target=self.run, name="DeviceWatcher", daemon=True
+        )
+        self.thread.start()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the first device list
+
+        Returns:
+            False if the adb server did not answer in time
+        """
+        return self.ready.wait(timeout)
+
+    def devices(self, state: Optional[str] = STATE_DEVICE) -> list[str]:
+        """
+        Args:
+            state: only the devices in this state, None for all
+
+        Returns:
+            serials, sorted
+        """
+        with self.lock:
+            return sorted(
+                serial
+                for serial, device_state in self.table.items()
+                if state is None or device_state == state
+            )
+
+    def run(self) -> None:
+        while not self.stop_event.is_set():
+            try:
+                self.track()
+            except ConnectionRefusedError:
+                self.start_server()
+            except (OSError, ValueError):
+                pass
+            # server not started or restarted, the devices are unknown until reconnected
+            self.update({})
+            if self.stop_event.wait(self.retry_interval):
+                break
+
+    @staticmethod
+    def start_server() -> None:
+        """
+        adbutils starts the adb server when it is not reachable
+        """
+        try:
+            adb.server_version()
+        except Exception:
+            pass
+
+    def track(self) -> None:
+        with socket.create_connection((self.host, self.port), timeout=3) as s:
+            self.connection = s
+            try:
+                request = b"host:track-devices"
+                s.sendall(b"%04x%s" % (len(request), request))
+                if self.read_exactly(s, 4) != b"OKAY":
+                    raise ConnectionError("adb server refused track-devices")
+                # the stream is idle until something changes
+                s.settimeout(None)
+                while not self.stop_event.is_set():
+                    length = int(self.read_exactly(s, 4), 16)
+                    payload = self.read_exactly(s, length).decode("utf-8", "replace")
+                    table = {}
+                    for line in payload.splitlines():
+                        if "\t" in line:
+                            serial, state = line.split("\t", 1)
+                            table[serial] = state.strip()
+                    self.update(table, connected=True)
+            finally:
+                self.connection = None
+
+    @staticmethod
+    def read_exactly(s: socket.socket, length: int) -> bytes:
+        data = b""
+        while len(data) < length:
+            chunk = s.recv(length - len(data))
+            if not chunk:
+                raise ConnectionError("adb server closed the connection")
+            data += chunk
+        return data
+
+    def update(self, table: dict[str, str], connected: bool = False) -> None:
+        with self.lock:
+            old, self.table = self.table, table
+        changed = old != table
+        for serial in old.keys() - table.keys():
+            self.onDeviceRemoved.emit(serial)
+        for serial, state in table.items():
+            if serial not in old:
+                self.onDeviceAdded.emit(serial, state)
+            elif old[serial] != state:
+                self.onDeviceStateChanged.emit(serial, state)
+        if changed:
+            self.onDevicesChanged.emit(dict(table))
+        if connected:
+            self.ready.set()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        connection = self.connection
+        if connection is not None:
+            try:
+                # wake up the blocked recv
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
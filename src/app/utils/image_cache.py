@@ -0,0 +1,29 @@
+import collections
+from typing import Optional
+
+from PySide6.QtGui import QPixmap
+
+
+class ImageCache:
+    """
+    A small LRU cache of decoded images
+    """
+
+    def __init__(self, capacity: int = 128):
+        self.capacity = capacity
+        self.items: collections.OrderedDict = collections.OrderedDict()
+
+    def get(self, key) -> Optional[QPixmap]:
+        pix = self.items.get(key)
+        if pix is not None:
+            self.items.move_to_end(key)
+        return pix
+
+    def put(self, key, pix: QPixmap) -> None:
+        self.items[key] = pix
+        self.items.move_to_end(key)
+        while len(self.items) > self.capacity:
+            self.items.popitem(last=False)
+
+    def clear(self):
+        self.items.clear()
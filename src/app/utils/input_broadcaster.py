@@ -0,0 +1,149 @@
+import functools
+import threading
+import time
+from typing import Callable, Optional
+
+from PySide6 import QtCore
+from PySide6.QtCore import QObject
+
+from src.scrcpy import const, encoder
+from src.scrcpy.control import ControlSender
+
+
+class InputBroadcaster(QObject):
+    """
+    Fan out the input sent to one device to a group of other devices.
+
+    Every package sent by the source ControlSender (mouse, key, wheel, gestures)
+    is rescaled to the screen size of each target and queued on the target's
+    own control writer, so a slow device never delays the others. The write
+    time on the source and every target is collected to report the send skew.
+    """
+
+    onSkewReport = QtCore.Signal(object)  # dict, see stats
+    max_pending = 1024
+    source_name = "source"  # key of the source in the write times
+
+    def __init__(self, source: ControlSender):
+        """
+        Args:
+            source: control sender of the main device
+        """
+        super().__init__()
+        self.source = source
+        self.targets: dict = {}  # name -> QScrcpyClient
+        self.lock = threading.Lock()
+        self.event_id = 0
+        # event id -> [dispatched at, expected writes, {name: sent at}, report]
+        self.pending: dict[int, list] = {}
+        self.reset_stats()
+        self.source.add_listener(self.on_package)
+
+    def add_target(self, name: str, client) -> None:
+        """
+        Args:
+            name: device serial
+            client: QScrcpyClient, started with async_control
+        """
+        self.targets[name] = client
+
+    def remove_target(self, name: str) -> None:
+        self.targets.pop(name, None)
+
+    def close(self) -> None:
+        self.source.remove_listener(self.on_package)
+        self.targets.clear()
+
+    def on_package(self, package: bytes) -> Optional[Callable[[int], None]]:
+        """
+        ControlSender listener, called before the source sends the package
+
+        Returns:
+            callback timing the write on the source
+        """
+        targets = [
+            (name, client)
+            for name, client in list(self.targets.items())
+            if client.alive and client.resolution is not None
+        ]
+        if not targets:
+            return None
+        messages = encoder.split_messages(package)
+        report = any(
+            message[0] == const.TYPE_INJECT_TOUCH_EVENT
+            and message[1] == const.ACTION_UP
+            for message in messages
+        )
+        with self.lock:
+            self.event_id += 1
+            event_id = self.event_id
+            if len(self.pending) >= self.max_pending:
+                # a target went away without writing, forget the oldest
+                self.pending.pop(next(iter(self.pending)))
+            self.pending[event_id] = [
+                time.perf_counter_ns(),
+                len(targets) + 1,
+                {},
+                report,
+            ]
+        for name, client in targets:
+            width, height = client.resolution
+            client.control.send(
+                b"".join(encoder.rescale(_, width, height) for _ in messages),
+                functools.partial(self.on_sent, event_id, name),
+            )
+        return functools.partial(self.on_sent, event_id, self.source_name)
+
+    def on_sent(self, event_id: int, name: str, sent_at: int) -> None:
+        """
+        Called on the writer thread of the source and of each target
+        """
+        with self.lock:
+            event = self.pending.get(event_id)
+            if event is None:
+                return
+            dispatched_at, expected, sent, report = event
+            sent[name] = sent_at
+            if len(sent) < expected:
+                return
+            del self.pending[event_id]
+            skew = max(sent.values()) - min(sent.values())
+            self.events += 1
+            self.total_skew_ns += skew
+            self.max_skew_ns = max(self.max_skew_ns, skew)
+            for target, sent_at in sent.items():
+                self.total_lag_ns[target] = (
+                    self.total_lag_ns.get(target, 0) + sent_at - dispatched_at
+                )
+            if not report:
+                return
+            stats = self.stats_locked()
+            self.reset_stats()
+        self.onSkewReport.emit(stats)
+
+    def reset_stats(self) -> None:
+        self.events = 0
+        self.total_skew_ns = 0
+        self.max_skew_ns = 0
+        self.total_lag_ns: dict[str, int] = {}
+
+    def stats(self) -> dict:
+        with self.lock:
+            return self.stats_locked()
+
+    def stats_locked(self) -> dict:
+        """
+        Returns:
+            events, mean / max skew between the source and the targets (us),
+            mean lag from the input to the write of every device (us), the
+            source under ``source_name``
+        """
+        events = self.events
+        return {
+            "events": events,
+            "mean_skew_us": self.total_skew_ns / events / 1000 if events else 0.0,
+            "max_skew_us": self.max_skew_ns / 1000,
+            "mean_lag_us": {
+                name: lag / events / 1000 for name, lag in self.total_lag_ns.items()
+            },
+        }
@@ -0,0 +1,94 @@
+import time
+from typing import Optional
+
+from PySide6 import QtCore
+from PySide6.QtCore import QObject
+
+import src.scrcpy as scrcpy
+from src.scrcpy.control import ControlSender
+
+
+class TouchCoalescer(QObject):
+    """
+    Throttle touch MOVE events per touch id to one per window.
+
+    The first MOVE of a window is sent at once, the later ones only replace the
+    pending position, which is sent when the window ends. DOWN / UP and the
+    other packages are never delayed or dropped, pending MOVEs are flushed
+    before them so the order is kept.
+    """
+
+    onDragStats = QtCore.Signal(float, float)  # received, sent packets per second
+
+    def __init__(self, control: ControlSender, window_ms: int = 16):
+        """
+        Args:
+            control: control sender of the client
+            window_ms: coalescing window, 0 disables coalescing
+        """
+        super().__init__()
+        self.control = control
+        self.window_ms = window_ms
+        self.pending: dict[int, tuple[int, int]] = {}
+        self.timer = QtCore.QTimer()
+        self.timer.setTimerType(QtCore.Qt.TimerType.PreciseTimer)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.on_window_end)
+
+        # packets of the current drag
+        self.drag_started_at: Optional[float] = None
+        self.received = 0
+        self.sent = 0
+
+    def touch(
+        self, x: int, y: int, action: int = scrcpy.ACTION_DOWN, touch_id: int = -1
+    ) -> None:
+        """
+        Same as ControlSender.touch, MOVE events may be coalesced
+        """
+        self.received += 1
+        if action == scrcpy.ACTION_MOVE and self.window_ms > 0:
+            if self.timer.isActive():
+                self.pending[touch_id] = (x, y)
+                return
+            self.send(x, y, action, touch_id)
+            self.timer.start(self.window_ms)
+            return
+
+        self.flush()
+        if action == scrcpy.ACTION_DOWN:
+            self.drag_started_at = time.perf_counter()
+            self.received, self.sent = 1, 0
+        self.send(x, y, action, touch_id)
+        if action == scrcpy.ACTION_UP:
+            self.report_drag()
+
+    def send(self, x: int, y: int, action: int, touch_id: int) -> None:
+        self.sent += 1
+        self.control.touch(x, y, action, touch_id)
+
+    def on_window_end(self) -> None:
+        if self.pending:
+            self.flush_pending()
+            # keep throttling while the pointer moves
+            self.timer.start(self.window_ms)
+
+    def flush_pending(self) -> None:
+        pending, self.pending = self.pending, {}
+        for touch_id, (x, y) in pending.items():
+            self.send(x, y, scrcpy.ACTION_MOVE, touch_id)
+
+    def flush(self) -> None:
+        """
+        Send the pending MOVE events now
+        """
+        self.timer.stop()
+        self.flush_pending()
+
+    def report_drag(self) -> None:
+        if self.drag_started_at is None:
+            return
+        duration = time.perf_counter() - self.drag_started_at
+        self.drag_started_at = None
+        if duration > 0:
+            self.onDragStats.emit(self.received / duration, self.sent / duration)
@@ -0,0 +1,198 @@
+import functools
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import av
+from PIL import ImageChops, ImageStat
+from PySide6 import QtCore
+from PySide6.QtCore import QObject
+
+import src.scrcpy as scrcpy
+from src.scrcpy import encoder
+from .mouse_recorder import plane_region
+
+
+@dataclass
+class LatencyStats:
+    latencies_ms: list[float] = field(default_factory=list)
+    timeouts: int = 0
+
+    def percentile(self, p: float) -> float:
+        values = sorted(self.latencies_ms)
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, round(p / 100 * (len(values) - 1)))]
+
+    def summary(self) -> str:
+        if not self.latencies_ms:
+            return f"no change detected, {self.timeouts} timeouts"
+        return (
+            f"n={len(self.latencies_ms)} timeouts={self.timeouts} "
+            f"min={min(self.latencies_ms):.1f} "
+            f"p50={self.percentile(50):.1f} "
+            f"p90={self.percentile(90):.1f} "
+            f"p99={self.percentile(99):.1f} "
+            f"max={max(self.latencies_ms):.1f} "
+            f"mean={statistics.fmean(self.latencies_ms):.1f}"
+            + (
+                f" stdev={statistics.stdev(self.latencies_ms):.1f}"
+                if len(self.latencies_ms) > 1
+                else ""
+            )
+            + " (ms)"
+        )
+
+
+class LatencyProbe(QObject):
+    """
+    Measure the input-to-photon latency: tap a point and wait for the first
+    decoded frame whose luma changes in a small region around it.
+
+    The latency includes the control socket, the device rendering, the
+    encoder, the transport and the decoder: a tap is timestamped once the
+    control writer has written it, the frames when they reach the GUI thread.
+    """
+
+    onTrial = QtCore.Signal(int, float)  # trial index, latency ms (-1 on timeout)
+    onFinished = QtCore.Signal(object)  # LatencyStats
+
+    def __init__(
+        self,
+        client,
+        point: tuple[int, int],
+        trials: int = 20,
+        radius: int = 8,
+        threshold: float = 8.0,
+        interval_ms: int = 1000,
+        timeout_ms: int = 2000,
+    ):
+        """
+        Args:
+            client: QScrcpyClient
+            point: tap position in device coordinates
+            trials: number of taps
+            radius: half size of the watched region
+            threshold: mean absolute luma difference counted as a change
+            interval_ms: pause between two trials, let the screen settle
+            timeout_ms: a trial without change fails after this time
+        """
+        super().__init__()
+        self.client = client
+        self.point = point
+        self.trials = trials
+        self.radius = radius
+        self.threshold = threshold
+        self.interval_ms = interval_ms
+        self.timeout_ms = timeout_ms
+
+        self.stats = LatencyStats()
+        self.trial = 0
+        self.baseline = None
+        self.latest = None
+        self.tapped = False  # a trial is waiting for a change
+        self.sent_at: Optional[float] = None  # set by the writer thread
+        self.running = False
+
+        self.timer = QtCore.QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.on_timer)
+
+    def start(self, frame: Optional[av.VideoFrame] = None) -> None:
+        """
+        Args:
+            frame: frame on screen now, the next frame may come only after a change
+        """
+        self.stats = LatencyStats()
+        self.trial = 0
+        self.baseline = None
+        self.latest = self.region(frame) if frame is not None else None
+        self.tapped = False
+        self.sent_at = None
+        self.running = True
+        self.client.add_listener(scrcpy.EVENT_FRAME, self.on_frame)
+        self.timer.start(self.interval_ms)
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self.running = False
+        self.timer.stop()
+        self.client.remove_listener(scrcpy.EVENT_FRAME, self.on_frame)
+        self.onFinished.emit(self.stats)
+
+    def region(self, frame: av.VideoFrame):
+        """
+        Luma of the watched region, mapped from device to frame coordinates
+        """
+        width, height = self.client.resolution or (frame.width, frame.height)
+        x = round(self.point[0] * frame.width / width)
+        y = round(self.point[1] * frame.height / height)
+        left = min(max(x - self.radius, 0), frame.width - 1)
+        top = min(max(y - self.radius, 0), frame.height - 1)
+        right = min(x + self.radius, frame.width)
+        bottom = min(y + self.radius, frame.height)
+        return plane_region(
+            frame.planes[0], left, top, max(right - left, 1), max(bottom - top, 1)
+        )
+
+    def on_frame(self, frame: av.VideoFrame) -> None:
+        now = time.perf_counter()
+        if not self.running or frame is None:
+            return
+        region = self.region(frame)
+        # frames only come when the screen changes, the latest one is the
+        # reference of the next tap
+        self.latest = region
+        sent_at = self.sent_at
+        if not self.tapped or sent_at is None:
+            return
+        if self.baseline.size != region.size:
+            # resized or rotated, compare with the new size from now on
+            self.baseline = region
+            return
+        (diff,) = ImageStat.Stat(ImageChops.difference(region, self.baseline)).mean
+        if diff >= self.threshold:
+            self.finish_trial((now - sent_at) * 1000)
+
+    def on_timer(self) -> None:
+        if not self.running:
+            return
+        if self.tapped:
+            self.stats.timeouts += 1
+            self.finish_trial(-1.0)
+            return
+        if self.latest is None or self.client.resolution is None:
+            # no frame received yet
+            self.timer.start(self.interval_ms)
+            return
+        self.baseline = self.latest
+        self.tapped = True
+        self.sent_at = None
+        width, height = self.client.resolution
+        self.client.control.send(
+            encoder.touch(*self.point, width, height, scrcpy.ACTION_DOWN)
+            + encoder.touch(*self.point, width, height, scrcpy.ACTION_UP),
+            functools.partial(self.on_sent, self.trial),
+        )
+        self.timer.start(self.timeout_ms)
+
+    def on_sent(self, trial: int, sent_at_ns: int) -> None:
+        """
+        Called once the tap is written, on the control writer thread
+        """
+        if trial == self.trial and self.tapped:
+            self.sent_at = sent_at_ns / 1e9
+
+    def finish_trial(self, latency_ms: float) -> None:
+        self.tapped = False
+        self.sent_at = None
+        if latency_ms >= 0:
+            self.stats.latencies_ms.append(latency_ms)
+        self.onTrial.emit(self.trial, latency_ms)
+        self.trial += 1
+        if self.trial >= self.trials:
+            self.stop()
+            return
+        self.timer.start(self.interval_ms)
@@ -0,0 +1,194 @@
+import atexit
+import builtins
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from typing import Optional
+
+from .color_console import ColorConsole
+
+SUCCESS = 25
+logging.addLevelName(SUCCESS, "SUCCESS")
+
+# Logger window levels
+LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "success": SUCCESS,
+    "warn": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL,
+}
+
+LOG_FILE = os.path.join("logs", "pyscrcpy.log")
+
+
+class ConsoleFormatter(logging.Formatter):
+    """
+    time [LEVEL] sender::message, colored by level
+    """
+
+    colors = {
+        logging.DEBUG: ColorConsole.debug,
+        logging.INFO: ColorConsole.info,
+        SUCCESS: ColorConsole.success,
+        logging.WARNING: ColorConsole.warn,
+        logging.ERROR: ColorConsole.error,
+        logging.CRITICAL: ColorConsole.critical,
+    }
+
+    def __init__(self, color: bool = True):
+        super().__init__(datefmt="%Y-%m-%d %H:%M:%S")
+        self.color = color
+
+    def format(self, record: logging.LogRecord) -> str:
+        sender = getattr(record, "sender", None) or record.name
+        text = (
+            f"{self.formatTime(record, self.datefmt)} "
+            f"[{record.levelname}] {sender}::{record.getMessage()}"
+        )
+        if record.exc_info:
+            text += "\n" + self.formatException(record.exc_info)
+        if not self.color:
+            return text
+        return f"{self.colors.get(record.levelno, ColorConsole.info)}{text}\033[0m"
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One json object per line, for the log file
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "sender": getattr(record, "sender", None),
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+class LogBackend:
+    """
+    Logging of the app: the callers only put the records into a queue, a
+    listener thread formats and writes them to the console and a rotating
+    file. Thresholds are per logger name (module), a disabled call returns
+    before anything is formatted.
+    """
+
+    instance = None
+
+    def __init__(
+        self,
+        level: int = logging.INFO,
+        levels: Optional[dict[str, int]] = None,
+        log_file: Optional[str] = LOG_FILE,
+        max_bytes: int = 5 * 1024 * 1024,
+        backup_count: int = 5,
+        console: bool = True,
+    ):
+        """
+        Args:
+            level: threshold of the modules without their own
+            levels: {logger name: threshold}, e.g. {"src.app.qt_scrcpy": logging.DEBUG}
+            log_file: path of the log file, None to disable it
+            max_bytes: size of the log file before it is rotated
+            backup_count: rotated files kept
+            console: write to stderr too
+        """
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+        handlers: list[logging.Handler] = []
+        if console:
+            console_handler = logging.StreamHandler(sys.stderr)
+            console_handler.setFormatter(ConsoleFormatter(sys.stderr.isatty()))
+            handlers.append(console_handler)
+        if log_file:
+            directory = os.path.dirname(log_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+            )
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+        self.listener = logging.handlers.QueueListener(
+            self.queue, *handlers, respect_handler_level=True
+        )
+        self.running = False
+
+        self.root = logging.getLogger()
+        for handler in list(self.root.handlers):
+            self.root.removeHandler(handler)
+        self.root.addHandler(logging.handlers.QueueHandler(self.queue))
+        self.set_levels(level, levels)
+
+    @classmethod
+    def setup(cls, *args, **kwargs) -> "LogBackend":
+        if cls.instance is None:
+            cls.instance = LogBackend(*args, **kwargs)
+            cls.instance.start()
+            atexit.register(cls.instance.stop)
+        return cls.instance
+
+    def set_levels(self, level: int, levels: Optional[dict[str, int]] = None) -> None:
+        self.root.setLevel(level)
+        for name, threshold in (levels or {}).items():
+            logging.getLogger(name).setLevel(threshold)
+
+    def start(self) -> None:
+        if not self.running:
+            self.running = True
+            self.listener.start()
+
+    def stop(self) -> None:
+        """
+        Write the queued records and stop the listener thread
+        """
+        if self.running:
+            self.running = False
+            self.listener.stop()
+
+
+def parse_levels(spec: str) -> dict[str, int]:
+    """
+    Args:
+        spec: comma separated name=LEVEL, e.g. "src.app.qt_scrcpy=DEBUG,PIL=WARNING"
+    """
+    levels = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        name, _, level = part.partition("=")
+        threshold = logging.getLevelName(level.strip().upper())
+        if not isinstance(threshold, int):
+            raise ValueError(f"Unknown log level {level!r}")
+        levels[name.strip()] = threshold
+    return levels
+
+
+def install_print_hook() -> None:
+    """
+    Route print to the logger of the calling module at debug level, when
+    debug is off for that module a print returns before formatting or any I/O.
+    Prints to another file than stdout are left untouched.
+    """
+    original = getattr(builtins.print, "original", builtins.print)
+
+    def print_hook(*args, sep=" ", end="\n", file=None, flush=False):
+        if file is not None and file is not sys.stdout:
+            original(*args, sep=sep, end=end, file=file, flush=flush)
+            return
+        logger = logging.getLogger(sys._getframe(1).f_globals.get("__name__", "print"))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug((" " if sep is None else sep).join(map(str, args)), stacklevel=2)
+
+    print_hook.original = original
+    builtins.print = print_hook
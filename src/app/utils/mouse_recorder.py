@@ -1,167 +1,456 @@
+import dataclasses
 import datetime
+import io
 import json
 import os
-import zipfile
-from typing import Optional
+import queue
+import threading
+import time
+from typing import BinaryIO, Optional, Union
 
+import av
 from PIL import Image, ImageDraw
 from PySide6 import QtCore
 from PySide6.QtCore import QObject, QPoint
 from PySide6.QtGui import QPixmap
 
+from .archiver import Archiver
+from .session_container import SessionContainer
+from .stream_recorder import StreamRecorder
 from ..logger import Logger
 
 
+@dataclasses.dataclass
+class RecordEncoding:
+    """
+    Picture encoding of the mouse records
+
+    Args:
+        format: "png" | "webp", webp is always lossless
+        compress_level: png zlib level 0 ~ 9 (lower is faster), webp method 0 ~ 6
+    """
+
+    format: str = "png"
+    compress_level: int = 6
+
+    @property
+    def extension(self) -> str:
+        return self.format
+
+    def save(self, img: Image.Image, fp: Union[str, BinaryIO]) -> None:
+        if self.format == "webp":
+            img.save(fp, "WEBP", lossless=True, method=min(self.compress_level, 6))
+        else:
+            img.save(fp, "PNG", compress_level=self.compress_level)
+
+
+@dataclasses.dataclass
+class CropOptions:
+    """
+    Crop-only mouse records, the full frame is kept as a thumbnail and can be
+    decoded from the raw stream recording on demand
+
+    Args:
+        radius: half size of the neighbourhood saved around the click
+        thumbnail_width: width of the down-scaled full frame
+    """
+
+    radius: int = 64
+    thumbnail_width: int = 320
+
+
+# limited range BT.601 to the full range expected by PIL's YCbCr
+LUMA_LUT = [min(255, max(0, round((v - 16) * 255 / 219))) for v in range(256)]
+CHROMA_LUT = [min(255, max(0, round((v - 128) * 255 / 224 + 128))) for v in range(256)]
+
+
+def plane_region(plane, x: int, y: int, w: int, h: int) -> Image.Image:
+    buffer = memoryview(plane)
+    stride = plane.line_size
+    rows = b"".join(
+        buffer[(y + row) * stride + x : (y + row) * stride + x + w]
+        for row in range(h)
+    )
+    return Image.frombytes("L", (w, h), rows)
+
+
+def crop_frame(frame: av.VideoFrame, box: tuple) -> tuple[Image.Image, tuple]:
+    """
+    Convert only the box of a yuv420p frame to RGB
+
+    Returns:
+        cropped image, box aligned to the chroma planes
+    """
+    left, top, right, bottom = box
+    left, top = left & ~1, top & ~1
+    right = min(frame.width, (right + 1) & ~1)
+    bottom = min(frame.height, (bottom + 1) & ~1)
+    w, h = right - left, bottom - top
+    y = plane_region(frame.planes[0], left, top, w, h).point(LUMA_LUT)
+    cw, ch = (w + 1) // 2, (h + 1) // 2
+    u, v = (
+        plane_region(plane, left // 2, top // 2, cw, ch)
+        .point(CHROMA_LUT)
+        .resize((w, h), Image.Resampling.BILINEAR)
+        for plane in frame.planes[1:3]
+    )
+    return Image.merge("YCbCr", (y, u, v)).convert("RGB"), (left, top, right, bottom)
+
+
+def draw_cross(img: Image.Image, x: int, y: int) -> None:
+    width, height = img.size
+    img_draw = ImageDraw.Draw(img)
+    # 绘制一个竖着的线
+    img_draw.line((x, 0, x, height), fill=(255, 0, 0), width=2)
+    # 绘制一个横着的线
+    img_draw.line((0, y, width, y), fill=(255, 0, 0), width=2)
+
+
 class MouseRecord:
-    def __init__(self, pos: QPoint, frame: QPixmap):
+    def __init__(
+        self,
+        pos: QPoint,
+        frame: Union[QPixmap, Image.Image, av.VideoFrame],
+        name: str,
+        index: int,
+        stream: Optional[str] = None,
+        stream_frame: Optional[int] = None,
+    ):
         super().__init__()
         self.pos = pos
         self.frame = frame
+        self.name = name
+        self.index = index  # submission order, from 1, lines are written in it
+        self.stream = stream  # raw stream recording holding the full frame
+        self.stream_frame = stream_frame
+        self.queued_at = time.perf_counter()
 
 
 class MouseRecordProcessor(QObject):
-    onRecordSaved = QtCore.Signal(str, int, int)
-    onMouseRecorded = QtCore.Signal(MouseRecord)
+    """
+    Save mouse records with a pool of writer threads fed by a bounded queue,
+    lines of mouse_records.txt are written in batches.
+    With the container storage every record (metadata and pictures) is appended
+    to the single file mouse_records.bas instead.
+    """
+
+    STORAGE_FILES = "files"
+    STORAGE_CONTAINER = "container"
 
-    def __init__(self, save_dir: str):
+    onRecordSaved = QtCore.Signal(str, int, int, float)  # name, x, y, latency(ms)
+
+    def __init__(
+        self,
+        save_dir: str,
+        encoding: Optional[RecordEncoding] = None,
+        crop: Optional[CropOptions] = None,
+        workers: int = 2,
+        queue_size: int = 16,
+        flush_size: int = 16,
+        storage: str = STORAGE_FILES,
+    ):
         super().__init__()
+        assert storage in [self.STORAGE_FILES, self.STORAGE_CONTAINER]
         self.count = 0
         self.save_dir = save_dir  # 保存目录
-        self.onMouseRecorded.connect(self.record_process)
-        self.dump_time_indicator()
+        self.encoding = encoding or RecordEncoding()
+        self.crop = crop or CropOptions()
+        self.flush_size = flush_size
+        self.storage = storage
+        self.container: Optional[SessionContainer] = None
+        self.container_lock = threading.Lock()
+        self.queue: queue.Queue[Optional[MouseRecord]] = queue.Queue(queue_size)
+        # index -> line, None for a record that failed
+        self.pending_lines: dict[int, Optional[str]] = {}
+        self.next_line = 1  # index of the next line of mouse_records.txt
+        self.lines_lock = threading.Lock()
+        self.workers = [
+            threading.Thread(
+                target=self.work, name=f"MouseRecordWriter-{i}", daemon=True
+            )
+            for i in range(workers)
+        ]
+        for worker in self.workers:
+            worker.start()
 
-    def dump_time_indicator(self):
-        os.makedirs(self.save_dir, exist_ok=True)
-        indicator = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S.%f")[:-3]
-        with open(
-            f"{self.save_dir}/TIME_INDICATOR~{indicator}", "w", encoding="utf-8"
-        ) as f:
-            f.write(f"TIME_INDICATOR~{indicator}\n")
+    @property
+    def queue_depth(self) -> int:
+        return self.queue.qsize()
 
-    def record_process(self, record: MouseRecord) -> None:
+    @property
+    def records_file(self) -> str:
+        if self.storage == self.STORAGE_CONTAINER:
+            return "mouse_records.bas"
+        return "mouse_records.txt"
+
+    def get_container(self) -> SessionContainer:
+        with self.container_lock:
+            if self.container is None:
+                os.makedirs(self.save_dir, exist_ok=True)
+                self.container = SessionContainer(
+                    f"{self.save_dir}/{self.records_file}", "a"
+                )
+            return self.container
+
+    def submit(
+        self,
+        pos: QPoint,
+        frame: Union[QPixmap, Image.Image, av.VideoFrame],
+        stream: Optional[str] = None,
+        stream_frame: Optional[int] = None,
+    ) -> Optional[str]:
+        """
+        Queue a record without blocking
+
+        Args:
+            pos: click position on the frame
+            frame: full frame picture, or the decoded frame for crop-only records
+            stream: raw stream recording of the frame
+            stream_frame: frame index in the stream recording
+
+        Returns:
+            record name, None if the queue is full and the record is dropped
+        """
+        index = self.count + 1
+        record = MouseRecord(
+            pos, frame, f"mouse_record_{index}", index, stream, stream_frame
+        )
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            return None
         self.count += 1
-        record_name = f"mouse_record_{self.count}"
+        return record.name
+
+    def work(self) -> None:
+        while True:
+            record = self.queue.get()
+            if record is None:
+                break
+            try:
+                self.record_process(record)
+            except Exception as e:
+                Logger.error(f"Failed to save {record.name}: {e}", self)
+                if self.storage == self.STORAGE_FILES:
+                    # the following lines must not wait for it
+                    self.append_line(record.index, None)
+
+    def record_process(self, record: MouseRecord) -> None:
+        pos = record.pos
+        if isinstance(record.frame, av.VideoFrame):
+            images, data = self.render_crop(record)
+        else:
+            images, data = self.render_full(record)
+        width, height = data["window_size"]
+
+        data = {
+            "name": record.name,
+            "pos": [int(pos.x()), int(pos.y())],
+            "relative_pos": [
+                int(100 * pos.x() / width),
+                int(100 * pos.y() / height),
+            ],
+            **data,
+            "time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+        }
+        if self.storage == self.STORAGE_CONTAINER:
+            # pictures are stored back to back in the blob of the record
+            blob = io.BytesIO()
+            data["blobs"] = {}
+            for name, img in images.items():
+                offset = blob.tell()
+                self.encoding.save(img, blob)
+                data["blobs"][name] = [offset, blob.tell() - offset]
+            self.get_container().append(data, blob.getvalue())
+        else:
+            os.makedirs(self.save_dir, exist_ok=True)
+            # 保存pix
+            for name, img in images.items():
+                self.encoding.save(img, f"{self.save_dir}/{name}")
+            # 保存记录
+            self.append_line(record.index, json.dumps(data, ensure_ascii=False))
+
+        latency = (time.perf_counter() - record.queued_at) * 1000
+        self.onRecordSaved.emit(record.name, pos.x(), pos.y(), latency)
+
+    def render_full(self, record: MouseRecord) -> tuple[dict, dict]:
         pos, pix = record.pos, record.frame
-        # 在frame的pos处绘制一个长宽20pixel,厚度为2pixel的红色十字
-        # 1. 获取frame的shape
-        # 2. 计算十字的起始点和终止点
-        # 3. 绘制十字
-        # 4. 保存frame
-        pix: QPixmap
-        img: Image.Image = Image.fromqpixmap(pix)
-        height, width = pix.height(), pix.width()
-
-        # 绘制一个竖着的线
-        img_draw = ImageDraw.Draw(img)
-        img_draw.line((pos.x(), 0, pos.x(), height), fill=(255, 0, 0), width=2)
-
-        # 绘制一个横着的线
-        img_draw.line((0, pos.y(), width, pos.y()), fill=(255, 0, 0), width=2)
-
-        os.makedirs(self.save_dir, exist_ok=True)
-        # 保存pix
-        img.save(f"{self.save_dir}/{record_name}.png")
-        # 保存记录
+        # 在frame的pos处绘制一个红色十字
+        if isinstance(pix, QPixmap):
+            img: Image.Image = Image.fromqpixmap(pix)
+        else:
+            img: Image.Image = pix.copy()
+        draw_cross(img, pos.x(), pos.y())
+        frame_name = f"{record.name}.{self.encoding.extension}"
+        return {frame_name: img}, {"window_size": list(img.size), "frame": frame_name}
+
+    def render_crop(self, record: MouseRecord) -> tuple[dict, dict]:
+        pos, frame = record.pos, record.frame
+        frame: av.VideoFrame
+        width, height = frame.width, frame.height
+        x, y, r = int(pos.x()), int(pos.y()), self.crop.radius
+
+        # neighbourhood of the click, only this part is converted to RGB
+        crop, box = crop_frame(
+            frame,
+            (max(0, x - r), max(0, y - r), min(width, x + r + 1), min(height, y + r + 1)),
+        )
+        draw_cross(crop, x - box[0], y - box[1])
+
+        # down-scaled full frame, scaled while converting
+        thumbnail_width = min(self.crop.thumbnail_width, width)
+        thumbnail_height = max(1, round(height * thumbnail_width / width))
+        thumbnail = frame.reformat(
+            width=thumbnail_width, height=thumbnail_height, format="rgb24"
+        ).to_image()
+        draw_cross(
+            thumbnail,
+            round(x * thumbnail_width / width),
+            round(y * thumbnail_height / height),
+        )
+
+        crop_name = f"{record.name}_crop.{self.encoding.extension}"
+        thumbnail_name = f"{record.name}_thumb.{self.encoding.extension}"
+        return {crop_name: crop, thumbnail_name: thumbnail}, {
+            "window_size": [width, height],
+            "frame": thumbnail_name,
+            "crop": crop_name,
+            "crop_box": list(box),
+            "stream": record.stream,
+            "stream_frame": record.stream_frame,
+        }
+
+    def append_line(self, index: int, line: Optional[str]) -> None:
+        with self.lines_lock:
+            self.pending_lines[index] = line
+            ready = 0
+            while self.next_line + ready in self.pending_lines:
+                ready += 1
+            # batch the lines while records are queued, flush once idle
+            if ready and (ready >= self.flush_size or self.queue.empty()):
+                self.flush_lines()
+
+    def flush_lines(self, all_lines: bool = False) -> None:
+        """
+        Append the pending lines following the last written one to
+        mouse_records.txt, a line still processed by another worker stops
+        the flush so the file stays in submission order. lines_lock must be held
+
+        Args:
+            all_lines: write every pending line, once the workers are stopped
+        """
+        if all_lines:
+            indexes = sorted(self.pending_lines)
+        else:
+            indexes = []
+            while self.next_line + len(indexes) in self.pending_lines:
+                indexes.append(self.next_line + len(indexes))
+        if not indexes:
+            return
+        self.next_line = indexes[-1] + 1
+        lines = [self.pending_lines.pop(_) for _ in indexes]
+        lines = [_ for _ in lines if _ is not None]
+        if not lines:
+            return
         with open(f"{self.save_dir}/mouse_records.txt", "a", encoding="utf-8") as f:
-            data = json.dumps(
-                {
-                    "name": record_name,
-                    "pos": [int(pos.x()), int(pos.y())],
-                    "window_size": [width, height],
-                    "relative_pos": [
-                        int(100 * pos.x() / width),
-                        int(100 * pos.y() / height),
-                    ],
-                    "frame": f"{record_name}.png",
-                    "time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[
-                        :-3
-                    ],
-                },
-                ensure_ascii=False,
-            )
-            f.write(data + "\n")
+            f.write("".join(f"{line}\n" for line in lines))
 
-        self.onRecordSaved.emit(record_name, pos.x(), pos.y())
+    def stop(self) -> None:
+        for _ in self.workers:
+            self.queue.put(None)
+        for worker in self.workers:
+            worker.join()
+        with self.lines_lock:
+            self.flush_lines(all_lines=True)
+        with self.container_lock:
+            if self.container is not None:
+                self.container.close()
+                self.container = None
 
 
 class MouseRecorder(QObject):
-    def __init__(self, save_dir: Optional[str] = None):
+    def __init__(
+        self,
+        save_dir: Optional[str] = None,
+        encoding: Optional[RecordEncoding] = None,
+        workers: int = 2,
+        crop: Optional[CropOptions] = None,
+        stream_recorder: Optional[StreamRecorder] = None,
+        storage: str = MouseRecordProcessor.STORAGE_FILES,
+    ):
+        """
+        Args:
+            save_dir: directory of the records, default mouse_records
+            encoding: picture encoding
+            workers: writer threads
+            storage: MouseRecordProcessor.STORAGE_*
+            crop: crop-only records, on_mouse_released expects decoded frames then
+            stream_recorder: raw stream of the crop-only records is recorded with it
+        """
         super().__init__()
         self.logger = Logger.get_logger()
         self.__is_recording = False
         self.save_dir = save_dir or "mouse_records"
+        self.crop = crop
+        self.stream_recorder = stream_recorder
+        self.stream_count = 0
         self.make_archive()
-        self.processor = MouseRecordProcessor(save_dir=self.save_dir)
-        self.work_thread = QtCore.QThread()
-        self.processor.moveToThread(self.work_thread)
-
-        self.work_thread.started.connect(self.on_process_started)
+        self.processor = MouseRecordProcessor(
+            save_dir=self.save_dir,
+            encoding=encoding,
+            crop=crop,
+            workers=workers,
+            storage=storage,
+        )
         self.processor.onRecordSaved.connect(self.on_processor_saved)
-        self.work_thread.start()
 
     def make_archive(self):
-        if os.path.exists(self.save_dir):
-            time_indicator = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S.%f")[
-                :-3
-            ]  # default time indicator
-            files_to_zip = []
-            time_indicator_file = None
-            for _ in os.listdir(self.save_dir):
-                if _.startswith("TIME_INDICATOR~"):
-                    time_indicator = _.split("~")[1]  # get the latest time indicator
-                    time_indicator_file = _
-                elif not _.endswith(".zip"):
-                    files_to_zip.append(_)  # add all files except zip files
-
-            if time_indicator_file is not None:
-                os.remove(os.path.join(self.save_dir, time_indicator_file))
-
-            if len(files_to_zip) == 0:
-                return
+        Archiver.get_archiver().make_archive(self.save_dir, "mouse_records")
 
-            archive_name = f"mouse_records_{time_indicator}.zip"
-            self.logger.info(
-                msg=f"Making archive: {archive_name=}",
-                sender=self,
-            )
-            with zipfile.ZipFile(
-                os.path.join(self.save_dir, archive_name), "w"
-            ) as zip_file:
-                for _ in files_to_zip:
-                    zip_file.write(os.path.join(self.save_dir, _), _)
-            # clean all files
-            for _ in files_to_zip:
-                os.remove(os.path.join(self.save_dir, _))
-        else:
-            self.logger.info(
-                msg=f"Archive not made: {self.save_dir=} does not exist",
-                sender=self,
-            )
-
-    def on_mouse_released(self, pos: QPoint, pix: QPixmap):
+    def on_mouse_released(
+        self, pos: QPoint, pix: Union[QPixmap, Image.Image, av.VideoFrame]
+    ):
         if self.__is_recording:
             if pix is None:
                 return
-            self.processor.onMouseRecorded.emit(MouseRecord(pos, pix))
-
-    def on_process_started(self):
-        self.logger.debug(msg="thread started", sender=self)
+            stream, stream_frame = None, None
+            if isinstance(pix, av.VideoFrame) and self.stream_recorder is not None:
+                stream_frame = self.stream_recorder.stream_frame(pix.pts)
+                if stream_frame is not None:
+                    stream = os.path.basename(self.stream_recorder.path)
+            if self.processor.submit(pos, pix, stream, stream_frame) is None:
+                self.logger.warn(
+                    msg=f"Mouse record dropped, writer queue is full ({self.processor.queue_depth})",
+                    sender=self,
+                )
 
-    def on_processor_saved(self, name: str, x: int, y: int):
+    def on_processor_saved(self, name: str, x: int, y: int, latency: float):
         self.logger.success(
-            msg=f"Mouse Click Event Recorded: {name=} ({x=}, {y=})",
+            msg=f"Mouse Click Event Recorded: {name=} ({x=}, {y=}) "
+            f"latency={latency:.1f}ms queue={self.processor.queue_depth}",
             sender=self,
         )
 
+    @property
+    def is_crop_mode(self) -> bool:
+        return self.crop is not None
+
     def start_record(self):
         self.__is_recording = True
+        if self.stream_recorder is not None:
+            self.stream_count += 1
+            os.makedirs(self.save_dir, exist_ok=True)
+            self.stream_recorder.start(
+                f"{self.save_dir}/stream_{self.stream_count}.h264"
+            )
 
     def stop_record(self):
         self.__is_recording = False
+        if self.stream_recorder is not None:
+            self.stream_recorder.stop()
 
     def stop_processor(self):
-        self.work_thread.quit()
-        self.work_thread.wait()
+        self.processor.stop()
 
     @property
     def is_recording(self):
@@ -0,0 +1,180 @@
+import json
+import os
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+
+from .adb_service import AdbService
+
+CACHE_PATH = os.path.join("cache", "emulator_ports.json")
+
+# adb ports opened by the emulator families on the local host
+EMULATOR_PORTS: dict[str, list[int]] = {
+    "avd": [5555 + 2 * n for n in range(16)],  # LDPlayer, BlueStacks use the same
+    "mumu": [7555],
+    "mumu12": [16384 + 32 * n for n in range(16)],
+    "nox": [62001] + [62025 + n for n in range(15)],
+    "memu": [21503 + 10 * n for n in range(16)],
+}
+
+
+def parse_ports(spec: str) -> list[int]:
+    """
+    Args:
+        spec: comma separated ports or ranges with an optional step,
+            e.g. "7555,5555-5585/2,16384-16864/32"
+
+    Returns:
+        ports in the order given, duplicates removed
+    """
+    ports = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+        if "-" in part:
+            first, last = part.split("-", 1)
+            ports.extend(range(int(first), int(last) + 1, step))
+        else:
+            ports.append(int(part))
+    for port in ports:
+        if not 0 < port < 65536:
+            raise ValueError(f"Invalid port {port}")
+    return list(dict.fromkeys(ports))
+
+
+def emulator_candidates(host: str = "127.0.0.1", ports: Optional[Iterable[int]] = None) -> list[str]:
+    """
+    Args:
+        host: host running the emulators
+        ports: ports to probe, all the known emulator ports by default
+
+    Returns:
+        host:port addresses
+    """
+    if ports is None:
+        ports = [port for family in EMULATOR_PORTS.values() for port in family]
+    return [f"{host}:{port}" for port in dict.fromkeys(ports)]
+
+
+class PortScanner:
+    """
+    Probe the candidate addresses concurrently with a short connect timeout and
+    adb connect the responsive ones, so the whole scan costs about one timeout
+    instead of one per candidate. The connected addresses are cached and
+    connected first on the next launch.
+    """
+
+    def __init__(
+        self,
+        candidates: Optional[list[str]] = None,
+        timeout: float = 0.2,
+        connect_timeout: float = 3.0,
+        workers: int = 64,
+        cache_path: str = CACHE_PATH,
+    ):
+        """
+        Args:
+            candidates: host:port addresses, the known emulator ports on 127.0.0.1 by default
+            timeout: tcp connect timeout of a probe (s)
+            connect_timeout: timeout of adb connect (s)
+            workers: probes running at the same time
+            cache_path: json file keeping the connected addresses
+        """
+        self.candidates = candidates if candidates is not None else emulator_candidates()
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.workers = workers
+        self.cache_path = cache_path
+
+    def probe(self, address: str) -> bool:
+        host, port = address.rsplit(":", 1)
+        try:
+            with socket.create_connection((host, int(port)), timeout=self.timeout):
+                return True
+        except (OSError, ValueError):
+            return False
+
+    def connect(self, address: str) -> bool:
+        return AdbService.get_service().connect(address, self.connect_timeout)
+
+    def map(self, fn, addresses: list[str]) -> list[str]:
+        """
+        Returns:
+            the addresses for which fn returned True, in the given order
+        """
+        if not addresses:
+            return []
+        with ThreadPoolExecutor(min(self.workers, len(addresses))) as pool:
+            results = list(pool.map(fn, addresses))
+        return [address for address, ok in zip(addresses, results) if ok]
+
+    def scan(self, addresses: Optional[list[str]] = None, known: Iterable[str] = ()) -> list[str]:
+        """
+        Probe and connect
+
+        Args:
+            addresses: candidates, self.candidates by default
+            known: serials already in the device list, their addresses are not
+                connected again (emulator-5554 is the avd listening on 5555)
+
+        Returns:
+            connected addresses
+        """
+        known = set(known)
+        addresses = [
+            address
+            for address in (self.candidates if addresses is None else addresses)
+            if address not in known and not self.is_local_emulator(address, known)
+        ]
+        responsive = self.map(self.probe, addresses)
+        return self.map(self.connect, responsive)
+
+    @staticmethod
+    def is_local_emulator(address: str, known: set[str]) -> bool:
+        host, port = address.rsplit(":", 1)
+        return (
+            host in ("127.0.0.1", "localhost")
+            and port.isdigit()
+            and f"emulator-{int(port) - 1}" in known
+        )
+
+    def load_cache(self) -> list[str]:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return [str(_) for _ in json.load(f).get("addresses", [])]
+        except (OSError, ValueError, AttributeError):
+            return []
+
+    def save_cache(self, addresses: list[str]) -> None:
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"addresses": addresses}, f, indent=2)
+        os.replace(tmp_path, self.cache_path)
+
+    def connect_cached(self, known: Iterable[str] = ()) -> list[str]:
+        """
+        Connect the addresses found by the last scan
+        """
+        return self.scan(self.load_cache(), known)
+
+    def run(self, known: Iterable[str] = ()) -> list[str]:
+        """
+        Scan all the candidates and cache the connected addresses
+
+        Returns:
+            connected addresses
+        """
+        known = set(known)
+        connected = self.scan(known=known)
+        # addresses connected in a previous run are still connected, keep them
+        cached = [_ for _ in self.load_cache() if _ in known or _ in connected]
+        self.save_cache(list(dict.fromkeys(cached + connected)))
+        return connected
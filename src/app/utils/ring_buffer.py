@@ -0,0 +1,55 @@
+from typing import Any, Iterable
+
+
+class RingBuffer:
+    """
+    Fixed capacity sequence, the oldest items are overwritten. Indexing is
+    O(1) from the oldest (0) to the newest (len - 1) item.
+    """
+
+    def __init__(self, capacity: int):
+        assert capacity > 0, "capacity must be greater than 0"
+        self.capacity = capacity
+        self.items: list[Any] = [None] * capacity
+        self.start = 0
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> Any:
+        if not -self.count <= index < self.count:
+            raise IndexError("ring buffer index out of range")
+        if index < 0:
+            index += self.count
+        return self.items[(self.start + index) % self.capacity]
+
+    def overflow(self, incoming: int) -> int:
+        """
+        Returns:
+            number of the oldest items dropped by appending `incoming` items
+        """
+        return max(0, self.count + min(incoming, self.capacity) - self.capacity)
+
+    def drop(self, n: int) -> None:
+        """
+        Drop the n oldest items
+        """
+        n = min(n, self.count)
+        for i in range(n):
+            self.items[(self.start + i) % self.capacity] = None
+        self.start = (self.start + n) % self.capacity
+        self.count -= n
+
+    def extend(self, items: Iterable[Any]) -> None:
+        for item in items:
+            self.items[(self.start + self.count) % self.capacity] = item
+            if self.count < self.capacity:
+                self.count += 1
+            else:
+                self.start = (self.start + 1) % self.capacity
+
+    def clear(self) -> None:
+        self.items = [None] * self.capacity
+        self.start = 0
+        self.count = 0
@@ -0,0 +1,198 @@
+"""
+Single-file, append-only container of a recorded session
+
+    header   MAGIC
+    record   RECORD_HEADER(b"REC\0", meta length, blob length, crc32) + json meta + blob
+    ...
+    index    offset of every record, u64 each
+    trailer  TRAILER(index offset, record count, b"BASINDEX")
+
+The index and the trailer are written on close and dropped again when the
+container is reopened for appending. A container without a valid trailer
+(e.g. the application crashed) is recovered by scanning the records.
+"""
+import json
+import os
+import struct
+import threading
+import zlib
+from typing import BinaryIO, Optional, Union
+
+MAGIC = b"BASSESS\x01"
+RECORD_MAGIC = b"REC\x00"
+TRAILER_MAGIC = b"BASINDEX"
+RECORD_HEADER = struct.Struct(">4sIQI")
+TRAILER = struct.Struct(">QI8s")
+OFFSET = struct.Struct(">Q")
+
+
+class ContainerError(Exception):
+    pass
+
+
+class SessionContainer:
+    def __init__(self, file: Union[str, BinaryIO], mode: str = "r"):
+        """
+        Args:
+            file: path, or a seekable binary file object for reading
+            mode: "r" read only, "a" append (created if not exists)
+        """
+        assert mode in ["r", "a"], "mode must be r or a"
+        self.mode = mode
+        self.lock = threading.Lock()
+        self.offsets: list[int] = []
+        self.recovered = False
+        if isinstance(file, str):
+            if mode == "a" and not os.path.exists(file):
+                with open(file, "wb") as f:
+                    f.write(MAGIC)
+            self.file = open(file, "r+b" if mode == "a" else "rb")
+            self.own_file = True
+        else:
+            self.file = file
+            self.own_file = False
+
+        if self.file.read(len(MAGIC)) != MAGIC:
+            raise ContainerError("Not a session container")
+        end = self.load_index()
+        if end is None:
+            end = self.scan()
+            self.recovered = True
+        if mode == "a":
+            # drop the index (or a partially written record), appending starts here
+            self.file.seek(end)
+            self.file.truncate()
+        self.end = end
+
+    def load_index(self) -> Optional[int]:
+        """
+        Read the offsets from the index footer
+
+        Returns:
+            offset of the index, None if the footer is missing or invalid
+        """
+        size = self.file.seek(0, os.SEEK_END)
+        if size < len(MAGIC) + TRAILER.size:
+            return None
+        self.file.seek(size - TRAILER.size)
+        index_offset, count, magic = TRAILER.unpack(self.file.read(TRAILER.size))
+        if (
+            magic != TRAILER_MAGIC
+            or index_offset + count * OFFSET.size + TRAILER.size != size
+        ):
+            return None
+        self.file.seek(index_offset)
+        data = self.file.read(count * OFFSET.size)
+        self.offsets = [_ for (_,) in OFFSET.iter_unpack(data)]
+        return index_offset
+
+    def scan(self) -> int:
+        """
+        Rebuild the offsets by walking the records, stops at the first broken one
+
+        Returns:
+            end of the last valid record
+        """
+        self.offsets = []
+        offset = len(MAGIC)
+        while True:
+            self.file.seek(offset)
+            header = self.file.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                break
+            magic, meta_length, blob_length, crc = RECORD_HEADER.unpack(header)
+            if magic != RECORD_MAGIC:
+                break
+            body = self.file.read(meta_length + blob_length)
+            if len(body) < meta_length + blob_length or zlib.crc32(body) != crc:
+                break
+            self.offsets.append(offset)
+            offset += RECORD_HEADER.size + meta_length + blob_length
+        return offset
+
+    def append(self, meta: dict, blob: bytes = b"") -> int:
+        """
+        Append a record
+
+        Args:
+            meta: json serializable metadata
+            blob: binary payload, e.g. encoded pictures
+
+        Returns:
+            index of the record
+        """
+        assert self.mode == "a", "container is opened read only"
+        meta_data = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+        header = RECORD_HEADER.pack(
+            RECORD_MAGIC,
+            len(meta_data),
+            len(blob),
+            zlib.crc32(blob, zlib.crc32(meta_data)),
+        )
+        with self.lock:
+            self.file.seek(self.end)
+            self.file.write(header)
+            self.file.write(meta_data)
+            self.file.write(blob)
+            self.file.flush()
+            self.offsets.append(self.end)
+            self.end += len(header) + len(meta_data) + len(blob)
+            return len(self.offsets) - 1
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def read_header(self, index: int) -> tuple[int, int]:
+        self.file.seek(self.offsets[index])
+        _, meta_length, blob_length, _ = RECORD_HEADER.unpack(
+            self.file.read(RECORD_HEADER.size)
+        )
+        return meta_length, blob_length
+
+    def read_meta(self, index: int) -> dict:
+        with self.lock:
+            meta_length, _ = self.read_header(index)
+            return json.loads(self.file.read(meta_length).decode("utf-8"))
+
+    def read_blob(self, index: int, offset: int = 0, length: int = -1) -> bytes:
+        """
+        Read (a part of) the blob of a record
+
+        Args:
+            index: record index
+            offset: offset in the blob
+            length: bytes to read, -1 means until the end of the blob
+        """
+        with self.lock:
+            meta_length, blob_length = self.read_header(index)
+            if length < 0:
+                length = blob_length - offset
+            self.file.seek(
+                self.offsets[index] + RECORD_HEADER.size + meta_length + offset
+            )
+            return self.file.read(length)
+
+    def __getitem__(self, index: int) -> tuple[dict, bytes]:
+        with self.lock:
+            meta_length, blob_length = self.read_header(index)
+            meta = json.loads(self.file.read(meta_length).decode("utf-8"))
+            return meta, self.file.read(blob_length)
+
+    def close(self) -> None:
+        with self.lock:
+            if self.file is None:
+                return
+            if self.mode == "a":
+                self.file.seek(self.end)
+                self.file.write(b"".join(OFFSET.pack(_) for _ in self.offsets))
+                self.file.write(TRAILER.pack(self.end, len(self.offsets), TRAILER_MAGIC))
+                self.file.truncate()
+            if self.own_file:
+                self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
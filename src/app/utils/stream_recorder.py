@@ -0,0 +1,225 @@
+import bisect
+import threading
+from typing import BinaryIO, Optional, Union
+
+import av
+from PIL import Image
+
+NAL_SLICE = 1
+NAL_IDR = 5
+NAL_SPS = 7
+NAL_PPS = 8
+
+
+def h264_nal_units(data: bytes) -> list[tuple[int, bytes]]:
+    """
+    Split an annex-b h264 packet into (nal type, nal unit with start code)
+    """
+    starts = []
+    start = data.find(b"\x00\x00\x01")
+    while start != -1 and start + 3 < len(data):
+        starts.append(start)
+        start = data.find(b"\x00\x00\x01", start + 3)
+    units = []
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else len(data)
+        units.append((data[start + 3] & 0x1F, b"\x00" + data[start:end]))
+    return units
+
+
+def h264_disposable(units: list[tuple[int, bytes]]) -> bool:
+    """
+    Whether a packet only holds slices no other frame refers to (nal_ref_idc 0),
+    skipping their decoding does not damage the following frames
+    """
+    slices = [unit for nal_type, unit in units if nal_type in (NAL_SLICE, NAL_IDR)]
+    return bool(slices) and all(unit[4] & 0x60 == 0 for unit in slices)
+
+
+class StreamRecorder:
+    """
+    Record the raw h264 stream, so full resolution frames can be decoded on demand.
+
+    The packets since the last keyframe are kept in memory, the recording starts
+    from that keyframe, frame ``n`` of the recording is decoded frame
+    ``first_frame_index + n`` of the live stream.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.parameter_sets = b""  # SPS / PPS sent once at the stream start
+        self.gop: list[tuple[bytes, int]] = []  # packets since the last keyframe
+        self.file: Optional[BinaryIO] = None
+        self.path: Optional[str] = None
+        self.first_frame_index: Optional[int] = None
+
+    def write_packet(
+        self,
+        data: bytes,
+        frame_index: int,
+        units: Optional[list[tuple[int, bytes]]] = None,
+    ) -> None:
+        """
+        Called by the video decoder before the packet is decoded
+
+        Args:
+            data: packet data
+            frame_index: index of the next decoded frame
+            units: h264_nal_units of data when already parsed by the caller
+        """
+        if units is None:
+            units = h264_nal_units(data)
+        types = {nal_type for nal_type, _ in units}
+        with self.lock:
+            if NAL_SPS in types or NAL_PPS in types:
+                # keep them apart, later keyframes are sent without them
+                self.parameter_sets = b"".join(
+                    unit for nal_type, unit in units if nal_type in (NAL_SPS, NAL_PPS)
+                )
+                if NAL_IDR not in types:
+                    # the encoder was reconfigured (rotation, resize), the
+                    # next keyframe of the recording needs them
+                    if self.file is not None:
+                        self.file.write(data)
+                    return
+            if NAL_IDR in types:
+                self.gop.clear()
+            if NAL_IDR in types or self.gop:
+                self.gop.append((data, frame_index))
+            if self.file is None:
+                return
+            if self.first_frame_index is None:
+                # started without a keyframe in memory, wait for the next one
+                if NAL_IDR not in types:
+                    return
+                self.first_frame_index = frame_index
+            self.file.write(data)
+
+    def start(self, path: str) -> None:
+        with self.lock:
+            self.stop_locked()
+            self.path = path
+            self.file = open(path, "wb")
+            self.file.write(self.parameter_sets)
+            self.first_frame_index = self.gop[0][1] if self.gop else None
+            for data, _ in self.gop:
+                self.file.write(data)
+
+    def stream_frame(self, frame_index: Optional[int]) -> Optional[int]:
+        """
+        Index of a live frame in the recording, None if it is not recorded
+        """
+        with self.lock:
+            if (
+                self.file is None
+                or frame_index is None
+                or self.first_frame_index is None
+                or frame_index < self.first_frame_index
+            ):
+                return None
+            return frame_index - self.first_frame_index
+
+    def stop(self) -> None:
+        with self.lock:
+            self.stop_locked()
+
+    def stop_locked(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    @property
+    def is_recording(self) -> bool:
+        return self.file is not None
+
+
+def index_keyframes(stream: BinaryIO, chunk_size: int = 1 << 20) -> list[tuple[int, int, int, int]]:
+    """
+    Locate the keyframes of a recorded raw h264 stream without decoding it
+
+    Args:
+        stream: seekable file object of the recording, read from its current position
+        chunk_size: bytes read at once
+
+    Returns:
+        (frame index, keyframe offset, offset, end of the SPS / PPS it refers to),
+        in stream order
+    """
+    keyframes = []
+    frames = 0
+    parameter_sets = (0, 0)
+    parameter_sets_start = None
+    position = 0  # stream offset of buffer[0]
+    buffer = b""
+    while True:
+        chunk = stream.read(chunk_size)
+        buffer += chunk
+        search = 0
+        while True:
+            start = buffer.find(b"\x00\x00\x01", search)
+            # the nal header and the byte after it are needed
+            if start == -1 or start + 4 >= len(buffer):
+                break
+            offset = position + start
+            nal_type = buffer[start + 3] & 0x1F
+            if nal_type in (NAL_SPS, NAL_PPS):
+                if parameter_sets_start is None:
+                    parameter_sets_start = offset
+            else:
+                if parameter_sets_start is not None:
+                    parameter_sets = (parameter_sets_start, offset)
+                    parameter_sets_start = None
+                # first_mb_in_slice is 0 (ue "1") in the first slice of a frame
+                if nal_type in (1, NAL_IDR) and buffer[start + 4] & 0x80:
+                    if nal_type == NAL_IDR:
+                        keyframes.append((frames, offset, *parameter_sets))
+                    frames += 1
+            search = start + 3
+        if not chunk:
+            return keyframes
+        keep = start if start != -1 else max(search, len(buffer) - 2)
+        position += keep
+        buffer = buffer[keep:]
+
+
+def extract_frame(
+    stream: Union[str, BinaryIO],
+    index: int,
+    keyframes: Optional[list[tuple[int, int, int, int]]] = None,
+) -> Optional[Image.Image]:
+    """
+    Decode frame ``index`` of a recorded raw h264 stream, from the last keyframe
+    before it
+
+    Args:
+        stream: path or seekable file object of the recording
+        index: frame index in the recording
+        keyframes: index_keyframes of the recording, built when None
+    """
+    if isinstance(stream, str):
+        with open(stream, "rb") as f:
+            return extract_frame(f, index, keyframes)
+    if keyframes is None:
+        stream.seek(0)
+        keyframes = index_keyframes(stream)
+    position = bisect.bisect_right(keyframes, index, key=lambda _: _[0]) - 1
+    if position < 0:
+        return None
+    frame_index, offset, parameter_sets_offset, parameter_sets_end = keyframes[position]
+
+    codec = av.CodecContext.create("h264", "r")
+    if parameter_sets_end > parameter_sets_offset:
+        stream.seek(parameter_sets_offset)
+        codec.decode(av.Packet(stream.read(parameter_sets_end - parameter_sets_offset)))
+    stream.seek(offset)
+    while True:
+        chunk = stream.read(1 << 16)
+        # an empty chunk flushes the parser, None the decoder
+        packets = codec.parse(chunk) + ([None] if not chunk else [])
+        for packet in packets:
+            for frame in codec.decode(packet):
+                if frame_index == index:
+                    return frame.to_image()
+                frame_index += 1
+        if not chunk:
+            return None
@@ -0,0 +1,90 @@
+import io
+import os
+import shutil
+import struct
+import tempfile
+import zipfile
+from typing import BinaryIO
+
+# signature, versions, flags, method, time, date, crc, sizes, name length, extra length
+LOCAL_HEADER = struct.Struct("<4s5H3I2H")
+LOCAL_HEADER_MAGIC = b"PK\x03\x04"
+
+
+class StoredMember(io.RawIOBase):
+    """
+    Read only window over the data of a stored (uncompressed) zip member,
+    seeking is a plain seek of the archive file
+    """
+
+    def __init__(self, path: str, start: int, size: int):
+        super().__init__()
+        self.file = open(path, "rb")
+        self.start = start
+        self.size = size
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self.position
+        elif whence == os.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError(f"negative seek position {offset}")
+        self.position = offset
+        return self.position
+
+    def readinto(self, buffer) -> int:
+        count = min(len(buffer), max(self.size - self.position, 0))
+        if count == 0:
+            return 0
+        self.file.seek(self.start + self.position)
+        count = self.file.readinto(memoryview(buffer)[:count])
+        self.position += count
+        return count
+
+    def close(self) -> None:
+        if not self.closed:
+            self.file.close()
+        super().close()
+
+
+def open_member(zip_file: zipfile.ZipFile, name: str) -> BinaryIO:
+    """
+    Open a zip member for random access. ``ZipFile.open`` rewinds and reads
+    the member again from its start on every backward seek, so stored members
+    are read from the archive file directly, compressed ones are extracted to
+    a temporary file first
+
+    Args:
+        zip_file: archive opened from a path
+        name: member name
+
+    Returns:
+        seekable binary file, to be closed by the caller
+    """
+    info = zip_file.getinfo(name)
+    if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:
+        file = tempfile.TemporaryFile()
+        with zip_file.open(info) as member:
+            shutil.copyfileobj(member, file)
+        file.seek(0)
+        return file
+
+    with open(zip_file.filename, "rb") as f:
+        f.seek(info.header_offset)
+        header = LOCAL_HEADER.unpack(f.read(LOCAL_HEADER.size))
+    if header[0] != LOCAL_HEADER_MAGIC:
+        raise zipfile.BadZipFile(f"Bad local file header of {name}")
+    name_length, extra_length = header[-2:]
+    start = info.header_offset + LOCAL_HEADER.size + name_length + extra_length
+    return io.BufferedReader(StoredMember(zip_file.filename, start, info.file_size))
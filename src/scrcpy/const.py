@@ -298,6 +298,7 @@ KEYCODE_KEYCODE_THUMBS_DOWN = 287
 EVENT_INIT = "init"
 EVENT_FRAME = "frame"
 EVENT_DISCONNECT = "disconnect"
+EVENT_DEVICE_MESSAGE = "device_message"
 
 # Type
 TYPE_INJECT_KEYCODE = 0
@@ -313,6 +314,9 @@ TYPE_SET_CLIPBOARD = 9
 TYPE_SET_SCREEN_POWER_MODE = 10
 TYPE_ROTATE_DEVICE = 11
 
+# Device message type
+DEVICE_MSG_TYPE_CLIPBOARD = 0
+
 # Lock screen orientation
 LOCK_SCREEN_ORIENTATION_UNLOCKED = -1
 LOCK_SCREEN_ORIENTATION_INITIAL = -2
@@ -1,39 +1,140 @@
 import functools
-import socket
-import struct
-from time import sleep
+import math
+import time
+from concurrent.futures import Future, TimeoutError
+from typing import Any, Callable, Optional
 
 import src.scrcpy as scrcpy
-from src.scrcpy import const
+from src.scrcpy import const, encoder
+from src.scrcpy.reader import DeviceMessageReader
+from src.scrcpy.gesture import Gesture, GestureBuilder, GestureEngine
+from src.scrcpy.writer import ControlWriter
 
 
-def inject(control_type: int):
+def inject(f):
     """
-    Inject control code, with this inject, we will be able to do unit test
+    Send the package returned by a control method, with this inject, we will be
+    able to do unit test
 
     Args:
-        control_type: event to send, TYPE_*
+        f: returns the whole package encoded by src.scrcpy.encoder
     """
 
-    def wrapper(f):
-        @functools.wraps(f)
-        def inner(*args, **kwargs):
-            package = struct.pack(">B", control_type) + f(*args, **kwargs)
-            if args[0].parent.control_socket is not None:
-                with args[0].parent.control_socket_lock:
-                    args[0].parent.control_socket.send(package)
-            return package
+    @functools.wraps(f)
+    def inner(*args, **kwargs):
+        package = f(*args, **kwargs)
+        args[0].send(package, args[0].notify(package))
+        return package
 
-        return inner
-
-    return wrapper
+    return inner
 
 
 class ControlSender:
-    def __init__(self, parent):
+    def __init__(self, parent, synchronous: bool = False):
+        """
+        Args:
+            parent: client owning the control socket
+            synchronous: send on the caller's thread even if a writer is attached,
+                for scripts relying on a package being sent once the call returns
+        """
         self.parent = parent
+        self.listeners = []
+        self.synchronous = synchronous
+        self.writer: Optional[ControlWriter] = None
+        self.gesture_engine: Optional[GestureEngine] = None
+        self.reader: Optional[DeviceMessageReader] = None
+
+    def add_listener(self, listener: Callable[[bytes], Any]) -> None:
+        """
+        Add a listener of the packages sent by the control methods
+
+        Args:
+            listener: A function to receive the package bytes, it may return a
+                callback called with perf_counter_ns once the package is written
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[bytes], Any]) -> None:
+        self.listeners.remove(listener)
+
+    def notify(self, package: bytes) -> Optional[Callable[[int], None]]:
+        """
+        Pass a package to the listeners before it is sent
+
+        Returns:
+            on_sent for send, calling the callbacks returned by the listeners
+        """
+        callbacks = [
+            callback
+            for callback in (listener(package) for listener in self.listeners)
+            if callback is not None
+        ]
+        if len(callbacks) <= 1:
+            return callbacks[0] if callbacks else None
+
+        def on_sent(sent_at: int) -> None:
+            for callback in callbacks:
+                callback(sent_at)
+
+        return on_sent
+
+    def send(
+        self, package: bytes, on_sent: Optional[Callable[[int], None]] = None
+    ) -> None:
+        """
+        Send encoded control packages as is, listeners are not notified
 
-    @inject(const.TYPE_INJECT_KEYCODE)
+        Args:
+            package: one or more control packages
+            on_sent: called with perf_counter_ns once the packages are written,
+                on the writer thread when a writer is attached
+        """
+        if self.writer is not None:
+            if not self.synchronous:
+                self.writer.put(package, on_sent)
+                return
+            # keep the order of the packages queued before
+            self.writer.flush()
+        if self.parent.control_socket is not None:
+            with self.parent.control_socket_lock:
+                self.parent.control_socket.sendall(package)
+            if on_sent is not None:
+                on_sent(time.perf_counter_ns())
+
+    def send_notified(self, package: bytes) -> None:
+        """
+        Send packages built outside the control methods, listeners are notified
+        """
+        package = bytes(package)
+        self.send(package, self.notify(package))
+
+    def send_buffer(self, buffer: encoder.MessageBuffer) -> bytes:
+        """
+        Send the messages batch-encoded in a MessageBuffer with a single write,
+        listeners are notified. The buffer can be cleared and reused afterwards.
+
+        Returns:
+            the packages sent
+        """
+        package = buffer.getvalue()
+        self.send_notified(package)
+        return package
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the queued packages are sent
+
+        Args:
+            timeout: seconds, None means forever
+
+        Returns:
+            False on timeout
+        """
+        if self.writer is None:
+            return True
+        return self.writer.flush(timeout)
+
+    @inject
     def keycode(
         self, keycode: int, action: int = const.ACTION_DOWN, repeat: int = 0
     ) -> bytes:
@@ -45,9 +146,9 @@ class ControlSender:
             action: ACTION_DOWN | ACTION_UP
             repeat: repeat count
         """
-        return struct.pack(">Biii", action, keycode, repeat, 0)
+        return encoder.keycode(keycode, action, repeat)
 
-    @inject(const.TYPE_INJECT_TEXT)
+    @inject
     def text(self, text: str) -> bytes:
         """
         Send text to device
@@ -55,11 +156,9 @@ class ControlSender:
         Args:
             text: text to send
         """
+        return encoder.text(text)
 
-        buffer = text.encode("utf-8")
-        return struct.pack(">i", len(buffer)) + buffer
-
-    @inject(const.TYPE_INJECT_TOUCH_EVENT)
+    @inject
     def touch(
         self, x: int, y: int, action: int = const.ACTION_DOWN, touch_id: int = -1
     ) -> bytes:
@@ -72,20 +171,9 @@ class ControlSender:
             action: ACTION_DOWN | ACTION_UP | ACTION_MOVE
             touch_id: Default using virtual id -1, you can specify it to emulate multi finger touch
         """
-        x, y = max(x, 0), max(y, 0)
-        return struct.pack(
-            ">BqiiHHHi",
-            action,
-            touch_id,
-            int(x),
-            int(y),
-            int(self.parent.resolution[0]),
-            int(self.parent.resolution[1]),
-            0xFFFF,
-            1,
-        )
+        return encoder.touch(x, y, *self.parent.resolution, action, touch_id)
 
-    @inject(const.TYPE_INJECT_SCROLL_EVENT)
+    @inject
     def scroll(self, x: int, y: int, h: int, v: int) -> bytes:
         """
         Scroll screen
@@ -96,19 +184,9 @@ class ControlSender:
             h: horizontal movement
             v: vertical movement
         """
+        return encoder.scroll(x, y, *self.parent.resolution, h, v)
 
-        x, y = max(x, 0), max(y, 0)
-        return struct.pack(
-            ">iiHHii",
-            int(x),
-            int(y),
-            int(self.parent.resolution[0]),
-            int(self.parent.resolution[1]),
-            int(h),
-            int(v),
-        )
-
-    @inject(const.TYPE_BACK_OR_SCREEN_ON)
+    @inject
     def back_or_turn_screen_on(self, action: int = const.ACTION_DOWN) -> bytes:
         """
         If the screen is off, it is turned on only on ACTION_DOWN
@@ -116,56 +194,61 @@ class ControlSender:
         Args:
             action: ACTION_DOWN | ACTION_UP
         """
-        return struct.pack(">B", action)
+        return encoder.back_or_turn_screen_on(action)
 
-    @inject(const.TYPE_EXPAND_NOTIFICATION_PANEL)
+    @inject
     def expand_notification_panel(self) -> bytes:
         """
         Expand notification panel
         """
-        return b""
+        return encoder.type_only(const.TYPE_EXPAND_NOTIFICATION_PANEL)
 
-    @inject(const.TYPE_EXPAND_SETTINGS_PANEL)
+    @inject
     def expand_settings_panel(self) -> bytes:
         """
         Expand settings panel
         """
-        return b""
+        return encoder.type_only(const.TYPE_EXPAND_SETTINGS_PANEL)
 
-    @inject(const.TYPE_COLLAPSE_PANELS)
+    @inject
     def collapse_panels(self) -> bytes:
         """
         Collapse all panels
         """
-        return b""
+        return encoder.type_only(const.TYPE_COLLAPSE_PANELS)
+
+    def get_clipboard_async(self) -> Future:
+        """
+        Request the device clipboard, the reply is read by the device message
+        reader, input sending never waits on it
+
+        Returns:
+            future of the ClipboardMessage, cancel it to abandon the request
+        """
+        if self.reader is None:
+            raise RuntimeError("Device message reader is not started")
+        reply = self.reader.expect(const.DEVICE_MSG_TYPE_CLIPBOARD)
+        self.send(encoder.type_only(const.TYPE_GET_CLIPBOARD))
+        return reply
 
-    def get_clipboard(self) -> str:
+    def get_clipboard(self, timeout: Optional[float] = 3.0) -> str:
         """
         Get clipboard
+
+        Args:
+            timeout: seconds to wait for the reply, None means forever
+
+        Raises:
+            concurrent.futures.TimeoutError: no reply in time
         """
-        # Since this function need socket response, we can't auto inject it any more
-        s: socket.socket = self.parent.control_socket
-
-        with self.parent.control_socket_lock:
-            # Flush socket
-            s.setblocking(False)
-            while True:
-                try:
-                    s.recv(1024)
-                except BlockingIOError:
-                    break
-            s.setblocking(True)
-
-            # Read package
-            package = struct.pack(">B", const.TYPE_GET_CLIPBOARD)
-            s.send(package)
-            (code,) = struct.unpack(">B", s.recv(1))
-            assert code == 0
-            (length,) = struct.unpack(">i", s.recv(4))
-
-            return s.recv(length).decode("utf-8")
-
-    @inject(const.TYPE_SET_CLIPBOARD)
+        reply = self.get_clipboard_async()
+        try:
+            return reply.result(timeout).text
+        except TimeoutError:
+            reply.cancel()
+            raise
+
+    @inject
     def set_clipboard(self, text: str, paste: bool = False) -> bytes:
         """
         Set clipboard
@@ -174,10 +257,9 @@ class ControlSender:
             text: the string you want to set
             paste: paste now
         """
-        buffer = text.encode("utf-8")
-        return struct.pack(">?i", paste, len(buffer)) + buffer
+        return encoder.set_clipboard(text, paste)
 
-    @inject(const.TYPE_SET_SCREEN_POWER_MODE)
+    @inject
     def set_screen_power_mode(self, mode: int = scrcpy.POWER_MODE_NORMAL) -> bytes:
         """
         Set screen power mode
@@ -185,14 +267,41 @@ class ControlSender:
         Args:
             mode: POWER_MODE_OFF | POWER_MODE_NORMAL
         """
-        return struct.pack(">b", mode)
+        return encoder.set_screen_power_mode(mode)
 
-    @inject(const.TYPE_ROTATE_DEVICE)
+    @inject
     def rotate_device(self) -> bytes:
         """
         Rotate device
         """
-        return b""
+        return encoder.type_only(const.TYPE_ROTATE_DEVICE)
+
+    def gesture(self, gesture: Gesture) -> Future:
+        """
+        Play a precomputed gesture on the gesture engine thread, the caller is
+        never blocked
+
+        Args:
+            gesture: see src.scrcpy.gesture
+
+        Returns:
+            future of the play stats, gestures are played in the order queued
+        """
+        if self.gesture_engine is None:
+            self.gesture_engine = GestureEngine(self.send_notified)
+            self.gesture_engine.start()
+        return self.gesture_engine.play(gesture)
+
+    def stop_gestures(self) -> None:
+        """
+        Stop the gesture engine, queued gestures are cancelled and the pointers
+        of the one playing are released
+        """
+        if self.gesture_engine is not None:
+            self.gesture_engine.stop()
+            self.gesture_engine = None
+            # the release is queued on the writer, send it before the writer stops
+            self.flush(timeout=1)
 
     def swipe(
         self,
@@ -202,9 +311,10 @@ class ControlSender:
         end_y: int,
         move_step_length: int = 5,
         move_steps_delay: float = 0.005,
+        easing: str = "linear",
     ) -> None:
         """
-        Swipe on screen
+        Swipe on screen, returns once the swipe is done
 
         Args:
             start_x: start horizontal position
@@ -212,44 +322,45 @@ class ControlSender:
             end_x: start horizontal position
             end_y: end vertical position
             move_step_length: length per step
-            move_steps_delay: sleep seconds after each step
-        :return:
-        """
-
-        self.touch(start_x, start_y, const.ACTION_DOWN)
-        next_x = start_x
-        next_y = start_y
-
-        if end_x > self.parent.resolution[0]:
-            end_x = self.parent.resolution[0]
-
-        if end_y > self.parent.resolution[1]:
-            end_y = self.parent.resolution[1]
-
-        decrease_x = True if start_x > end_x else False
-        decrease_y = True if start_y > end_y else False
-        while True:
-            if decrease_x:
-                next_x -= move_step_length
-                if next_x < end_x:
-                    next_x = end_x
-            else:
-                next_x += move_step_length
-                if next_x > end_x:
-                    next_x = end_x
-
-            if decrease_y:
-                next_y -= move_step_length
-                if next_y < end_y:
-                    next_y = end_y
-            else:
-                next_y += move_step_length
-                if next_y > end_y:
-                    next_y = end_y
-
-            self.touch(next_x, next_y, const.ACTION_MOVE)
-
-            if next_x == end_x and next_y == end_y:
-                self.touch(next_x, next_y, const.ACTION_UP)
-                break
-            sleep(move_steps_delay)
\ No newline at end of file
+            move_steps_delay: seconds between two steps
+            easing: name of src.scrcpy.gesture.EASINGS
+        """
+        self.swipe_async(
+            start_x,
+            start_y,
+            end_x,
+            end_y,
+            move_step_length,
+            move_steps_delay,
+            easing,
+        ).result()
+
+    def swipe_async(
+        self,
+        start_x: int,
+        start_y: int,
+        end_x: int,
+        end_y: int,
+        move_step_length: int = 5,
+        move_steps_delay: float = 0.005,
+        easing: str = "linear",
+    ) -> Future:
+        """
+        Swipe on screen without blocking the caller, see swipe
+
+        Returns:
+            future of the play stats, call result() to wait until the swipe is done
+        """
+        distance = max(abs(end_x - start_x), abs(end_y - start_y))
+        steps = max(1, math.ceil(distance / move_step_length))
+        return self.gesture(
+            GestureBuilder(self.parent.resolution)
+            .stroke(
+                (start_x, start_y),
+                (end_x, end_y),
+                steps * move_steps_delay,
+                easing,
+                move_steps_delay,
+            )
+            .build()
+        )
@@ -0,0 +1,492 @@
+"""
+Precomputed touch gestures played on a timer thread
+
+A gesture is built once into a single buffer of touch packages, grouped into
+batches by timestamp. The engine sends every batch at an absolute deadline
+from the gesture start, so the send cost of a step never delays the next one.
+Multi-touch gestures interleave the pointers into the same batches, a batch is
+sent with a single write so the fingers move in lockstep on the device.
+"""
+import collections
+import math
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from src.scrcpy import const, encoder
+from src.scrcpy.timing import SPIN_NS, wait_until
+
+
+def linear(t: float) -> float:
+    return t
+
+
+def ease_in(t: float) -> float:
+    return t * t
+
+
+def ease_out(t: float) -> float:
+    return 1 - (1 - t) * (1 - t)
+
+
+def ease_in_out(t: float) -> float:
+    return 3 * t * t - 2 * t * t * t
+
+
+EASINGS: dict[str, Callable[[float], float]] = {
+    "linear": linear,
+    "ease_in": ease_in,
+    "ease_out": ease_out,
+    "ease_in_out": ease_in_out,
+}
+
+
+class Gesture:
+    """
+    Touch packages grouped into timed batches, see GestureBuilder
+    """
+
+    def __init__(self, buffer: bytes, times: list[int], bounds: list[int]):
+        """
+        Args:
+            buffer: all the packages of the gesture
+            times: us since the gesture start of each batch
+            bounds: batch i is buffer[bounds[i]:bounds[i + 1]]
+        """
+        self.buffer = buffer
+        self.times = times
+        self.bounds = bounds
+
+    def __len__(self):
+        return len(self.times)
+
+    def batch(self, start: int, end: Optional[int] = None) -> memoryview:
+        """
+        Packages of the batches start ~ end (exclusive), contiguous in the buffer
+        """
+        end = start + 1 if end is None else end
+        return memoryview(self.buffer)[self.bounds[start] : self.bounds[end]]
+
+    @property
+    def duration(self) -> float:
+        """
+        Seconds
+        """
+        return self.times[-1] / 1e6 if self.times else 0.0
+
+    def release(self, end: int) -> bytes:
+        """
+        ACTION_UP packages for the pointers still down once the batches before
+        ``end`` are sent, released where they were last moved to
+        """
+        down = {}
+        for message in encoder.TOUCH.iter_unpack(self.batch(0, end)):
+            _, action, touch_id, x, y, width, height, _, _ = message
+            if action == const.ACTION_UP:
+                down.pop(touch_id, None)
+            else:
+                down[touch_id] = (x, y, width, height)
+        return b"".join(
+            encoder.touch(x, y, width, height, const.ACTION_UP, touch_id)
+            for touch_id, (x, y, width, height) in down.items()
+        )
+
+
+class GestureBuilder:
+    def __init__(self, resolution: tuple[int, int]):
+        """
+        Args:
+            resolution: device screen size, sent with every touch package
+        """
+        self.resolution = resolution
+        self.events: list[tuple] = []  # (us, order, action, touch_id, x, y)
+
+    def touch(
+        self, t: float, x: float, y: float, action: int, touch_id: int = -1
+    ) -> "GestureBuilder":
+        """
+        Args:
+            t: seconds since the gesture start
+            x: horizontal position
+            y: vertical position
+            action: ACTION_DOWN | ACTION_UP | ACTION_MOVE
+            touch_id: pointer id
+        """
+        width, height = self.resolution
+        x = min(max(round(x), 0), width)
+        y = min(max(round(y), 0), height)
+        self.events.append((round(t * 1e6), len(self.events), action, touch_id, x, y))
+        return self
+
+    def path(
+        self,
+        position: Callable[[float], tuple[float, float]],
+        duration: float,
+        easing: str = "linear",
+        interval: float = 0.008,
+        touch_id: int = -1,
+        at: float = 0.0,
+        down: bool = True,
+        up: bool = True,
+    ) -> "GestureBuilder":
+        """
+        Move a pointer along a path, pointers using the same timing get their
+        moves in the same batches
+
+        Args:
+            position: progress 0 ~ 1 to position
+            duration: seconds
+            easing: name of EASINGS, progress along the path over time
+            interval: seconds between two moves
+            touch_id: pointer id
+            at: start time of the path in seconds
+            down: press the pointer at the start
+            up: release the pointer at the end
+        """
+        ease = EASINGS[easing]
+        steps = max(1, math.ceil(duration / interval))
+        if down:
+            self.touch(at, *position(0.0), const.ACTION_DOWN, touch_id)
+        for i in range(1, steps + 1):
+            t = i / steps
+            self.touch(
+                at + duration * t, *position(ease(t)), const.ACTION_MOVE, touch_id
+            )
+        if up:
+            self.touch(at + duration, *position(1.0), const.ACTION_UP, touch_id)
+        return self
+
+    def stroke(
+        self,
+        start: tuple[float, float],
+        end: tuple[float, float],
+        duration: float,
+        easing: str = "linear",
+        interval: float = 0.008,
+        touch_id: int = -1,
+        at: float = 0.0,
+        down: bool = True,
+        up: bool = True,
+    ) -> "GestureBuilder":
+        """
+        Move a pointer along a straight line, see path
+        """
+        return self.path(
+            lambda p: (
+                start[0] + (end[0] - start[0]) * p,
+                start[1] + (end[1] - start[1]) * p,
+            ),
+            duration,
+            easing,
+            interval,
+            touch_id,
+            at,
+            down,
+            up,
+        )
+
+    def orbit(
+        self,
+        center: tuple[float, float],
+        radius: tuple[float, float],
+        angle: tuple[float, float],
+        duration: float,
+        easing: str = "linear",
+        interval: float = 0.008,
+        touch_id: int = 0,
+        at: float = 0.0,
+    ) -> "GestureBuilder":
+        """
+        Move a pointer around a center, interpolating the radius and the angle
+
+        Args:
+            center: center position
+            radius: start and end distance from the center
+            angle: start and end angle in degrees
+        """
+        return self.path(
+            lambda p: (
+                center[0]
+                + (radius[0] + (radius[1] - radius[0]) * p)
+                * math.cos(math.radians(angle[0] + (angle[1] - angle[0]) * p)),
+                center[1]
+                + (radius[0] + (radius[1] - radius[0]) * p)
+                * math.sin(math.radians(angle[0] + (angle[1] - angle[0]) * p)),
+            ),
+            duration,
+            easing,
+            interval,
+            touch_id,
+            at,
+        )
+
+    def build(self) -> Gesture:
+        """
+        Sort the packages by time, packages with the same timestamp form a batch
+        """
+        width, height = self.resolution
+        buffer = bytearray(len(self.events) * encoder.TOUCH.size)
+        times: list[int] = []
+        bounds = [0]
+        offset = 0
+        for t, _, action, touch_id, x, y in sorted(self.events):
+            if times and times[-1] == t:
+                bounds.pop()
+            else:
+                times.append(t)
+            encoder.TOUCH.pack_into(
+                buffer,
+                offset,
+                const.TYPE_INJECT_TOUCH_EVENT,
+                action,
+                touch_id,
+                x,
+                y,
+                width,
+                height,
+                0xFFFF,
+                1,
+            )
+            offset += encoder.TOUCH.size
+            bounds.append(offset)
+        return Gesture(bytes(buffer), times, bounds)
+
+
+def swipe(
+    resolution: tuple[int, int],
+    start: tuple[float, float],
+    end: tuple[float, float],
+    duration: float = 0.3,
+    easing: str = "ease_in_out",
+    interval: float = 0.008,
+    touch_id: int = -1,
+) -> Gesture:
+    """
+    Press, move to end and release
+    """
+    return (
+        GestureBuilder(resolution)
+        .stroke(start, end, duration, easing, interval, touch_id)
+        .build()
+    )
+
+
+def fling(
+    resolution: tuple[int, int],
+    start: tuple[float, float],
+    velocity: tuple[float, float],
+    duration: float = 0.06,
+    interval: float = 0.008,
+    touch_id: int = -1,
+) -> Gesture:
+    """
+    Move at a constant velocity and release while still moving, so the device
+    measures this velocity at the release
+
+    Args:
+        velocity: pixels per second
+        duration: seconds of movement before the release
+    """
+    end = (start[0] + velocity[0] * duration, start[1] + velocity[1] * duration)
+    return (
+        GestureBuilder(resolution)
+        .stroke(start, end, duration, "linear", interval, touch_id)
+        .build()
+    )
+
+
+def pinch(
+    resolution: tuple[int, int],
+    center: tuple[float, float],
+    start_distance: float,
+    end_distance: float,
+    angle: float = 0.0,
+    duration: float = 0.4,
+    easing: str = "ease_in_out",
+    interval: float = 0.008,
+) -> Gesture:
+    """
+    Two fingers moving apart (zoom in) or together (zoom out)
+
+    Args:
+        center: midpoint of the fingers
+        start_distance: distance between the fingers at the start
+        end_distance: distance between the fingers at the end
+        angle: direction of the fingers in degrees, 0 is horizontal
+    """
+    builder = GestureBuilder(resolution)
+    for touch_id in range(2):
+        direction = angle + 180 * touch_id
+        builder.orbit(
+            center,
+            (start_distance / 2, end_distance / 2),
+            (direction, direction),
+            duration,
+            easing,
+            interval,
+            touch_id,
+        )
+    return builder.build()
+
+
+def rotate(
+    resolution: tuple[int, int],
+    center: tuple[float, float],
+    radius: float,
+    degrees: float,
+    start_angle: float = 0.0,
+    fingers: int = 2,
+    duration: float = 0.5,
+    easing: str = "ease_in_out",
+    interval: float = 0.008,
+) -> Gesture:
+    """
+    Fingers spread evenly on a circle, turning around its center
+
+    Args:
+        degrees: rotation, positive is clockwise on screen
+    """
+    builder = GestureBuilder(resolution)
+    for touch_id in range(fingers):
+        direction = start_angle + 360 * touch_id / fingers
+        builder.orbit(
+            center,
+            (radius, radius),
+            (direction, direction + degrees),
+            duration,
+            easing,
+            interval,
+            touch_id,
+        )
+    return builder.build()
+
+
+def multi_swipe(
+    resolution: tuple[int, int],
+    starts: list[tuple[float, float]],
+    offset: tuple[float, float],
+    duration: float = 0.3,
+    easing: str = "ease_in_out",
+    interval: float = 0.008,
+) -> Gesture:
+    """
+    Several fingers swiping the same offset in lockstep
+
+    Args:
+        starts: start position of each finger
+        offset: movement of every finger
+    """
+    builder = GestureBuilder(resolution)
+    for touch_id, start in enumerate(starts):
+        builder.stroke(
+            start,
+            (start[0] + offset[0], start[1] + offset[1]),
+            duration,
+            easing,
+            interval,
+            touch_id,
+        )
+    return builder.build()
+
+
+class GestureEngine(threading.Thread):
+    """
+    Play gestures one after another on a dedicated thread.
+
+    The thread sleeps until shortly before a deadline and spins for the rest,
+    batches already due (e.g. after a scheduling hiccup) are sent together so
+    the gesture catches up instead of drifting.
+    """
+
+    spin_ns = SPIN_NS
+
+    def __init__(self, send: Callable[[bytes], None]):
+        """
+        Args:
+            send: sends the packages, e.g. ControlSender.send
+        """
+        super().__init__(name="GestureEngine", daemon=True)
+        self.send = send
+        self.queue: collections.deque = collections.deque()
+        self.wakeup = threading.Event()
+        self.stop_event = threading.Event()
+
+    def play(self, gesture: Gesture) -> Future:
+        """
+        Queue a gesture
+
+        Returns:
+            future of the play stats (batches sent, max / mean lateness in us),
+            cancel it to skip a queued gesture
+        """
+        future = Future()
+        if self.stop_event.is_set():
+            future.set_exception(RuntimeError("Gesture engine is stopped"))
+            return future
+        self.queue.append((gesture, future))
+        self.wakeup.set()
+        return future
+
+    def run(self) -> None:
+        while not self.stop_event.is_set():
+            self.wakeup.wait()
+            self.wakeup.clear()
+            while self.queue and not self.stop_event.is_set():
+                gesture, future = self.queue.popleft()
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(self.perform(gesture))
+                except Exception as e:
+                    future.set_exception(e)
+        self.cancel_pending()
+
+    def perform(self, gesture: Gesture) -> dict:
+        start = time.perf_counter_ns()
+        i = 0
+        sent = 0
+        max_lateness = 0
+        total_lateness = 0
+        while i < len(gesture):
+            deadline = start + gesture.times[i] * 1000
+            if wait_until(deadline, self.stop_event, self.spin_ns):
+                # lift the fingers, the device would keep them pressed
+                release = gesture.release(i)
+                if release:
+                    self.send(release)
+                raise RuntimeError("Gesture engine is stopped")
+            # every batch due by now goes out in one write
+            now = time.perf_counter_ns()
+            end = i + 1
+            while end < len(gesture) and start + gesture.times[end] * 1000 <= now:
+                end += 1
+            self.send(gesture.batch(i, end))
+            for j in range(i, end):
+                lateness = (now - start) // 1000 - gesture.times[j]
+                max_lateness = max(max_lateness, lateness)
+                total_lateness += lateness
+            sent += end - i
+            i = end
+        return {
+            "batches": sent,
+            "max_lateness_us": max_lateness,
+            "mean_lateness_us": total_lateness / sent if sent else 0.0,
+        }
+
+    def cancel_pending(self) -> None:
+        while self.queue:
+            _, future = self.queue.popleft()
+            future.cancel()
+
+    def stop(self, timeout: Optional[float] = 1.0) -> None:
+        """
+        Stop playing, the pointers of an interrupted gesture are released
+
+        Args:
+            timeout: seconds to wait for the release to be sent, None forever
+        """
+        self.stop_event.set()
+        self.wakeup.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
@@ -0,0 +1,155 @@
+"""
+Record the control packages sent by ControlSender and replay them with the original timing
+
+Macro file layout:
+    MACRO_MAGIC + version byte
+    event    EVENT_HEADER(delay since the previous event in us, package length) + package
+    ...
+
+Version 1 files used a 32 bit delay and a 16 bit length, they are still read.
+"""
+import struct
+import threading
+import time
+from typing import BinaryIO, Callable, Optional, Union
+
+from src.scrcpy.timing import SPIN_NS, wait_until
+
+MACRO_MAGIC = b"BASMACRO"
+MACRO_VERSION = 2
+EVENT_HEADERS = {
+    1: struct.Struct(">IH"),
+    2: struct.Struct(">QI"),
+}
+EVENT_HEADER = EVENT_HEADERS[MACRO_VERSION]
+
+
+class MacroRecorder:
+    def __init__(self):
+        self.events: list[tuple[int, bytes]] = []  # (us since start, package)
+        self.started_at: Optional[int] = None
+        self.lock = threading.Lock()
+
+    def start(self) -> None:
+        with self.lock:
+            self.events = []
+            self.started_at = time.perf_counter_ns()
+
+    def stop(self) -> None:
+        with self.lock:
+            self.started_at = None
+
+    @property
+    def is_recording(self) -> bool:
+        return self.started_at is not None
+
+    def on_package(self, package: bytes) -> None:
+        """
+        ControlSender listener, timestamps are taken from the monotonic clock
+        """
+        now = time.perf_counter_ns()
+        with self.lock:
+            if self.started_at is None:
+                return
+            self.events.append(((now - self.started_at) // 1000, package))
+
+    def save(self, file: Union[str, BinaryIO]) -> None:
+        dump_macro(self.events, file)
+
+
+def dump_macro(events: list[tuple[int, bytes]], file: Union[str, BinaryIO]) -> None:
+    if isinstance(file, str):
+        with open(file, "wb") as f:
+            return dump_macro(events, f)
+    file.write(MACRO_MAGIC + bytes([MACRO_VERSION]))
+    last = 0
+    for timestamp, package in events:
+        file.write(EVENT_HEADER.pack(timestamp - last, len(package)))
+        file.write(package)
+        last = timestamp
+
+
+def load_macro(file: Union[str, BinaryIO]) -> list[tuple[int, bytes]]:
+    """
+    Returns:
+        events of (us since start, package)
+    """
+    if isinstance(file, str):
+        with open(file, "rb") as f:
+            return load_macro(f)
+    magic = file.read(len(MACRO_MAGIC) + 1)
+    if len(magic) <= len(MACRO_MAGIC) or magic[:-1] != MACRO_MAGIC:
+        raise ValueError("Not a macro file")
+    event_header = EVENT_HEADERS.get(magic[-1])
+    if event_header is None:
+        raise ValueError(f"Unsupported macro version {magic[-1]}")
+    events = []
+    timestamp = 0
+    while True:
+        header = file.read(event_header.size)
+        if len(header) < event_header.size:
+            break
+        delay, length = event_header.unpack(header)
+        package = file.read(length)
+        if len(package) < length:
+            # truncated file, e.g. not fully written
+            break
+        timestamp += delay
+        events.append((timestamp, package))
+    return events
+
+
+class MacroReplayer(threading.Thread):
+    """
+    Send the events of a macro on a dedicated thread.
+
+    Every event is scheduled at an absolute deadline from the replay start, so
+    the send cost and sleep jitter of an event never shift the following ones.
+    The thread sleeps until shortly before a deadline and spins for the rest.
+    """
+
+    spin_ns = SPIN_NS
+
+    def __init__(
+        self,
+        events: list[tuple[int, bytes]],
+        send: Callable[[bytes], None],
+        on_finished: Optional[Callable[["MacroReplayer"], None]] = None,
+    ):
+        """
+        Args:
+            events: (us since start, package), see load_macro
+            send: sends a package, e.g. ControlSender.send
+            on_finished: called from the replay thread once done or stopped
+        """
+        super().__init__(name="MacroReplayer", daemon=True)
+        self.events = events
+        self.send = send
+        self.on_finished = on_finished
+        self.stop_event = threading.Event()
+        self.max_lateness_us = 0
+        self.total_lateness_us = 0
+        self.sent = 0
+
+    def run(self) -> None:
+        start = time.perf_counter_ns()
+        try:
+            for timestamp, package in self.events:
+                deadline = start + timestamp * 1000
+                if wait_until(deadline, self.stop_event, self.spin_ns):
+                    break
+                self.send(package)
+                lateness = (time.perf_counter_ns() - deadline) // 1000
+                self.max_lateness_us = max(self.max_lateness_us, lateness)
+                self.total_lateness_us += lateness
+                self.sent += 1
+        finally:
+            if self.on_finished is not None:
+                self.on_finished(self)
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    @property
+    def mean_lateness_us(self) -> float:
+        return self.total_lateness_us / self.sent if self.sent else 0.0
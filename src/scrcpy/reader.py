@@ -0,0 +1,176 @@
+"""
+Read the device messages sent back on the control socket
+
+scrcpy 1.20 device messages:
+    clipboard   DEVICE_MSG_TYPE_CLIPBOARD(u8) + length(i32) + utf-8 text
+
+The server sends a clipboard message as a reply to TYPE_GET_CLIPBOARD and
+whenever the device clipboard changes. Replies carry no request id, so pending
+requests of a type are resolved in order by the next messages of that type.
+"""
+import collections
+import logging
+import socket
+import struct
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from src.scrcpy import const
+
+log = logging.getLogger(__name__)
+
+MESSAGE_HEADER = struct.Struct(">B")
+CLIPBOARD_LENGTH = struct.Struct(">i")
+
+
+@dataclass
+class ClipboardMessage:
+    text: str
+
+    type = const.DEVICE_MSG_TYPE_CLIPBOARD
+
+
+def parse_message(buffer: bytearray) -> tuple[Optional[Any], int]:
+    """
+    Parse one device message from the start of the buffer
+
+    Returns:
+        (message, bytes consumed), (None, 0) if the message is not complete yet
+
+    Raises:
+        ValueError: unknown message type, its length is unknown
+    """
+    if not buffer:
+        return None, 0
+    (message_type,) = MESSAGE_HEADER.unpack_from(buffer)
+    if message_type == const.DEVICE_MSG_TYPE_CLIPBOARD:
+        header = MESSAGE_HEADER.size + CLIPBOARD_LENGTH.size
+        if len(buffer) < header:
+            return None, 0
+        (length,) = CLIPBOARD_LENGTH.unpack_from(buffer, MESSAGE_HEADER.size)
+        if len(buffer) < header + length:
+            return None, 0
+        text = bytes(buffer[header : header + length]).decode("utf-8", "replace")
+        return ClipboardMessage(text), header + length
+    raise ValueError(f"Unknown device message type: {message_type}")
+
+
+class DeviceMessageReader(threading.Thread):
+    """
+    Parse the device messages on a dedicated thread.
+
+    Only this thread reads the control socket, senders never wait on a read.
+    Messages resolve the pending requests of their type first, the others are
+    passed to the listeners (called on the reader thread). An unknown message
+    (e.g. from a newer server) is dropped with the bytes received along, the
+    pending requests fail as their reply may be lost, reading goes on.
+    """
+
+    def __init__(self, control_socket: socket.socket, buffer_size: int = 4096):
+        """
+        Args:
+            control_socket: scrcpy control socket
+            buffer_size: bytes per recv call
+        """
+        super().__init__(name="DeviceMessageReader", daemon=True)
+        self.control_socket = control_socket
+        self.buffer_size = buffer_size
+        self.listeners: list[Callable[[Any], Any]] = []
+        self.pending: dict[int, collections.deque] = collections.defaultdict(
+            collections.deque
+        )
+        self.lock = threading.Lock()
+        self.alive = True
+        self.error: Optional[Exception] = None
+
+    def add_listener(self, listener: Callable[[Any], Any]) -> None:
+        """
+        Args:
+            listener: receives the unsolicited messages, e.g. ClipboardMessage
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Any], Any]) -> None:
+        self.listeners.remove(listener)
+
+    def expect(self, message_type: int) -> Future:
+        """
+        Register a pending request, call it before sending the request
+
+        Args:
+            message_type: DEVICE_MSG_TYPE_* of the reply
+
+        Returns:
+            future resolved with the reply message
+        """
+        future = Future()
+        with self.lock:
+            if not self.alive:
+                future.set_exception(
+                    ConnectionError(f"Device message reader is stopped: {self.error}")
+                )
+                return future
+            self.pending[message_type].append(future)
+        return future
+
+    def run(self) -> None:
+        buffer = bytearray()
+        try:
+            while self.alive:
+                data = self.control_socket.recv(self.buffer_size)
+                if not data:
+                    raise ConnectionError("Control socket closed")
+                buffer += data
+                while True:
+                    try:
+                        message, consumed = parse_message(buffer)
+                    except ValueError as e:
+                        # where the message ends is unknown, resume at the next recv
+                        log.warning("%s, %d bytes dropped", e, len(buffer))
+                        buffer.clear()
+                        self.fail_pending(e)
+                        break
+                    if message is None:
+                        break
+                    del buffer[:consumed]
+                    self.dispatch(message)
+        except OSError as e:
+            self.error = e
+        finally:
+            self.stop()
+
+    def dispatch(self, message: Any) -> None:
+        with self.lock:
+            waiting = self.pending[message.type]
+            future = None
+            while waiting and future is None:
+                future = waiting.popleft()
+                if not future.set_running_or_notify_cancel():
+                    # abandoned after a timeout
+                    future = None
+        if future is not None:
+            future.set_result(message)
+            return
+        for listener in self.listeners:
+            listener(message)
+
+    def stop(self) -> None:
+        """
+        Stop reading, the pending requests fail, close the socket to wake up
+        a blocked recv
+        """
+        with self.lock:
+            self.alive = False
+        self.fail_pending(
+            ConnectionError(f"Device message reader is stopped: {self.error}")
+        )
+
+    def fail_pending(self, error: Exception) -> None:
+        with self.lock:
+            pending = [_ for waiting in self.pending.values() for _ in waiting]
+            self.pending.clear()
+        for future in pending:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(error)
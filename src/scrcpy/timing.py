@@ -0,0 +1,26 @@
+import threading
+import time
+
+# the last part of a wait is spent spinning, sleeps overshoot by ~1 ms or more
+SPIN_NS = 2_000_000
+
+
+def wait_until(deadline: int, stop_event: threading.Event, spin_ns: int = SPIN_NS) -> bool:
+    """
+    Sleep until shortly before an absolute deadline and spin for the rest
+
+    Args:
+        deadline: time.perf_counter_ns value to wait for
+        stop_event: ends the wait early once set
+        spin_ns: time spent spinning before the deadline
+
+    Returns:
+        True if stopped while waiting
+    """
+    while True:
+        remaining = deadline - time.perf_counter_ns()
+        if remaining <= 0:
+            return stop_event.is_set()
+        if remaining > spin_ns:
+            if stop_event.wait((remaining - spin_ns) / 1e9):
+                return True
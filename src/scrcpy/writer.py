@@ -0,0 +1,158 @@
+import collections
+import socket
+import threading
+import time
+from typing import Callable, Optional
+
+
+class ControlWriter(threading.Thread):
+    """
+    Send control packages on a dedicated thread, so a congested adb forward
+    never blocks the caller.
+
+    Packages are queued in a deque (append / popleft are atomic, no lock is
+    taken by the producers), everything queued while a send is in progress is
+    written with a single vectored sendmsg call when available.
+    """
+
+    def __init__(
+        self,
+        control_socket: socket.socket,
+        control_socket_lock: threading.Lock,
+        batching: bool = True,
+        max_batch: int = 64,
+    ):
+        """
+        Args:
+            control_socket: scrcpy control socket
+            control_socket_lock: lock shared with the other users of the socket
+            batching: send several queued packages per syscall
+            max_batch: maximum packages per syscall
+        """
+        super().__init__(name="ControlWriter", daemon=True)
+        self.control_socket = control_socket
+        self.control_socket_lock = control_socket_lock
+        self.batching = batching
+        self.max_batch = max_batch if batching else 1
+        self.use_sendmsg = batching and hasattr(control_socket, "sendmsg")
+
+        self.queue: collections.deque = collections.deque()
+        self.wakeup = threading.Event()
+        self.alive = True
+        self.error: Optional[OSError] = None
+
+        self.drained = threading.Condition()
+        self.sending = False
+
+        # metrics
+        self.sent_count = 0
+        self.dropped_count = 0
+        self.batch_count = 0
+        self.total_latency_ns = 0
+        self.max_latency_ns = 0
+
+    def put(
+        self, package: bytes, on_sent: Optional[Callable[[int], None]] = None
+    ) -> None:
+        """
+        Args:
+            package: one or more control packages
+            on_sent: called on the writer thread with perf_counter_ns once written,
+                never for a package dropped because the writer is stopped
+        """
+        if not self.alive:
+            # nothing would consume it anymore
+            self.dropped_count += 1
+            return
+        self.queue.append((time.perf_counter_ns(), package, on_sent))
+        self.wakeup.set()
+
+    def run(self) -> None:
+        while self.alive:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            while self.queue and self.alive:
+                self.sending = True
+                batch = []
+                while self.queue and len(batch) < self.max_batch:
+                    batch.append(self.queue.popleft())
+                self.send_batch(batch)
+        # stopped or the socket failed, the rest is never sent
+        self.dropped_count += len(self.queue)
+        self.queue.clear()
+
+    def send_batch(self, batch: list) -> None:
+        buffers = [package for _, package, _ in batch]
+        try:
+            with self.control_socket_lock:
+                if self.use_sendmsg and len(buffers) > 1:
+                    sent = self.control_socket.sendmsg(buffers)
+                    if sent < sum(len(_) for _ in buffers):
+                        self.control_socket.sendall(b"".join(buffers)[sent:])
+                else:
+                    self.control_socket.sendall(b"".join(buffers))
+        except OSError as e:
+            # socket is closed, the client is going to be stopped
+            self.error = e
+            self.alive = False
+
+        now = time.perf_counter_ns()
+        for queued_at, _, on_sent in batch:
+            latency = now - queued_at
+            self.total_latency_ns += latency
+            self.max_latency_ns = max(self.max_latency_ns, latency)
+            if on_sent is not None and self.error is None:
+                on_sent(now)
+        self.sent_count += len(batch)
+        self.batch_count += 1
+        with self.drained:
+            self.sending = False
+            self.drained.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every package queued so far is sent
+
+        Returns:
+            False on timeout or if the writer is stopped
+        """
+        with self.drained:
+            return (
+                self.drained.wait_for(
+                    lambda: not (self.queue or self.sending) or not self.alive,
+                    timeout,
+                )
+                and self.alive
+            )
+
+    def stop(self, wait: bool = True) -> None:
+        """
+        Args:
+            wait: join the thread, don't wait if the socket may block a send,
+                close the socket first and join afterwards
+        """
+        self.alive = False
+        self.wakeup.set()
+        with self.drained:
+            self.drained.notify_all()
+        if wait and self.is_alive() and threading.current_thread() is not self:
+            self.join()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self.queue)
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            queue depth, sent / dropped packages, syscalls, mean and max send latency (us)
+        """
+        sent = self.sent_count
+        return {
+            "queue_depth": self.queue_depth,
+            "sent": sent,
+            "dropped": self.dropped_count,
+            "batches": self.batch_count,
+            "mean_latency_us": self.total_latency_ns / sent / 1000 if sent else 0.0,
+            "max_latency_us": self.max_latency_ns / 1000,
+        }